@@ -0,0 +1,17 @@
+"""
+ASGI entry point for the asyncio Socket.IO runtime, e.g.:
+
+    uvicorn asgi:application --host 0.0.0.0 --port 5000
+"""
+import os
+import sys
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+# Must be set before app.py is imported, which otherwise monkey-patches eventlet
+os.environ['SOCKETIO_ASYNC_MODE'] = 'asyncio'
+
+from app import app
+
+application = app.extensions['socketio'].asgi_app
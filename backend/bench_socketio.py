@@ -0,0 +1,204 @@
+"""
+Socket.IO runtime benchmark
+
+Starts the backend in each async mode, connects many concurrent clients,
+runs the simulation and reports how many frames reached the clients and
+how quickly a probe client's commands were answered while it ran, e.g.:
+
+    python bench_socketio.py --clients 1000 --duration 30 --speed max
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import socketio
+
+MODES = ('eventlet', 'asyncio')
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Compare the eventlet and asyncio Socket.IO runtimes')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES),
+                        help='Async modes to benchmark (default: both)')
+    parser.add_argument('--clients', type=int, default=1000,
+                        help='Concurrent streaming clients (default: 1000)')
+    parser.add_argument('--duration', type=float, default=30.0,
+                        help='Measured seconds per mode (default: 30)')
+    parser.add_argument('--encoding', choices=['full', 'delta', 'binary'], default='full',
+                        help='Vehicle encoding the clients subscribe to (default: full)')
+    parser.add_argument('--scenario', default='rush_hour', help='Scenario to run (default: rush_hour)')
+    parser.add_argument('--speed', default='1', help="Simulation speed factor or 'max' (default: 1)")
+    parser.add_argument('--client-procs', type=int, default=2,
+                        help='Processes the clients are spread over (default: 2)')
+    parser.add_argument('--port', type=int, default=5055, help='Port for the server (default: 5055)')
+    return parser.parse_args(argv)
+
+
+def start_server(mode: str, port: int) -> subprocess.Popen:
+    """Run src/app.py in `mode` and wait until it answers HTTP"""
+    env = dict(os.environ, SOCKETIO_ASYNC_MODE=mode, PORT=str(port), FLASK_ENV='production',
+               SIMULATION_ENGINE=os.getenv('SIMULATION_ENGINE', 'numpy'))
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(__file__) or '.', 'src', 'app.py')],
+                              env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'{mode} server exited with code {server.returncode}')
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/api/version', timeout=1)
+            return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+async def _stream_clients(url: str, count: int, encoding: str, duration: float, ready, results):
+    """Connect `count` clients, count their frames for `duration` seconds after `ready` is set"""
+    frames = [0] * count
+    clients = []
+    gate = asyncio.Semaphore(50)
+
+    async def connect(index):
+        client = socketio.AsyncClient(reconnection=False)
+
+        @client.on('*')
+        async def any_event(event, *args):
+            if event in ('simulation_update', 'vehicle_update', 'vehicle_delta'):
+                frames[index] += 1
+
+        async with gate:
+            try:
+                await client.connect(url, transports=['websocket'], wait_timeout=30)
+            except Exception:
+                return
+        if encoding != 'full':
+            await client.emit('subscribe', {'event_type': f'vehicle_{encoding}'})
+        clients.append(client)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connect(i) for i in range(count)))
+    connect_time = time.perf_counter() - started
+    results.put(('connected', len(clients), connect_time))
+
+    while not ready.is_set():
+        await asyncio.sleep(0.05)
+    before = sum(frames)
+    await asyncio.sleep(duration)
+    received = sum(frames) - before
+
+    results.put(('frames', len(clients), received))
+    await asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True)
+
+
+def _client_process(url, count, encoding, duration, ready, results):
+    asyncio.run(_stream_clients(url, count, encoding, duration, ready, results))
+
+
+async def _probe(url: str, args) -> list:
+    """Start the simulation, then time get_status round trips while it runs"""
+    client = socketio.AsyncClient(reconnection=False)
+    replies = asyncio.Queue()
+
+    @client.on('simulation_status')
+    async def on_status(data):
+        replies.put_nowait(time.perf_counter())
+
+    await client.connect(url, transports=['websocket'])
+    # An explicit subscription drops the periodic stream events, leaving only replies
+    await client.emit('subscribe', {'event_type': 'metrics_update'})
+    await client.emit('command', {'command': 'start', 'scenario_id': args.scenario})
+    await client.emit('command', {'command': 'speed', 'speed': args.speed})
+    await asyncio.sleep(1.0)
+    while not replies.empty():  # the start command's reply
+        replies.get_nowait()
+
+    latencies = []
+    end = time.perf_counter() + args.duration
+    while time.perf_counter() < end:
+        sent = time.perf_counter()
+        await client.emit('command', {'command': 'get_status'})
+        try:
+            latencies.append(await asyncio.wait_for(replies.get(), timeout=10) - sent)
+        except asyncio.TimeoutError:
+            latencies.append(10.0)
+        await asyncio.sleep(0.25)
+
+    await client.emit('command', {'command': 'stop'})
+    await client.disconnect()
+    return latencies
+
+
+def run_mode(mode: str, args) -> dict:
+    """Benchmark one async mode"""
+    url = f'http://127.0.0.1:{args.port}'
+    server = start_server(mode, args.port)
+    try:
+        ready = multiprocessing.Event()
+        results = multiprocessing.Queue()
+        procs = max(1, min(args.client_procs, args.clients))
+        workers = [
+            multiprocessing.Process(target=_client_process, daemon=True,
+                                    args=(url, args.clients // procs + (i < args.clients % procs),
+                                          args.encoding, args.duration, ready, results))
+            for i in range(procs)
+        ]
+        for worker in workers:
+            worker.start()
+
+        connected, connect_time = 0, 0.0
+        for _ in workers:
+            _, count, seconds = results.get()
+            connected += count
+            connect_time = max(connect_time, seconds)
+
+        ready.set()
+        latencies = asyncio.run(_probe(url, args))
+
+        frames = sum(results.get(timeout=60)[2] for _ in workers)
+        for worker in workers:
+            worker.join(timeout=30)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'clients': connected,
+        'connect_s': connect_time,
+        'frames_per_client_s': frames / max(connected, 1) / args.duration,
+        'rtt_p50_ms': statistics.median(latencies) * 1000,
+        'rtt_p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0,
+        'rtt_max_ms': latencies[-1] * 1000 if latencies else 0.0
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"🚀 {args.clients} clients, {args.duration:g}s per mode, scenario {args.scenario}, "
+          f"speed {args.speed}, {args.encoding} vehicles", file=sys.stderr)
+
+    rows = []
+    for mode in args.modes:
+        print(f"⏱️  Benchmarking {mode}...", file=sys.stderr)
+        rows.append(run_mode(mode, args))
+
+    print(f"{'mode':<10}{'clients':>8}{'connect s':>11}{'frames/client/s':>17}"
+          f"{'rtt p50 ms':>12}{'rtt p95 ms':>12}{'rtt max ms':>12}")
+    for row in rows:
+        print(f"{row['mode']:<10}{row['clients']:>8}{row['connect_s']:>11.1f}{row['frames_per_client_s']:>17.2f}"
+              f"{row['rtt_p50_ms']:>12.1f}{row['rtt_p95_ms']:>12.1f}{row['rtt_max_ms']:>12.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,63 @@
+"""
+Headless scenario runner
+
+Runs the mock simulator without Flask/Socket.IO and writes the metrics
+time series to a file, e.g.:
+
+    python run_headless.py rush_hour --duration 3600 --seed 42 -o out/rush_hour.csv
+"""
+import argparse
+import os
+import sys
+import time
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from simulation.batch_runner import run_scenario, write_metrics
+from simulation.factory import SIMULATION_ENGINES
+from simulation.mock_simulator import MockSimulator
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Run a traffic scenario headless')
+    parser.add_argument('scenario', choices=sorted(MockSimulator.SCENARIO_VEHICLE_COUNTS),
+                        help='Scenario id')
+    parser.add_argument('--duration', type=float, default=3600.0,
+                        help='Simulated duration in seconds (default: 3600)')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed')
+    parser.add_argument('--engine', choices=SIMULATION_ENGINES, default='numpy',
+                        help='Vehicle state backend (default: numpy)')
+    parser.add_argument('--vehicles', type=int, default=None,
+                        help='Override the scenario initial vehicle count')
+    parser.add_argument('--sample-interval', type=float, default=1.0,
+                        help='Metrics sampling period in simulated seconds (default: 1)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='Output file (.csv, .json or .jsonl); default metrics_<scenario>.csv')
+    parser.add_argument('--trace', default=None, metavar='DIR',
+                        help='Also record a full per-tick columnar trace into DIR')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    output = args.output or f'metrics_{args.scenario}.csv'
+    config = {'vehicle_count': args.vehicles} if args.vehicles is not None else {}
+
+    started = time.perf_counter()
+    series = run_scenario(args.scenario, args.duration, seed=args.seed, engine=args.engine,
+                          sample_interval=args.sample_interval, config=config,
+                          trace_dir=args.trace)
+    elapsed = time.perf_counter() - started
+
+    write_metrics(series, output)
+    print(f"✅ {args.scenario}: {args.duration:.0f}s simulated in {elapsed:.2f}s "
+          f"({len(series)} samples) -> {output}")
+    if args.trace:
+        print(f"   trace -> {args.trace}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
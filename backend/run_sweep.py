@@ -0,0 +1,79 @@
+"""
+Multi-scenario sweep runner
+
+Runs every scenario/seed/parameter combination on a process pool and
+streams one JSON summary line per run as it completes, e.g.:
+
+    python run_sweep.py --scenarios rush_hour --seeds 50 --phase-scale 0.8 1.0 1.2 -o sweep.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add the src directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from simulation.sweep import SweepExecutor, expand_sweep
+from simulation.factory import SIMULATION_ENGINES
+from simulation.mock_simulator import MockSimulator
+
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Run a headless multi-scenario sweep')
+    parser.add_argument('--scenarios', nargs='+', default=['default'],
+                        choices=sorted(MockSimulator.SCENARIO_VEHICLE_COUNTS), help='Scenario ids')
+    parser.add_argument('--seeds', type=int, default=1,
+                        help='Number of seeds per combination, 0..N-1 (default: 1)')
+    parser.add_argument('--phase-scale', type=float, nargs='+', default=[1.0],
+                        help='Signal phase duration multipliers to sweep (default: 1.0)')
+    parser.add_argument('--vehicles', type=int, nargs='+', default=None,
+                        help='Initial vehicle counts to sweep (default: scenario count)')
+    parser.add_argument('--duration', type=float, default=3600.0,
+                        help='Simulated duration of each run in seconds (default: 3600)')
+    parser.add_argument('--engine', choices=SIMULATION_ENGINES, default='numpy',
+                        help='Vehicle state backend (default: numpy)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: all cores)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='JSON lines output file (default: stdout only)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    params = {'phase_scale': args.phase_scale}
+    if args.vehicles:
+        params['vehicle_count'] = args.vehicles
+
+    specs = expand_sweep(args.scenarios, range(args.seeds), args.duration, params, engine=args.engine)
+    executor = SweepExecutor(max_workers=args.workers)
+    print(f"🚀 Sweep: {len(specs)} runs on {executor.max_workers} workers", file=sys.stderr)
+
+    started = time.perf_counter()
+    output = open(args.output, 'w') if args.output else None
+    failures = 0
+
+    try:
+        for done, result in enumerate(executor.run(specs), start=1):
+            line = json.dumps(result)
+            print(line, flush=True)
+            if output:
+                output.write(line + '\n')
+                output.flush()
+            if 'error' in result:
+                failures += 1
+            print(f"   [{done}/{len(specs)}] run {result['run_id']} done", file=sys.stderr)
+    finally:
+        if output:
+            output.close()
+
+    print(f"✅ Sweep finished in {time.perf_counter() - started:.1f}s ({failures} failed)", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
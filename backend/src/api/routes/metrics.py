@@ -1,7 +1,7 @@
 """
 Metrics API routes
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from datetime import datetime, timedelta
 import random
 import json
@@ -16,8 +16,27 @@ def get_current_metrics():
     """Get current simulation metrics"""
     timestamp = datetime.utcnow()
     
-    # Generate realistic mock metrics
-    metrics = {
+    stream = current_app.extensions.get('simulation_stream')
+    frame = stream.current_frame() if stream is not None else None
+    if frame is not None and frame.metrics:
+        # Metrics of the latest simulation frame (read lock-free, never mutated)
+        metrics = {**frame.metrics, 'trafficLights': len(frame.traffic_lights)}
+    else:
+        # No simulation attached, or no tick has computed metrics yet
+        metrics = _mock_metrics(timestamp)
+    
+    # Store in history
+    metrics_history.append(metrics)
+    
+    # Keep only last 1000 entries
+    if len(metrics_history) > 1000:
+        metrics_history.pop(0)
+    
+    return jsonify(metrics)
+
+def _mock_metrics(timestamp):
+    """Generate realistic mock metrics (no simulation metrics available)"""
+    return {
         'timestamp': timestamp.isoformat(),
         'totalVehicles': random.randint(80, 250),
         'avgSpeed': round(random.uniform(30.0, 60.0), 1),
@@ -36,15 +55,6 @@ def get_current_metrics():
         'trafficLights': random.randint(3, 8),
         'networkEfficiency': round(random.uniform(65.0, 95.0), 1)
     }
-    
-    # Store in history
-    metrics_history.append(metrics)
-    
-    # Keep only last 1000 entries
-    if len(metrics_history) > 1000:
-        metrics_history.pop(0)
-    
-    return jsonify(metrics)
 
 @metrics_bp.route('/metrics/history', methods=['GET'])
 def get_metrics_history():
@@ -121,6 +131,21 @@ def export_metrics():
 @metrics_bp.route('/metrics/traffic-lights', methods=['GET'])
 def get_traffic_light_metrics():
     """Get traffic light specific metrics"""
+    stream = current_app.extensions.get('simulation_stream')
+    if stream is not None:
+        # Lights of the latest simulation frame
+        return jsonify({
+            'trafficLights': [{
+                'id': light['id'],
+                'position': light.get('position'),
+                'state': light.get('state'),
+                'phase': light.get('currentPhase'),
+                'lastChange': light.get('lastChange'),
+                'efficiency': light.get('efficiency')
+            } for light in stream.current_frame().traffic_lights],
+            'timestamp': datetime.utcnow().isoformat()
+        })
+    
     metrics = []
     
     for i in range(1, 6):  # 5 traffic lights
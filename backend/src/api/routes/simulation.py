@@ -1,10 +1,16 @@
 """
 Simulation API routes
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
+from concurrent.futures import TimeoutError as CommandTimeout
 from datetime import datetime
+import os
 import time
 
+from config import Config
+from simulation.checkpoint import save_checkpoint, load_checkpoint
+from simulation.trace_recorder import TraceRecorder
+
 simulation_bp = Blueprint('simulation', __name__)
 
 # Simulation state
@@ -17,6 +23,11 @@ simulation_state = {
     'simulation_speed': 1.0
 }
 
+@simulation_bp.errorhandler(CommandTimeout)
+def command_timeout(error):
+    """The stepper did not reach a tick boundary in time; the command stays queued"""
+    return jsonify({'error': 'Simulation is busy; the command is queued and will be applied at the next tick'}), 503
+
 @simulation_bp.route('/simulation/status', methods=['GET'])
 def get_simulation_status():
     """Get current simulation status"""
@@ -114,10 +125,113 @@ def set_simulation_speed():
     data = request.get_json()
     speed = data.get('speed', 1.0)
     
-    # Clamp between 0.1 and 10
-    simulation_state['simulation_speed'] = max(0.1, min(10.0, speed))
+    if speed != 'max' and not isinstance(speed, (int, float)):
+        return jsonify({'error': "speed must be a number or 'max'"}), 400
+    
+    # Drive the simulator clock's time-warp (clamped between 0.1 and 10), at the next tick boundary
+    simulator = current_app.extensions.get('simulator')
+    if simulator is not None:
+        speed = current_app.extensions['simulation_stream'].run_command(simulator.set_speed, speed)
+    elif speed != 'max':
+        speed = max(0.1, min(10.0, speed))
+    
+    simulation_state['simulation_speed'] = speed
+    label = 'max' if speed == 'max' else f'{speed}x'
     
     return jsonify({
-        'message': f'Simulation speed set to {simulation_state["simulation_speed"]}x',
+        'message': f'Simulation speed set to {label}',
         'simulationSpeed': simulation_state['simulation_speed']
-    })
\ No newline at end of file
+    })
+
+def _checkpoint_path(data):
+    """Resolve a checkpoint name to a file inside the checkpoint directory"""
+    name = os.path.basename(str((data or {}).get('name', 'latest')))
+    if not name.endswith('.npz'):
+        name += '.npz'
+    return os.path.join(Config.SIMULATION_CHECKPOINT_DIR, name)
+
+@simulation_bp.route('/simulation/checkpoint', methods=['POST'])
+def checkpoint_simulation():
+    """Save the running simulator state to a checkpoint file"""
+    simulator = current_app.extensions.get('simulator')
+    if simulator is None:
+        return jsonify({'error': 'Simulator not initialized'}), 400
+    
+    data = request.get_json(silent=True) or {}
+    # Saved between ticks so the arrays are consistent
+    path = current_app.extensions['simulation_stream'].run_command(
+        save_checkpoint, simulator, _checkpoint_path(data), compress=bool(data.get('compress', False)))
+    
+    return jsonify({
+        'message': 'Checkpoint saved',
+        'path': path,
+        'simulationTime': round(simulator.simulation_time, 2),
+        'totalVehicles': len(simulator.vehicles)
+    })
+
+@simulation_bp.route('/simulation/restore', methods=['POST'])
+def restore_simulation():
+    """Restore the simulator state from a checkpoint file"""
+    simulator = current_app.extensions.get('simulator')
+    if simulator is None:
+        return jsonify({'error': 'Simulator not initialized'}), 400
+    
+    path = _checkpoint_path(request.get_json(silent=True))
+    if not os.path.exists(path):
+        return jsonify({'error': f'Checkpoint not found: {os.path.basename(path)}'}), 404
+    
+    try:
+        current_app.extensions['simulation_stream'].run_command(load_checkpoint, path, simulator)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    simulation_state['status'] = 'paused' if simulator.is_paused else ('running' if simulator.is_running else 'stopped')
+    simulation_state['current_scenario'] = simulator.current_scenario
+    simulation_state['total_vehicles'] = len(simulator.vehicles)
+    
+    return jsonify({
+        'message': 'Checkpoint restored',
+        'path': path,
+        'status': simulation_state['status'],
+        'simulationTime': round(simulator.simulation_time, 2),
+        'totalVehicles': simulation_state['total_vehicles']
+    })
+
+@simulation_bp.route('/simulation/trace/start', methods=['POST'])
+def start_trace():
+    """Start recording a columnar per-tick trace of the simulation"""
+    simulator = current_app.extensions.get('simulator')
+    if simulator is None:
+        return jsonify({'error': 'Simulator not initialized'}), 400
+    
+    recorder = current_app.extensions.get('trace_recorder')
+    if recorder is not None and recorder.simulator is not None:
+        return jsonify({'error': 'A trace is already being recorded', 'trace': recorder.get_status()}), 400
+    
+    data = request.get_json(silent=True) or {}
+    name = os.path.basename(str(data.get('name') or datetime.utcnow().strftime('trace_%Y%m%d_%H%M%S')))
+    recorder = TraceRecorder(os.path.join(Config.SIMULATION_TRACE_DIR, name),
+                             chunk_ticks=int(data.get('chunkTicks', 600)))
+    # Registered first so a late (timed out) attach can still be stopped
+    current_app.extensions['trace_recorder'] = recorder
+    current_app.extensions['simulation_stream'].run_command(recorder.attach, simulator)
+    
+    return jsonify({'message': 'Trace recording started', 'trace': recorder.get_status()})
+
+@simulation_bp.route('/simulation/trace/stop', methods=['POST'])
+def stop_trace():
+    """Stop recording and flush the trace to disk"""
+    recorder = current_app.extensions.get('trace_recorder')
+    if recorder is None or recorder.simulator is None:
+        return jsonify({'error': 'No trace is being recorded'}), 400
+    
+    # Only the unhook runs between ticks; the final chunk is written here, off the stepper
+    current_app.extensions['simulation_stream'].run_command(recorder.unhook)
+    recorder.close()
+    return jsonify({'message': 'Trace recording stopped', 'trace': recorder.get_status()})
+
+@simulation_bp.route('/simulation/trace', methods=['GET'])
+def get_trace_status():
+    """Get trace recorder status"""
+    recorder = current_app.extensions.get('trace_recorder')
+    return jsonify({'trace': recorder.get_status() if recorder else None})
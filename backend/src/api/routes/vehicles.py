@@ -1,7 +1,7 @@
 """
 Vehicles API routes
 """
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from datetime import datetime
 import random
 import uuid
@@ -20,12 +20,17 @@ vehicle_colors = {
     'bicycle': '#06b6d4'     # cyan
 }
 
+def _frame_vehicles():
+    """Vehicles of the latest simulation frame (read lock-free, never mutated)"""
+    stream = current_app.extensions.get('simulation_stream')
+    return stream.current_frame().vehicles if stream is not None else []
+
 @vehicles_bp.route('/vehicles', methods=['GET'])
 def get_vehicles():
-    """Get all active vehicles"""
+    """Get all active vehicles (simulated ones, then those added through this API)"""
     limit = request.args.get('limit', type=int)
     
-    vehicles_list = list(active_vehicles.values())
+    vehicles_list = _frame_vehicles() + list(active_vehicles.values())
     
     if limit:
         vehicles_list = vehicles_list[:limit]
@@ -170,10 +175,15 @@ def add_vehicle():
 @vehicles_bp.route('/vehicles/<vehicle_id>', methods=['GET'])
 def get_vehicle(vehicle_id):
     """Get specific vehicle"""
-    if vehicle_id not in active_vehicles:
+    if vehicle_id in active_vehicles:
+        return jsonify(active_vehicles[vehicle_id])
+    
+    stream = current_app.extensions.get('simulation_stream')
+    vehicle = stream.current_frame().vehicle(vehicle_id) if stream is not None else None
+    if vehicle is None:
         return jsonify({'error': 'Vehicle not found'}), 404
     
-    return jsonify(active_vehicles[vehicle_id])
+    return jsonify(vehicle)
 
 @vehicles_bp.route('/vehicles/<vehicle_id>', methods=['DELETE'])
 def remove_vehicle(vehicle_id):
@@ -220,12 +230,14 @@ def update_vehicle(vehicle_id):
 @vehicles_bp.route('/vehicles/count', methods=['GET'])
 def get_vehicle_count():
     """Get vehicle count by type"""
+    vehicles_list = _frame_vehicles() + list(active_vehicles.values())
+    
     counts = {}
     for vehicle_type in vehicle_types:
-        counts[vehicle_type] = sum(1 for v in active_vehicles.values() if v['type'] == vehicle_type)
+        counts[vehicle_type] = sum(1 for v in vehicles_list if v['type'] == vehicle_type)
     
     return jsonify({
-        'total': len(active_vehicles),
+        'total': len(vehicles_list),
         'byType': counts,
         'timestamp': datetime.utcnow().isoformat()
     })
\ No newline at end of file
@@ -2,23 +2,27 @@
 Main Flask application
 """
 import os
-import eventlet
-eventlet.monkey_patch()
+from config import Config
+
+# The asyncio runtime (asgi.py) must not have its threads patched into greenlets
+if Config.SOCKETIO_ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
 
 from flask import Flask, jsonify
 from flask_socketio import SocketIO
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
 
-from config import Config
 from models.simulation import db
 from websocket.handlers import register_socketio_handlers
 from websocket.simulation_stream import SimulationStream
-from simulation.mock_simulator import MockSimulator
+from websocket.frame_cache import FrameJSON
+from simulation.factory import create_simulator
 
 # Extensions
 socketio = SocketIO()
-simulator = MockSimulator()
+simulator = None
 simulation_stream = None
 
 def create_app(config_class=Config):
@@ -39,28 +43,46 @@ def create_app(config_class=Config):
         app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
         db.init_app(app)
     
-    socketio.init_app(app, 
-                     cors_allowed_origins=app.config['CORS_ORIGINS'],
-                     async_mode='eventlet')
+    # With a message queue, emits reach clients connected to every process
+    if app.config['SOCKETIO_ASYNC_MODE'] == 'asyncio':
+        from websocket.async_server import AsyncSocketIO
+        sio = AsyncSocketIO(app,
+                            cors_allowed_origins=app.config['CORS_ORIGINS'],
+                            message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+                            json=FrameJSON,
+                            handler_workers=app.config['SOCKETIO_HANDLER_WORKERS'])
+    else:
+        socketio.init_app(app, 
+                         cors_allowed_origins=app.config['CORS_ORIGINS'],
+                         async_mode=app.config['SOCKETIO_ASYNC_MODE'],
+                         message_queue=app.config['SOCKETIO_MESSAGE_QUEUE'],
+                         json=FrameJSON)
+        sio = socketio
     
     # Initialize simulator
     global simulator, simulation_stream
-    simulator = MockSimulator()
-    simulation_stream = SimulationStream(socketio, simulator)
+    simulator = create_simulator({
+        'engine': app.config['SIMULATION_ENGINE'],
+        'update_interval': app.config['SIMULATION_UPDATE_INTERVAL']
+    })
+    simulation_stream = SimulationStream(sio, simulator, role=app.config['STREAM_ROLE'])
+    app.extensions['simulator'] = simulator
+    app.extensions['simulation_stream'] = simulation_stream
     
     # Register WebSocket handlers
-    register_socketio_handlers(socketio, simulator, simulation_stream)
+    register_socketio_handlers(sio, simulator, simulation_stream)
     
-    # Register API blueprints
+    # Register API blueprints (stream workers have no simulation to serve)
     from api.routes.simulation import simulation_bp
     from api.routes.scenarios import scenarios_bp
     from api.routes.metrics import metrics_bp
     from api.routes.vehicles import vehicles_bp
     
-    app.register_blueprint(simulation_bp, url_prefix='/api')
-    app.register_blueprint(scenarios_bp, url_prefix='/api')
-    app.register_blueprint(metrics_bp, url_prefix='/api')
-    app.register_blueprint(vehicles_bp, url_prefix='/api')
+    if app.config['STREAM_ROLE'] != 'worker':
+        app.register_blueprint(simulation_bp, url_prefix='/api')
+        app.register_blueprint(scenarios_bp, url_prefix='/api')
+        app.register_blueprint(metrics_bp, url_prefix='/api')
+        app.register_blueprint(vehicles_bp, url_prefix='/api')
     
     # Basic routes
     @app.route('/')
@@ -140,10 +162,16 @@ if __name__ == '__main__':
     print("📡 WebSocket: ws://localhost:5000/ws")
     print("🌐 REST API: http://localhost:5000/api")
     print("🔄 Mock Simulation: Active")
+    print(f"🔀 Stream role: {app.config['STREAM_ROLE']}")
+    print(f"⚙️  Async mode: {app.config['SOCKETIO_ASYNC_MODE']}")
     print("=" * 50)
     
-    socketio.run(app, 
-                 debug=app.config['DEBUG'], 
-                 host='0.0.0.0', 
-                 port=5000, 
-                 use_reloader=False)
\ No newline at end of file
+    if app.config['SOCKETIO_ASYNC_MODE'] == 'asyncio':
+        import uvicorn
+        uvicorn.run(app.extensions['socketio'].asgi_app, host='0.0.0.0', port=int(os.getenv('PORT', '5000')))
+    else:
+        socketio.run(app, 
+                     debug=app.config['DEBUG'], 
+                     host='0.0.0.0', 
+                     port=int(os.getenv('PORT', '5000')), 
+                     use_reloader=False)
\ No newline at end of file
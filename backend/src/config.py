@@ -16,10 +16,37 @@ class Config:
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000,http://localhost:5173').split(',')
     
     # WebSocket
-    SOCKETIO_ASYNC_MODE = 'eventlet'
+    # 'eventlet' (Flask-SocketIO, run app.py) or 'asyncio' (python-socketio AsyncServer, run asgi.py)
+    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE', 'eventlet')
     SOCKETIO_CORS_ALLOWED_ORIGINS = CORS_ORIGINS
     SOCKETIO_LOGGER = DEBUG
     SOCKETIO_ENGINEIO_LOGGER = DEBUG
+    SOCKETIO_HANDLER_WORKERS = int(os.getenv('SOCKETIO_HANDLER_WORKERS', '8'))  # asyncio mode: event handler threads
+    # Multi-process fan-out: one 'simulator' process publishes every stream event once
+    # through the message queue (e.g. redis://localhost:6379/0) and any number of
+    # 'worker' processes deliver them to their own clients. 'standalone' needs no queue.
+    SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE')
+    STREAM_ROLE = os.getenv('STREAM_ROLE', 'standalone')
+    STREAM_KEYFRAME_INTERVAL = float(os.getenv('STREAM_KEYFRAME_INTERVAL', '5'))  # seconds between delta/binary keyframes
+    STREAM_MAX_QUEUE_DEPTH = int(os.getenv('STREAM_MAX_QUEUE_DEPTH', '16'))  # queued packets before a client is skipped
+    STREAM_LAGGARD_TIMEOUT = float(os.getenv('STREAM_LAGGARD_TIMEOUT', '15'))  # seconds behind before disconnecting
+    STREAM_RESUME_WINDOW = float(os.getenv('STREAM_RESUME_WINDOW', '10'))  # seconds of deltas kept for reconnects
+    # Rooms the 'simulator' process publishes to (it cannot see workers' room members).
+    # Density grids are opt-in, e.g. add density:16; workers keep individual vehicles
+    # for clients zooming out to a density level that is not listed.
+    STREAM_FANOUT_ROOMS = os.getenv(
+        'STREAM_FANOUT_ROOMS',
+        'simulation_full,simulation_compact,vehicles_full,vehicles_delta,vehicles_binary,'
+        'traffic_light_update,metrics_update,simulation_status'
+    ).split(',')
+    # Viewports snap to this grid (degrees). Only the standalone and simulator roles filter
+    # by viewport: the simulator cannot know which tile ranges workers' clients look at, so
+    # on a worker set_viewport is answered with viewport None and the client keeps its
+    # full/delta/binary vehicles for the whole network.
+    VIEWPORT_TILE_SIZE = float(os.getenv('VIEWPORT_TILE_SIZE', '0.002'))
+    # Zoomed-out clients get a vehicle density grid: (max map zoom, cells per side);
+    # beyond the last zoom they get individual vehicles
+    DENSITY_LEVELS = [(12, 16), (14, 32), (15, 64)]
     
     # Database - PostgreSQL
     # Utilisez DATABASE_URL de l'environnement ou SQLite en fallback
@@ -39,6 +66,9 @@ class Config:
     
     # Simulation
     SIMULATION_UPDATE_INTERVAL = 0.1  # seconds (100ms)
+    SIMULATION_ENGINE = os.getenv('SIMULATION_ENGINE', 'dict')  # dict, numpy
+    SIMULATION_CHECKPOINT_DIR = os.getenv('SIMULATION_CHECKPOINT_DIR', 'checkpoints')
+    SIMULATION_TRACE_DIR = os.getenv('SIMULATION_TRACE_DIR', 'traces')
     MOCK_MODE = os.getenv('MOCK_MODE', 'true').lower() == 'true'
     
     # Mock Simulation Settings
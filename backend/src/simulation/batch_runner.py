@@ -0,0 +1,97 @@
+"""
+Headless scenario execution (no Flask, no Socket.IO)
+"""
+import json
+import os
+from typing import Dict, List, Any
+
+from .factory import create_simulator
+from .mock_simulator import MockSimulator
+from .trace_recorder import TraceRecorder
+
+
+def run_scenario(scenario_id: str, duration: float, seed: int = None, engine: str = 'dict',
+                 sample_interval: float = 1.0, config: Dict = None,
+                 trace_dir: str = None, epoch: float = 0.0) -> List[Dict[str, Any]]:
+    """
+    Run a scenario for `duration` simulated seconds as fast as possible.
+    Returns the metrics time series sampled every `sample_interval` sim seconds.
+    If `trace_dir` is given, every tick is also recorded there as a columnar trace.
+    Timestamps count from `epoch` (Unix seconds), not the wall clock, so runs
+    with the same seed produce identical output.
+    """
+    if scenario_id not in MockSimulator.SCENARIO_VEHICLE_COUNTS:
+        raise ValueError(f"Unknown scenario: {scenario_id}. Must be one of: "
+                         f"{', '.join(MockSimulator.SCENARIO_VEHICLE_COUNTS)}")
+
+    simulator = create_simulator({
+        **(config or {}),
+        'engine': engine,
+        'seed': seed,
+        'epoch': epoch,
+        'verbose': False
+    })
+    simulator.start_simulation(scenario_id)
+
+    recorder = None
+    if trace_dir:
+        recorder = TraceRecorder(trace_dir)
+        recorder.attach(simulator)
+
+    step = simulator.clock.step
+    total_steps = int(round(duration / step))
+    sample_every = max(1, int(round(sample_interval / step)))
+    series = []
+
+    for i in range(1, total_steps + 1):
+        simulator.update_simulation(step)
+        if i % sample_every == 0 or i == total_steps:
+            series.append(simulator.metrics)
+
+    if recorder:
+        recorder.detach()
+    simulator.stop_simulation()
+    return series
+
+
+def write_metrics(series: List[Dict[str, Any]], path: str):
+    """Write a metrics series as .csv (flattened columns), .jsonl or .json"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.csv':
+        import pandas as pd
+        pd.json_normalize(series).fillna(0).to_csv(path, index=False)
+    elif extension == '.jsonl':
+        with open(path, 'w') as f:
+            for metrics in series:
+                f.write(json.dumps(metrics) + '\n')
+    else:
+        with open(path, 'w') as f:
+            json.dump(series, f)
+
+
+def summarize_metrics(series: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reduce a metrics series to per-run summary figures"""
+    if not series:
+        return {'samples': 0}
+
+    speeds = [m['avgSpeed'] for m in series]
+    vehicles = [m['totalVehicles'] for m in series]
+    final = series[-1]
+
+    return {
+        'samples': len(series),
+        'simulationTime': final['simulationTime'],
+        'meanSpeed': round(sum(speeds) / len(speeds), 2),
+        'minSpeed': min(speeds),
+        'meanVehicles': round(sum(vehicles) / len(vehicles), 1),
+        'peakVehicles': max(vehicles),
+        'finalVehicles': final['totalVehicles'],
+        'finalCo2Emissions': final['co2Emissions'],
+        'finalDistanceTraveled': final['totalDistanceTraveled'],
+        'highCongestionShare': round(sum(1 for m in series if m['congestionLevel'] == 'high') / len(series), 3)
+    }
@@ -0,0 +1,135 @@
+"""
+Binary checkpoint / restore of simulator state
+"""
+import json
+import os
+from typing import Dict, Any
+import numpy as np
+
+from .factory import create_simulator
+from .mock_simulator import MockSimulator
+from .vehicle_arrays import VehicleArrays
+
+CHECKPOINT_VERSION = 1
+
+
+def _is_vectorized(simulator: MockSimulator) -> bool:
+    return hasattr(simulator, 'arrays')
+
+
+def _json_safe_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep only the config entries that survive a JSON round trip"""
+    safe = {}
+    for key, value in config.items():
+        try:
+            json.dumps(value)
+        except TypeError:
+            continue
+        safe[key] = value
+    return safe
+
+
+def save_checkpoint(simulator: MockSimulator, path: str, compress: bool = False) -> str:
+    """
+    Snapshot vehicles, traffic lights, stats, clock and RNG state to an .npz file.
+    The vehicle table is stored column by column; everything else goes into a
+    JSON header. Returns the written path.
+    """
+    if _is_vectorized(simulator):
+        vehicle_state = simulator.arrays.state()
+        numpy_rng_state = simulator.rng.bit_generator.state
+    else:
+        edge_index = {e['id']: i for i, e in enumerate(simulator.edges)}
+        vehicle_state = VehicleArrays.from_dicts(simulator.vehicles, edge_index).state()
+        numpy_rng_state = None
+
+    version, internal, gauss_next = simulator.random.getstate()
+    clock = simulator.clock
+
+    header = {
+        'version': CHECKPOINT_VERSION,
+        'engine': 'numpy' if _is_vectorized(simulator) else 'dict',
+        'config': _json_safe_config(simulator.config),
+        'edge_ids': [e['id'] for e in simulator.edges],
+        'current_scenario': simulator.current_scenario,
+        'is_running': simulator.is_running,
+        'is_paused': simulator.is_paused,
+        'stats': simulator.stats,
+        'metrics': simulator.metrics,
+        'traffic_lights': simulator.traffic_lights,
+        'clock': {
+            'now': clock.now,
+            'epoch': clock.epoch,
+            'step': clock.step,
+            'time_warp': clock.time_warp,
+            'max_speed': clock.max_speed,
+            'pending': clock.pending
+        },
+        'random_state': [version, list(internal), gauss_next],
+        'numpy_rng_state': numpy_rng_state
+    }
+
+    arrays = {f'vehicle_{name}': array for name, array in vehicle_state.items()}
+    arrays['header'] = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(path, 'wb') as f:
+        (np.savez_compressed if compress else np.savez)(f, **arrays)
+
+    return path
+
+
+def load_checkpoint(path: str, simulator: MockSimulator = None) -> MockSimulator:
+    """
+    Restore a checkpoint into `simulator` (or a new simulator of the saved
+    engine) and return it
+    """
+    with np.load(path, allow_pickle=False) as data:
+        header = json.loads(data['header'].tobytes().decode('utf-8'))
+        if header.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {header.get('version')}")
+
+        vehicle_state = {
+            key[len('vehicle_'):]: data[key] for key in data.files if key.startswith('vehicle_')
+        }
+
+    if simulator is None:
+        simulator = create_simulator({**header['config'], 'engine': header['engine']})
+
+    edge_ids = [e['id'] for e in simulator.edges]
+    if edge_ids != header['edge_ids']:
+        raise ValueError('Checkpoint was taken on a different road network')
+
+    arrays = VehicleArrays.from_state(vehicle_state)
+    if _is_vectorized(simulator):
+        simulator.arrays = arrays
+        if header['numpy_rng_state']:
+            simulator.rng.bit_generator.state = header['numpy_rng_state']
+    else:
+        simulator.vehicles = arrays.to_dicts(edge_ids)
+        simulator._vehicle_slots = dict(arrays.index)
+    simulator._resync_running_metrics()
+
+    version, internal, gauss_next = header['random_state']
+    simulator.random.setstate((version, tuple(internal), gauss_next))
+
+    clock = simulator.clock
+    clock.now = header['clock']['now']
+    clock.epoch = header['clock']['epoch']
+    clock.step = header['clock']['step']
+    clock.time_warp = header['clock']['time_warp']
+    clock.max_speed = header['clock']['max_speed']
+    clock.pending = header['clock']['pending']
+
+    simulator.traffic_lights = header['traffic_lights']
+    simulator._build_traffic_light_index()
+    simulator.stats = header['stats']
+    simulator.metrics = header['metrics']
+    simulator.current_scenario = header['current_scenario']
+    simulator.is_running = header['is_running']
+    simulator.is_paused = header['is_paused']
+
+    return simulator
@@ -0,0 +1,68 @@
+"""
+Simulator mutations applied at tick boundaries
+"""
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+
+class CommandQueue:
+    """
+    Mutations (control commands, emergency spawns, scenario and speed
+    changes) submitted from handler threads and applied by the simulation
+    stepper in one batch at the start of a tick, so they never run while a
+    frame is being advanced or captured. deque.append/popleft are atomic,
+    so submitting takes no lock.
+
+    The stepper can hold the futures back until the tick's frame is
+    published (drain(settle=False), then settle()), so a caller that waited
+    on a command always reads a frame that includes it.
+    """
+
+    def __init__(self):
+        self._pending = deque()
+        self._unsettled = []  # (future, result, exception) applied but not yet resolved
+        self.stats: Dict[str, int] = {'applied': 0, 'failed': 0, 'batches': 0}
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs); the future resolves to its result once applied"""
+        future = Future()
+        self._pending.append((fn, args, kwargs, future))
+        return future
+
+    def drain(self, settle: bool = True) -> int:
+        """
+        Apply the commands queued so far, in submission order; returns how many ran.
+        With settle=False their futures resolve on the next settle() call.
+        """
+        count = 0
+        # Commands submitted while draining wait for the next tick
+        for _ in range(len(self._pending)):
+            fn, args, kwargs, future = self._pending.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                self._unsettled.append((future, fn(*args, **kwargs), None))
+            except Exception as e:
+                self.stats['failed'] += 1
+                self._unsettled.append((future, None, e))
+            count += 1
+
+        if count:
+            self.stats['applied'] += count
+            self.stats['batches'] += 1
+        if settle:
+            self.settle()
+        return count
+
+    def settle(self):
+        """Resolve the futures of the commands applied so far"""
+        unsettled, self._unsettled = self._unsettled, []
+        for future, result, error in unsettled:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
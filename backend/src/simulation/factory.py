@@ -0,0 +1,22 @@
+"""
+Simulator construction
+"""
+from typing import Dict
+
+from .mock_simulator import MockSimulator
+
+SIMULATION_ENGINES = ('dict', 'numpy')
+
+
+def create_simulator(config: Dict = None) -> MockSimulator:
+    """Create a simulator for the configured engine ('dict' or 'numpy')"""
+    config = config or {}
+    engine = config.get('engine', 'dict')
+
+    if engine == 'numpy':
+        from .vectorized_simulator import VectorizedSimulator
+        return VectorizedSimulator(config)
+    if engine != 'dict':
+        raise ValueError(f"Unknown simulation engine: {engine}. Must be one of: {', '.join(SIMULATION_ENGINES)}")
+
+    return MockSimulator(config)
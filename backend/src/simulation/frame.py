@@ -0,0 +1,134 @@
+"""
+Immutable per-tick simulation frames
+"""
+import time
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+
+from .vehicle_arrays import VehicleArrays
+
+
+class SimulationFrame:
+    """
+    State of the simulation at the end of one tick: lights, metrics and the
+    other simulation fields, the vehicles, an id -> row index and a frame
+    sequence number.
+
+    The stepper builds a new frame after every tick that changed something
+    and publishes it by replacing a single reference, so readers (the
+    publisher, socket handlers, REST routes) take the latest frame without a
+    lock and never see a half-applied tick. Frames are never modified after
+    they are built.
+
+    With the array engine the frame holds a read-only copy of the vehicle
+    columns; the vehicle dicts are materialized once, by the first reader
+    that needs them, off the stepper thread.
+    """
+
+    __slots__ = ('seq', 'created_at', 'index', '_fields', '_arrays', '_edge_ids',
+                 '_vehicles', '_columns', '_data')
+
+    def __init__(self, seq: int, fields: Dict[str, Any], vehicles: Optional[List[Dict]] = None,
+                 columns: Optional[Dict[str, Any]] = None, arrays: Optional[VehicleArrays] = None,
+                 edge_ids: Optional[List[str]] = None):
+        if columns is not None:
+            for values in columns.values():
+                if isinstance(values, np.ndarray):
+                    values.flags.writeable = False
+
+        if arrays is not None:
+            index = arrays.index
+        else:
+            vehicles = vehicles or []
+            index = {vehicle['id']: row for row, vehicle in enumerate(vehicles)}
+
+        for name, value in (('seq', seq), ('created_at', time.monotonic()), ('index', index),
+                            ('_fields', fields), ('_arrays', arrays), ('_edge_ids', edge_ids),
+                            ('_vehicles', vehicles), ('_columns', columns), ('_data', None)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('SimulationFrame is immutable')
+
+    @classmethod
+    def capture(cls, simulator, seq: int, with_columns: bool = False) -> 'SimulationFrame':
+        """Snapshot `simulator` (call between ticks, from the thread that steps it)"""
+        if hasattr(simulator, 'get_frame_state'):
+            fields, arrays, edge_ids = simulator.get_frame_state()
+            return cls(seq, fields, arrays=arrays, edge_ids=edge_ids)
+
+        columns = simulator.vehicle_columns() if with_columns else None
+        fields = simulator.get_simulation_snapshot()
+        return cls(seq, fields, vehicles=fields.pop('vehicles'), columns=columns)
+
+    def _memo(self, name: str, value):
+        # Readers racing on a memo build equal values; the last one wins
+        object.__setattr__(self, name, value)
+        return value
+
+    @property
+    def vehicle_count(self) -> int:
+        return len(self.index)
+
+    @property
+    def vehicles(self) -> List[Dict]:
+        """Vehicle dicts (built on first use with the array engine)"""
+        if self._vehicles is None:
+            return self._memo('_vehicles', self._arrays.to_dicts(self._edge_ids))
+        return self._vehicles
+
+    @property
+    def columns(self) -> Optional[Dict[str, Any]]:
+        """Read-only vehicle_columns() layout (None if the dict engine did not capture it)"""
+        if self._columns is None and self._arrays is not None:
+            arrays = self._arrays
+            return self._memo('_columns', {
+                'ids': arrays.ids,
+                'type': arrays.column('type'),
+                'lat': arrays.column('lat'),
+                'lng': arrays.column('lng'),
+                'speed': arrays.column('speed').astype(np.float32),
+                'heading': arrays.column('heading').astype(np.float32)
+            })
+        return self._columns
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """The frame in the simulation data layout (vehicles included)"""
+        if self._data is None:
+            return self._memo('_data', {**self._fields, 'vehicles': self.vehicles})
+        return self._data
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """The simulation fields other than the vehicles"""
+        return self._fields
+
+    @property
+    def traffic_lights(self) -> List[Dict]:
+        return self._fields['traffic_lights']
+
+    @property
+    def metrics(self) -> Dict:
+        return self._fields['metrics']
+
+    @property
+    def simulation_time(self) -> float:
+        return self._fields['simulation_time']
+
+    def vehicle(self, vehicle_id: str) -> Optional[Dict]:
+        """Vehicle `vehicle_id` in this frame, or None (O(1) through the row index)"""
+        row = self.index.get(vehicle_id)
+        if row is None:
+            return None
+        if self._vehicles is None:
+            return self._arrays.to_dict(row, self._edge_ids)
+        return self._vehicles[row]
+
+    def vehicles_at(self, rows: List[int]) -> List[Dict]:
+        """Vehicles at `rows` (with the array engine only those rows are materialized)"""
+        if self._vehicles is None:
+            return [self._arrays.to_dict(row, self._edge_ids) for row in rows]
+        vehicles = self._vehicles
+        return [vehicles[row] for row in rows]
@@ -3,7 +3,11 @@ Simulation package
 """
 
 from .mock_simulator import MockSimulator
+from .vectorized_simulator import VectorizedSimulator
+from .factory import create_simulator
+from .checkpoint import save_checkpoint, load_checkpoint
 from .data_generator import DataGenerator
 from .vehicle_manager import VehicleManager
 
-__all__ = ['MockSimulator', 'DataGenerator', 'VehicleManager']
\ No newline at end of file
+__all__ = ['MockSimulator', 'VectorizedSimulator', 'create_simulator', 'save_checkpoint', 'load_checkpoint',
+           'DataGenerator', 'VehicleManager']
\ No newline at end of file
@@ -3,10 +3,16 @@ Mock traffic simulator (replaces SUMO)
 """
 import time
 import random
-import threading
-from datetime import datetime
-from typing import List, Dict, Any
-import json
+from typing import List, Dict, Any, Callable
+import numpy as np
+
+from .spatial_index import SpatialGrid
+from .sim_clock import SimulationClock
+from .running_metrics import RunningMetrics
+from .vehicle_arrays import CO2_PER_KM, VEHICLE_TYPES
+
+# Vehicles closer than this (Manhattan distance, degrees) see a traffic light
+TRAFFIC_LIGHT_RADIUS = 0.001  # ~100m
 
 class MockSimulator:
     """
@@ -14,17 +20,34 @@ class MockSimulator:
     Generates realistic vehicle movement data
     """
     
+    # Initial vehicle count of each known scenario
+    SCENARIO_VEHICLE_COUNTS = {
+        'default': 50,
+        'rush_hour': 120,
+        'emergency_test': 30,
+        'weekend': 25
+    }
+    
     def __init__(self, config=None):
         self.config = config or {}
+        self.random = random.Random(self.config.get('seed'))
+        self.verbose = self.config.get('verbose', True)
+        self.running_metrics = RunningMetrics(CO2_PER_KM)
         self.vehicles: List[Dict] = []
+        self._vehicle_slots: Dict[str, int] = {}  # vehicle id -> index in self.vehicles
+        # Aggregates are recomputed exactly this often to shed float drift
+        self.metrics_resync_ticks = self.config.get('metrics_resync_ticks', 600)
+        self._ticks_since_resync = 0
+        # Callables invoked with the simulator after every completed tick
+        self.tick_listeners: List[Callable] = []
         self.traffic_lights: List[Dict] = []
         self.metrics: Dict = {}
         self.is_running = False
         self.is_paused = False
         self.current_scenario = None
-        self.simulation_time = 0
         self.start_real_time = None
         self.update_interval = self.config.get('update_interval', 0.1)
+        self.clock = SimulationClock(step=self.update_interval, epoch=self.config.get('epoch'))
         self.network_bounds = self.config.get('network_bounds', {
             'min_lat': 48.85,
             'max_lat': 48.86,
@@ -57,7 +80,7 @@ class MockSimulator:
                     {'duration': 30, 'state': 'rrrGGG'},
                     {'duration': 5, 'state': 'rrryyy'},
                 ],
-                'lastChange': time.time(),
+                'lastChange': 0.0,
                 'efficiency': 0.85
             },
             {
@@ -71,7 +94,7 @@ class MockSimulator:
                     {'duration': 25, 'state': 'GGGrrr'},
                     {'duration': 5, 'state': 'yyyrrr'},
                 ],
-                'lastChange': time.time(),
+                'lastChange': 0.0,
                 'efficiency': 0.78
             },
             {
@@ -85,10 +108,52 @@ class MockSimulator:
                     {'duration': 20, 'state': 'rrGGrr'},
                     {'duration': 5, 'state': 'rryyrr'},
                 ],
-                'lastChange': time.time(),
+                'lastChange': 0.0,
                 'efficiency': 0.92
             }
         ]
+        self._apply_signal_timing()
+        self._build_traffic_light_index()
+    
+    def _apply_signal_timing(self):
+        """
+        Apply signal timing overrides from config:
+        'phase_scale' multiplies every phase duration, and
+        'signal_timings' maps a light id to explicit phase durations
+        """
+        phase_scale = self.config.get('phase_scale', 1.0)
+        signal_timings = self.config.get('signal_timings', {})
+        
+        for tl in self.traffic_lights:
+            durations = signal_timings.get(tl['id'])
+            for i, phase in enumerate(tl['phases']):
+                if durations and i < len(durations):
+                    phase['duration'] = durations[i]
+                phase['duration'] *= phase_scale
+    
+    @property
+    def simulation_time(self) -> float:
+        """Elapsed simulated time in seconds"""
+        return self.clock.now
+    
+    @simulation_time.setter
+    def simulation_time(self, value: float):
+        self.clock.now = value
+    
+    def _build_traffic_light_index(self):
+        """Build the spatial index over traffic light positions"""
+        self.traffic_light_index = SpatialGrid(
+            [tl['position']['lat'] for tl in self.traffic_lights],
+            [tl['position']['lng'] for tl in self.traffic_lights],
+            cell_size=TRAFFIC_LIGHT_RADIUS
+        )
+    
+    def find_traffic_lights_near(self, lats, lngs, radius: float = TRAFFIC_LIGHT_RADIUS) -> np.ndarray:
+        """
+        Bulk proximity query: index into self.traffic_lights of the first
+        light within `radius` of each position, or -1
+        """
+        return self.traffic_light_index.within(lats, lngs, radius)
     
     def _initialize_network_edges(self):
         """Initialize network edges for vehicle movement"""
@@ -105,15 +170,20 @@ class MockSimulator:
         self.current_scenario = scenario_id
         self.is_running = True
         self.is_paused = False
-        self.simulation_time = 0
+        self.clock.reset()
         self.start_real_time = time.time()
         
+        # Signal timing restarts with the simulation clock
+        for tl in self.traffic_lights:
+            tl['lastChange'] = self.clock.now
+        
         # Generate initial vehicles based on scenario
         vehicle_count = self._get_vehicle_count_for_scenario(scenario_id)
         self._generate_initial_vehicles(vehicle_count)
         
-        print(f"✅ Simulation started with scenario: {scenario_id}")
-        print(f"   Vehicles: {vehicle_count}")
+        if self.verbose:
+            print(f"✅ Simulation started with scenario: {scenario_id}")
+            print(f"   Vehicles: {vehicle_count}")
         
         return True
     
@@ -122,50 +192,81 @@ class MockSimulator:
         self.is_running = False
         self.is_paused = False
         self.vehicles.clear()
+        self._vehicle_slots.clear()
+        self.running_metrics.reset()
         self.simulation_time = 0
-        print("⏹️ Simulation stopped")
+        if self.verbose:
+            print("⏹️ Simulation stopped")
         
         return True
     
     def pause_simulation(self):
         """Pause simulation"""
         self.is_paused = True
-        print("⏸️ Simulation paused")
+        if self.verbose:
+            print("⏸️ Simulation paused")
         
         return True
     
     def resume_simulation(self):
         """Resume simulation"""
         self.is_paused = False
-        print("▶️ Simulation resumed")
+        if self.verbose:
+            print("▶️ Simulation resumed")
         
         return True
     
+    def set_speed(self, speed):
+        """Set the time-warp factor (or 'max'); returns the applied value"""
+        return self.clock.set_speed(speed)
+    
+    def advance(self, real_elapsed: float) -> int:
+        """
+        Advance by the simulated time owed for `real_elapsed` wall seconds.
+        In max-speed mode, step back to back until that wall budget is spent.
+        Returns the number of steps run.
+        """
+        if not self.is_running or self.is_paused:
+            return 0
+        
+        if self.clock.max_speed:
+            deadline = time.perf_counter() + real_elapsed
+            steps = 0
+            while self.is_running and not self.is_paused:
+                self.update_simulation(self.clock.step)
+                steps += 1
+                if time.perf_counter() >= deadline:
+                    break
+            return steps
+        
+        steps = self.clock.steps_due(real_elapsed)
+        for _ in range(steps):
+            self.update_simulation(self.clock.step)
+        return steps
+    
     def _get_vehicle_count_for_scenario(self, scenario_id: str) -> int:
         """Get vehicle count based on scenario"""
-        scenario_counts = {
-            'default': 50,
-            'rush_hour': 120,
-            'emergency_test': 30,
-            'weekend': 25
-        }
-        return scenario_counts.get(scenario_id, 50)
+        if 'vehicle_count' in self.config:
+            return self.config['vehicle_count']
+        return self.SCENARIO_VEHICLE_COUNTS.get(scenario_id, 50)
     
     def _generate_initial_vehicles(self, count: int):
         """Generate initial vehicles"""
         self.vehicles = []
+        self._vehicle_slots = {}
+        self.running_metrics.reset()
         vehicle_types = ['passenger', 'bus', 'truck', 'motorcycle', 'bicycle']
         colors = ['#3b82f6', '#10b981', '#8b5cf6', '#f59e0b', '#ef4444', '#06b6d4']
         
         for i in range(count):
-            vehicle_type = random.choice(vehicle_types)
+            vehicle_type = self.random.choice(vehicle_types)
             color = colors[i % len(colors)]
             
             # Choose random edge
-            edge = random.choice(self.edges)
+            edge = self.random.choice(self.edges)
             
             # Interpolate position along edge
-            progress = random.random()
+            progress = self.random.random()
             lat = edge['from_lat'] + (edge['to_lat'] - edge['from_lat']) * progress
             lng = edge['from_lng'] + (edge['to_lng'] - edge['from_lng']) * progress
             
@@ -184,18 +285,18 @@ class MockSimulator:
                 'id': f'veh_{i:03d}',
                 'type': vehicle_type,
                 'position': {'lat': lat, 'lng': lng},
-                'speed': round(random.uniform(min_speed, max_speed), 1),
-                'lane': f'{edge["id"]}_lane_{random.randint(0, 1)}',
-                'route': [edge['id']] + [e['id'] for e in random.sample(self.edges, 2)],
+                'speed': round(self.random.uniform(min_speed, max_speed), 1),
+                'lane': f'{edge["id"]}_lane_{self.random.randint(0, 1)}',
+                'route': [edge['id']] + [e['id'] for e in self.random.sample(self.edges, 2)],
                 'color': color,
-                'heading': random.uniform(0, 360),
+                'heading': self.random.uniform(0, 360),
                 'edge': edge['id'],
                 'progress': progress,
-                'direction': 1 if random.random() > 0.5 else -1,
+                'direction': 1 if self.random.random() > 0.5 else -1,
                 'distanceTraveled': 0,
-                'createdAt': time.time()
+                'createdAt': self.clock.timestamp()
             }
-            self.vehicles.append(vehicle)
+            self._append_vehicle(vehicle)
             self.stats['total_vehicles_created'] += 1
     
     def update_simulation(self, delta_time: float = 0.1):
@@ -203,7 +304,7 @@ class MockSimulator:
         if not self.is_running or self.is_paused:
             return
         
-        self.simulation_time += delta_time
+        self.clock.advance(delta_time)
         
         # Update traffic lights
         self._update_traffic_lights(delta_time)
@@ -214,12 +315,27 @@ class MockSimulator:
         # Randomly add/remove vehicles
         self._manage_vehicle_population()
         
-        # Calculate metrics
+        # Calculate metrics (O(1) from running aggregates)
+        self._ticks_since_resync += 1
+        if self._ticks_since_resync >= self.metrics_resync_ticks:
+            self._resync_running_metrics()
         self.metrics = self.calculate_metrics()
+        
+        for listener in self.tick_listeners:
+            listener(self)
+    
+    def add_tick_listener(self, listener: Callable):
+        """Call `listener(simulator)` after every simulation tick"""
+        self.tick_listeners.append(listener)
+    
+    def remove_tick_listener(self, listener: Callable):
+        """Stop calling a tick listener"""
+        if listener in self.tick_listeners:
+            self.tick_listeners.remove(listener)
     
     def _update_traffic_lights(self, delta_time: float):
         """Update traffic light states"""
-        current_time = time.time()
+        current_time = self.clock.now
         
         for tl in self.traffic_lights:
             phase = tl['phases'][tl['currentPhase']]
@@ -232,9 +348,21 @@ class MockSimulator:
     
     def _update_vehicles(self, delta_time: float):
         """Update vehicle positions and speeds"""
-        for vehicle in self.vehicles:
+        # Resolve traffic light proximity for all vehicles in one query
+        nearby_lights = self.find_traffic_lights_near(
+            [v['position']['lat'] for v in self.vehicles],
+            [v['position']['lng'] for v in self.vehicles]
+        ).tolist()
+        
+        # Changes are summed locally and folded into the aggregates once
+        speed_delta = 0.0
+        distance_by_type = {}
+        
+        for vehicle, light_idx in zip(self.vehicles, nearby_lights):
+            old_speed = vehicle['speed']
+            
             # Check if vehicle is at traffic light
-            near_traffic_light = self._is_near_traffic_light(vehicle)
+            near_traffic_light = self.traffic_lights[light_idx] if light_idx >= 0 else None
             
             # Adjust speed based on traffic light
             if near_traffic_light and near_traffic_light['state'][0] == 'r':  # Red light
@@ -242,7 +370,7 @@ class MockSimulator:
             else:
                 # Normal speed with some variation
                 base_speed = 50 if vehicle['type'] != 'emergency' else 70
-                target_speed = base_speed + random.uniform(-10, 10)
+                target_speed = base_speed + self.random.uniform(-10, 10)
                 vehicle['speed'] += (target_speed - vehicle['speed']) * 0.1
             
             # Update progress along edge
@@ -253,6 +381,9 @@ class MockSimulator:
             vehicle['progress'] += progress_delta * vehicle['direction']
             vehicle['distanceTraveled'] += distance / 1000  # in km
             
+            speed_delta += vehicle['speed'] - old_speed
+            distance_by_type[vehicle['type']] = distance_by_type.get(vehicle['type'], 0.0) + distance / 1000
+            
             # If vehicle reached end of edge, move to next edge
             if vehicle['progress'] > 1.0 or vehicle['progress'] < 0:
                 # Get next edge from route
@@ -266,7 +397,7 @@ class MockSimulator:
                 if next_edge:
                     vehicle['edge'] = next_edge_id
                     vehicle['progress'] = 0 if vehicle['direction'] > 0 else 1.0
-                    vehicle['lane'] = f'{next_edge_id}_lane_{random.randint(0, 1)}'
+                    vehicle['lane'] = f'{next_edge_id}_lane_{self.random.randint(0, 1)}'
             
             # Update position based on progress
             edge = next((e for e in self.edges if e['id'] == vehicle['edge']), None)
@@ -279,34 +410,33 @@ class MockSimulator:
                 dx = edge['to_lng'] - edge['from_lng']
                 dy = edge['to_lat'] - edge['from_lat']
                 vehicle['heading'] = (180 / 3.14159) * (3.14159 / 2 - (0 if dx == 0 else (dy / dx) if dx != 0 else 0))
+        
+        self.running_metrics.speed_changed(speed_delta)
+        for v_type, distance in distance_by_type.items():
+            self.running_metrics.distance_added(v_type, distance)
     
     def _is_near_traffic_light(self, vehicle: Dict) -> Dict:
         """Check if vehicle is near a traffic light"""
-        for tl in self.traffic_lights:
-            # Simple distance check (in reality, use proper distance calculation)
-            dist = abs(vehicle['position']['lat'] - tl['position']['lat']) + abs(vehicle['position']['lng'] - tl['position']['lng'])
-            if dist < 0.001:  # Within ~100m
-                return tl
-        return None
+        light_idx = self.traffic_light_index.nearest_within(vehicle['position']['lat'], vehicle['position']['lng'])
+        return self.traffic_lights[light_idx] if light_idx >= 0 else None
     
     def _manage_vehicle_population(self):
         """Randomly add or remove vehicles"""
         # Random chance to add vehicle
-        if random.random() < 0.1:  # 10% chance each update
+        if self.random.random() < 0.1:  # 10% chance each update
             self._add_random_vehicle()
         
         # Random chance to remove vehicle
-        if random.random() < 0.05 and len(self.vehicles) > 10:  # 5% chance, keep at least 10
-            vehicle_to_remove = random.choice(self.vehicles)
-            self.vehicles.remove(vehicle_to_remove)
+        if self.random.random() < 0.05 and len(self.vehicles) > 10:  # 5% chance, keep at least 10
+            self._remove_vehicle_at(self.random.randrange(len(self.vehicles)))
     
     def _add_random_vehicle(self):
         """Add a random vehicle to simulation"""
         vehicle_types = ['passenger', 'bus', 'truck', 'motorcycle', 'bicycle']
-        if random.random() < 0.1:  # 10% chance for emergency
+        if self.random.random() < 0.1:  # 10% chance for emergency
             vehicle_type = 'emergency'
         else:
-            vehicle_type = random.choice(vehicle_types)
+            vehicle_type = self.random.choice(vehicle_types)
         
         colors = {
             'passenger': '#3b82f6',
@@ -317,8 +447,8 @@ class MockSimulator:
             'bicycle': '#06b6d4'
         }
         
-        edge = random.choice(self.edges)
-        progress = random.random()
+        edge = self.random.choice(self.edges)
+        progress = self.random.random()
         lat = edge['from_lat'] + (edge['to_lat'] - edge['from_lat']) * progress
         lng = edge['from_lng'] + (edge['to_lng'] - edge['from_lng']) * progress
         
@@ -326,25 +456,25 @@ class MockSimulator:
             'id': f'veh_{self.stats["total_vehicles_created"]:04d}',
             'type': vehicle_type,
             'position': {'lat': lat, 'lng': lng},
-            'speed': random.uniform(30, 60),
-            'lane': f'{edge["id"]}_lane_{random.randint(0, 1)}',
-            'route': [edge['id']] + [e['id'] for e in random.sample(self.edges, 2)],
+            'speed': self.random.uniform(30, 60),
+            'lane': f'{edge["id"]}_lane_{self.random.randint(0, 1)}',
+            'route': [edge['id']] + [e['id'] for e in self.random.sample(self.edges, 2)],
             'color': colors.get(vehicle_type, '#3b82f6'),
-            'heading': random.uniform(0, 360),
+            'heading': self.random.uniform(0, 360),
             'edge': edge['id'],
             'progress': progress,
-            'direction': 1 if random.random() > 0.5 else -1,
+            'direction': 1 if self.random.random() > 0.5 else -1,
             'distanceTraveled': 0,
-            'createdAt': time.time()
+            'createdAt': self.clock.timestamp()
         }
         
-        self.vehicles.append(vehicle)
+        self._append_vehicle(vehicle)
         self.stats['total_vehicles_created'] += 1
     
     def add_emergency_vehicle(self) -> Dict:
         """Add an emergency vehicle"""
-        edge = random.choice(self.edges)
-        progress = random.random()
+        edge = self.random.choice(self.edges)
+        progress = self.random.random()
         lat = edge['from_lat'] + (edge['to_lat'] - edge['from_lat']) * progress
         lng = edge['from_lng'] + (edge['to_lng'] - edge['from_lng']) * progress
         
@@ -353,64 +483,44 @@ class MockSimulator:
         vehicle = {
             'id': f'emergency_{self.stats["total_vehicles_created"]:04d}',
             'type': 'emergency',
-            'subtype': random.choice(emergency_types),
+            'subtype': self.random.choice(emergency_types),
             'position': {'lat': lat, 'lng': lng},
-            'speed': random.uniform(60, 90),
-            'lane': f'{edge["id"]}_lane_{random.randint(0, 1)}',
-            'route': [edge['id']] + [e['id'] for e in random.sample(self.edges, 3)],
+            'speed': self.random.uniform(60, 90),
+            'lane': f'{edge["id"]}_lane_{self.random.randint(0, 1)}',
+            'route': [edge['id']] + [e['id'] for e in self.random.sample(self.edges, 3)],
             'color': '#ef4444',
-            'heading': random.uniform(0, 360),
+            'heading': self.random.uniform(0, 360),
             'edge': edge['id'],
             'progress': progress,
-            'direction': 1 if random.random() > 0.5 else -1,
+            'direction': 1 if self.random.random() > 0.5 else -1,
             'distanceTraveled': 0,
             'sirenActive': True,
             'priority': 'highest',
-            'createdAt': time.time()
+            'createdAt': self.clock.timestamp()
         }
         
-        self.vehicles.append(vehicle)
+        self._append_vehicle(vehicle)
         self.stats['total_vehicles_created'] += 1
         self.stats['emergency_vehicles_served'] += 1
         
         return vehicle
     
     def calculate_metrics(self) -> Dict:
-        """Calculate simulation metrics"""
-        if not self.vehicles:
+        """Calculate simulation metrics from the running aggregates"""
+        running = self.running_metrics
+        if running.total_vehicles <= 0:
             return self._get_default_metrics()
         
-        total_vehicles = len(self.vehicles)
-        total_speed = sum(v['speed'] for v in self.vehicles)
-        avg_speed = total_speed / total_vehicles
-        
-        # Count vehicle types
-        vehicle_counts = {}
-        for v in self.vehicles:
-            v_type = v['type']
-            vehicle_counts[v_type] = vehicle_counts.get(v_type, 0) + 1
-        
-        # Calculate CO2 emissions (simplified)
-        total_distance = sum(v['distanceTraveled'] for v in self.vehicles)
-        co2_per_km = {
-            'passenger': 120,
-            'emergency': 180,
-            'bus': 80,
-            'truck': 150,
-            'motorcycle': 60,
-            'bicycle': 0
-        }
-        
-        co2_emissions = 0
-        for v in self.vehicles:
-            co2_emissions += v['distanceTraveled'] * co2_per_km.get(v['type'], 100)
+        avg_speed = running.avg_speed
+        vehicle_counts = running.vehicle_counts
+        total_distance = running.total_distance
         
         return {
-            'timestamp': datetime.utcnow().isoformat(),
-            'totalVehicles': total_vehicles,
+            'timestamp': self.clock.isoformat(),
+            'totalVehicles': running.total_vehicles,
             'avgSpeed': round(avg_speed, 1),
-            'avgTravelTime': round(random.uniform(30.0, 90.0), 1),
-            'co2Emissions': round(co2_emissions, 1),
+            'avgTravelTime': round(self.random.uniform(30.0, 90.0), 1),
+            'co2Emissions': round(running.co2_emissions, 1),
             'vehicleCounts': vehicle_counts,
             'emergencyVehiclesActive': vehicle_counts.get('emergency', 0),
             'throughput': round(total_distance * 60),  # km per hour approximation
@@ -419,6 +529,13 @@ class MockSimulator:
             'totalDistanceTraveled': round(total_distance, 2)
         }
     
+    def _resync_running_metrics(self):
+        """Recompute the running aggregates exactly with a full scan"""
+        self.running_metrics.reset()
+        for v in self.vehicles:
+            self.running_metrics.add(v['type'], v['speed'], v['distanceTraveled'])
+        self._ticks_since_resync = 0
+    
     def _calculate_congestion_level(self, avg_speed: float) -> str:
         """Calculate congestion level based on average speed"""
         if avg_speed > 50:
@@ -431,7 +548,7 @@ class MockSimulator:
     def _get_default_metrics(self) -> Dict:
         """Get default metrics when no vehicles"""
         return {
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': self.clock.isoformat(),
             'totalVehicles': 0,
             'avgSpeed': 0,
             'avgTravelTime': 0,
@@ -450,25 +567,76 @@ class MockSimulator:
             'vehicles': self.vehicles,
             'traffic_lights': self.traffic_lights,
             'metrics': self.metrics,
-            'timestamp': time.time(),
+            'timestamp': self.clock.timestamp(),
             'simulation_time': self.simulation_time,
             'scenario': self.current_scenario,
             'is_running': self.is_running,
             'is_paused': self.is_paused,
+            'speed': self.clock.speed,
             'stats': self.stats
         }
     
+    def get_simulation_snapshot(self) -> Dict:
+        """Get simulation data detached from live state (safe to read while the simulation steps)"""
+        data = self.get_simulation_data()
+        data['vehicles'] = [dict(v) for v in data['vehicles']]
+        data['traffic_lights'] = [dict(tl) for tl in data['traffic_lights']]
+        data['stats'] = dict(data['stats'])
+        return data
+    
+    def vehicle_columns(self) -> Dict[str, Any]:
+        """Columnar copy of per-vehicle id, type, position, speed and heading"""
+        vehicles = self.vehicles
+        return {
+            'ids': [v['id'] for v in vehicles],
+            'type': np.array([VEHICLE_TYPES.index(v['type']) for v in vehicles], dtype=np.int8),
+            'lat': np.array([v['position']['lat'] for v in vehicles], dtype=np.float64),
+            'lng': np.array([v['position']['lng'] for v in vehicles], dtype=np.float64),
+            'speed': np.array([v['speed'] for v in vehicles], dtype=np.float32),
+            'heading': np.array([v['heading'] for v in vehicles], dtype=np.float32)
+        }
+    
+    def _append_vehicle(self, vehicle: Dict):
+        """Append a vehicle and index its slot"""
+        self._vehicle_slots[vehicle['id']] = len(self.vehicles)
+        self.vehicles.append(vehicle)
+        self.running_metrics.add(vehicle['type'], vehicle['speed'], vehicle['distanceTraveled'])
+    
+    def _remove_vehicle_at(self, slot: int) -> Dict:
+        """Remove the vehicle at `slot` in O(1) by moving the last vehicle into it"""
+        vehicle = self.vehicles[slot]
+        last = self.vehicles.pop()
+        
+        if slot < len(self.vehicles):
+            self.vehicles[slot] = last
+            self._vehicle_slots[last['id']] = slot
+        if self._vehicle_slots.get(vehicle['id']) == slot:
+            del self._vehicle_slots[vehicle['id']]
+        self.running_metrics.remove(vehicle['type'], vehicle['speed'], vehicle['distanceTraveled'])
+        
+        return vehicle
+    
+    def _slot_of(self, vehicle_id: str) -> int:
+        """Index of a vehicle in self.vehicles, or -1"""
+        slot = self._vehicle_slots.get(vehicle_id)
+        if slot is not None and slot < len(self.vehicles) and self.vehicles[slot]['id'] == vehicle_id:
+            return slot
+        if slot is None and len(self._vehicle_slots) == len(self.vehicles):
+            return -1
+        
+        # The list was replaced or edited outside the helpers: reindex once
+        self._vehicle_slots = {v['id']: i for i, v in enumerate(self.vehicles)}
+        return self._vehicle_slots.get(vehicle_id, -1)
+    
     def get_vehicle_by_id(self, vehicle_id: str) -> Dict:
         """Get vehicle by ID"""
-        for vehicle in self.vehicles:
-            if vehicle['id'] == vehicle_id:
-                return vehicle
-        return None
+        slot = self._slot_of(vehicle_id)
+        return self.vehicles[slot] if slot >= 0 else None
     
     def remove_vehicle(self, vehicle_id: str) -> bool:
         """Remove vehicle by ID"""
-        for i, vehicle in enumerate(self.vehicles):
-            if vehicle['id'] == vehicle_id:
-                self.vehicles.pop(i)
-                return True
-        return False
\ No newline at end of file
+        slot = self._slot_of(vehicle_id)
+        if slot < 0:
+            return False
+        self._remove_vehicle_at(slot)
+        return True
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""
+Running aggregates for simulation metrics
+"""
+from typing import Dict
+
+
+class RunningMetrics:
+    """
+    Aggregates over the live vehicle set, maintained as vehicles spawn,
+    despawn and move so that metrics never need a full scan
+    """
+
+    def __init__(self, co2_per_km: Dict[str, float], default_co2: float = 100):
+        self.co2_per_km = co2_per_km
+        self.default_co2 = default_co2
+        self.reset()
+
+    def reset(self):
+        """Forget all vehicles"""
+        self.total_vehicles = 0
+        self.speed_sum = 0.0
+        self.counts: Dict[str, int] = {}
+        self.distance: Dict[str, float] = {}
+
+    def add(self, vehicle_type: str, speed: float, distance: float = 0.0, count: int = 1):
+        """Account for `count` new vehicles with the given speed/distance sums"""
+        self.total_vehicles += count
+        self.speed_sum += speed
+        self.counts[vehicle_type] = self.counts.get(vehicle_type, 0) + count
+        self.distance[vehicle_type] = self.distance.get(vehicle_type, 0.0) + distance
+
+    def remove(self, vehicle_type: str, speed: float, distance: float):
+        """Account for a vehicle leaving the simulation"""
+        self.total_vehicles -= 1
+        self.speed_sum -= speed
+        self.counts[vehicle_type] -= 1
+        self.distance[vehicle_type] -= distance
+
+    def speed_changed(self, delta: float):
+        """Apply the summed speed change of moved vehicles"""
+        self.speed_sum += delta
+
+    def distance_added(self, vehicle_type: str, delta: float):
+        """Apply distance traveled by vehicles of one type"""
+        self.distance[vehicle_type] = self.distance.get(vehicle_type, 0.0) + delta
+
+    @property
+    def avg_speed(self) -> float:
+        return self.speed_sum / self.total_vehicles if self.total_vehicles else 0.0
+
+    @property
+    def total_distance(self) -> float:
+        return sum(self.distance.values())
+
+    @property
+    def co2_emissions(self) -> float:
+        return sum(d * self.co2_per_km.get(t, self.default_co2) for t, d in self.distance.items())
+
+    @property
+    def vehicle_counts(self) -> Dict[str, int]:
+        return {t: c for t, c in self.counts.items() if c > 0}
@@ -0,0 +1,83 @@
+"""
+Simulation clock decoupled from wall-clock time
+"""
+import time
+from datetime import datetime, timezone
+from typing import Union
+
+from utils.constants import TrafficConstants
+
+
+class SimulationClock:
+    """
+    Simulated time shared by every subsystem.
+    Wall time is converted into fixed-size simulation steps through a
+    time-warp factor; in max-speed mode steps are run back to back.
+    """
+
+    MAX_SPEED = 'max'
+
+    def __init__(self, step: float = 0.1, time_warp: float = 1.0, epoch: float = None):
+        self.step = step
+        self.time_warp = time_warp
+        self.max_speed = False
+        self.now = 0.0
+        # Unix time of simulated time zero; None anchors every reset to the wall clock
+        self.fixed_epoch = epoch
+        self.epoch = time.time() if epoch is None else epoch
+        self._pending = 0.0
+
+    def reset(self):
+        """Restart simulated time at zero, anchored to the fixed epoch or the current wall time"""
+        self.now = 0.0
+        self.epoch = time.time() if self.fixed_epoch is None else self.fixed_epoch
+        self._pending = 0.0
+
+    @property
+    def pending(self) -> float:
+        """Simulated seconds owed but not yet stepped (carried between steps_due() calls)"""
+        return self._pending
+
+    @pending.setter
+    def pending(self, value: float):
+        self._pending = float(value)
+
+    def reset_accumulator(self):
+        """Drop the owed fraction of a step, e.g. after jumping to another time"""
+        self._pending = 0.0
+
+    def advance(self, delta: float):
+        """Move simulated time forward by `delta` seconds"""
+        self.now += delta
+
+    def set_speed(self, speed: Union[float, str]) -> Union[float, str]:
+        """Set the time-warp factor, or 'max' to run as fast as possible"""
+        if speed == self.MAX_SPEED:
+            self.max_speed = True
+            return self.MAX_SPEED
+
+        self.max_speed = False
+        self.time_warp = max(TrafficConstants.MIN_SIMULATION_SPEED,
+                             min(TrafficConstants.MAX_SIMULATION_SPEED, float(speed)))
+        self.reset_accumulator()
+        return self.time_warp
+
+    @property
+    def speed(self) -> Union[float, str]:
+        """Current speed setting as exposed to clients"""
+        return self.MAX_SPEED if self.max_speed else self.time_warp
+
+    def steps_due(self, real_elapsed: float) -> int:
+        """Number of fixed steps owed for `real_elapsed` wall seconds"""
+        self._pending += real_elapsed * self.time_warp
+        steps = int(self._pending / self.step + 1e-9)
+        self._pending -= steps * self.step
+        return steps
+
+    def timestamp(self) -> float:
+        """Simulated time as a Unix timestamp"""
+        return self.epoch + self.now
+
+    def isoformat(self) -> str:
+        """Simulated time as an ISO 8601 string"""
+        return datetime.fromtimestamp(self.timestamp(), timezone.utc).isoformat()
@@ -0,0 +1,137 @@
+"""
+Uniform-grid spatial index for bulk proximity queries
+"""
+from typing import Sequence
+import numpy as np
+
+# Packs (row, col) cell coordinates into a single int64 key
+_KEY_OFFSET = 1 << 30
+_KEY_STRIDE = 1 << 32
+
+# The 3x3 neighbourhood around a cell, shaped to broadcast against (n,) arrays
+_NEIGHBOUR_ROWS = np.repeat([-1, 0, 1], 3)[:, None]
+_NEIGHBOUR_COLS = np.tile([-1, 0, 1], 3)[:, None]
+
+
+class SpatialGrid:
+    """
+    Static point index over (lat, lng) positions.
+    Points are bucketed into square cells of `cell_size` degrees. For
+    radius queries each point is also registered in the eight cells around
+    its own (a halo), so a query inspects a single cell; indexes used only
+    for bounding-box queries can skip it with halo=False.
+    """
+
+    def __init__(self, lats: Sequence[float], lngs: Sequence[float], cell_size: float, halo: bool = True):
+        if cell_size <= 0:
+            raise ValueError('cell_size must be positive')
+
+        self.cell_size = float(cell_size)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+
+        keys = self._keys(self._cells(self.lats), self._cells(self.lngs))
+        # Stable sort keeps original point order inside each cell
+        self._order = np.argsort(keys, kind='stable')
+        self._cell_keys, self._cell_starts, self._cell_counts = np.unique(
+            keys[self._order], return_index=True, return_counts=True
+        )
+        self._max_per_cell = int(self._cell_counts.max()) if len(self._cell_counts) else 0
+
+        self.has_halo = halo
+        if not halo:
+            return
+
+        # Halo index: point i listed under each of the 3x3 cells around its own
+        rows, cols = self._cells(self.lats), self._cells(self.lngs)
+        halo_keys = self._keys(rows + _NEIGHBOUR_ROWS, cols + _NEIGHBOUR_COLS).ravel()
+        halo_points = np.tile(np.arange(len(self.lats)), len(_NEIGHBOUR_ROWS))
+        # Sorting by (cell, point) keeps ascending point order inside each cell
+        halo_order = np.lexsort((halo_points, halo_keys))
+        self._halo_points = halo_points[halo_order]
+        self._halo_keys, self._halo_starts, self._halo_counts = np.unique(
+            halo_keys[halo_order], return_index=True, return_counts=True
+        )
+        self._halo_max = int(self._halo_counts.max()) if len(self._halo_counts) else 0
+
+    def __len__(self) -> int:
+        return len(self.lats)
+
+    def _cells(self, values: np.ndarray) -> np.ndarray:
+        """Cell coordinate of each value"""
+        return np.floor(values / self.cell_size).astype(np.int64)
+
+    @staticmethod
+    def _keys(rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+        """Pack cell coordinates into int64 keys"""
+        return (rows + _KEY_OFFSET) * _KEY_STRIDE + (cols + _KEY_OFFSET)
+
+    @staticmethod
+    def _lookup(cell_keys: np.ndarray, cell_starts: np.ndarray, cell_counts: np.ndarray, keys: np.ndarray):
+        """Start offset and point count of each cell key (count 0 if empty)"""
+        pos = np.searchsorted(cell_keys, keys)
+        pos = np.minimum(pos, len(cell_keys) - 1)
+        found = cell_keys[pos] == keys
+        return cell_starts[pos], np.where(found, cell_counts[pos], 0)
+
+    def within(self, lats, lngs, radius: float = None) -> np.ndarray:
+        """
+        For each query point, return the lowest index of an indexed point
+        whose Manhattan distance is below `radius`, or -1 if none is.
+        `radius` defaults to, and may not exceed, the cell size.
+        """
+        lats = np.asarray(lats, dtype=np.float64)
+        lngs = np.asarray(lngs, dtype=np.float64)
+        radius = self.cell_size if radius is None else radius
+        if radius > self.cell_size:
+            raise ValueError('radius cannot exceed the grid cell size')
+        if not self.has_halo:
+            raise ValueError('radius queries need an index built with halo=True')
+
+        sentinel = len(self.lats)
+        best = np.full(lats.shape, sentinel, dtype=np.int64)
+        if sentinel == 0 or lats.size == 0:
+            return np.full(lats.shape, -1, dtype=np.int64)
+
+        keys = self._keys(self._cells(lats), self._cells(lngs))
+        starts, counts = self._lookup(self._halo_keys, self._halo_starts, self._halo_counts, keys)
+        for k in range(self._halo_max):
+            has = counts > k
+            if not has.any():
+                break
+            candidate = self._halo_points[np.where(has, starts + k, 0)]
+            dist = np.abs(self.lats[candidate] - lats) + np.abs(self.lngs[candidate] - lngs)
+            best = np.where(has & (dist < radius), np.minimum(best, candidate), best)
+
+        best[best == sentinel] = -1
+        return best
+
+    def nearest_within(self, lat: float, lng: float, radius: float = None) -> int:
+        """Scalar form of within()"""
+        return int(self.within(np.array([lat]), np.array([lng]), radius)[0])
+
+    def query_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> np.ndarray:
+        """Sorted indexes of the points inside the bounding box (inclusive)"""
+        if len(self.lats) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        row0, row1 = self._cells(np.array([min_lat, max_lat]))
+        col0, col1 = self._cells(np.array([min_lng, max_lng]))
+        cell_count = (row1 - row0 + 1) * (col1 - col0 + 1)
+
+        if cell_count > len(self._cell_keys):
+            # Box spans more cells than are occupied: a flat scan is cheaper
+            candidates = np.arange(len(self.lats))
+        else:
+            grid_rows, grid_cols = np.meshgrid(np.arange(row0, row1 + 1), np.arange(col0, col1 + 1), indexing='ij')
+            starts, counts = self._lookup(self._cell_keys, self._cell_starts, self._cell_counts,
+                                          self._keys(grid_rows.ravel(), grid_cols.ravel()))
+            starts, counts = starts[counts > 0], counts[counts > 0]
+            if len(counts) == 0:
+                return np.empty(0, dtype=np.int64)
+            offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+            candidates = self._order[offsets]
+
+        lats, lngs = self.lats[candidates], self.lngs[candidates]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng)
+        return np.sort(candidates[inside])
@@ -0,0 +1,73 @@
+"""
+Multi-scenario sweeps across worker processes
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Any, Iterable, Iterator
+
+from .batch_runner import run_scenario, summarize_metrics
+
+
+def expand_sweep(scenarios: Iterable[str], seeds: Iterable[int], duration: float,
+                 params: Dict[str, List[Any]] = None, engine: str = 'numpy') -> List[Dict[str, Any]]:
+    """
+    Build run specs for the cartesian product of scenarios, seeds and
+    simulator config parameters, e.g. params={'phase_scale': [0.8, 1.0, 1.2]}
+    """
+    params = params or {}
+    names = list(params)
+    specs = []
+
+    for scenario_id, seed, values in itertools.product(
+            scenarios, seeds, itertools.product(*(params[n] for n in names))):
+        config = dict(zip(names, values))
+        specs.append({
+            'run_id': len(specs),
+            'scenario': scenario_id,
+            'seed': seed,
+            'duration': duration,
+            'engine': engine,
+            'config': config
+        })
+
+    return specs
+
+
+def run_spec(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one sweep spec and return its summary (executes in a worker process)"""
+    started = time.perf_counter()
+    series = run_scenario(spec['scenario'], spec['duration'], seed=spec.get('seed'),
+                          engine=spec.get('engine', 'numpy'),
+                          sample_interval=spec.get('sample_interval', 1.0),
+                          config=spec.get('config'))
+
+    return {
+        **spec,
+        'summary': summarize_metrics(series),
+        'wallTime': round(time.perf_counter() - started, 3),
+        'workerPid': os.getpid()
+    }
+
+
+class SweepExecutor:
+    """
+    Runs independent sweep specs on a process pool and yields each run's
+    summary as soon as it completes (completion order, not submission order)
+    """
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def run(self, specs: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Execute specs and stream results as they finish"""
+        with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(run_spec, spec): spec for spec in specs}
+
+            for future in as_completed(futures):
+                spec = futures[future]
+                try:
+                    yield future.result()
+                except Exception as e:
+                    yield {**spec, 'error': str(e)}
@@ -0,0 +1,290 @@
+"""
+Append-only columnar trace recorder (per-tick vehicles and traffic lights)
+"""
+import json
+import os
+import queue
+import threading
+import zipfile
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+TRACE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+
+class TraceRecorder:
+    """
+    Records every simulation tick into chunked .npz files.
+
+    Ticks are buffered in memory until `chunk_ticks` have accumulated, then the
+    chunk is handed to a background thread that concatenates and writes it.
+    At most `max_pending_chunks` chunks wait for the writer; beyond that the
+    simulation thread blocks, so memory stays bounded and no tick is dropped.
+
+    Chunk layout (rows are vehicles, grouped by tick):
+        tick_time      float64[ticks]        simulation time of each tick
+        tick_offsets   int64[ticks + 1]      row range of each tick
+        vehicle_code   int32[rows]           index into vehicle_ids
+        vehicle_ids    str[codes]            every id seen so far (codes are stable
+                                             across chunks)
+        type           int8[rows]            index into VEHICLE_TYPES
+        lat, lng       float64[rows]
+        speed, heading float32[rows]
+        light_ids      str[lights]
+        light_phase    int8[ticks, lights]
+        light_state    str[ticks, lights]
+        metrics        uint8[json]           JSON list of each tick's metrics dict
+    """
+
+    def __init__(self, directory: str, chunk_ticks: int = 600, max_pending_chunks: int = 4,
+                 compress: bool = False):
+        self.directory = directory
+        self.chunk_ticks = max(1, chunk_ticks)
+        self.compress = compress
+        self.simulator = None
+        self.light_ids: List[str] = []
+        self.info: Dict[str, Any] = {}
+
+        self.chunks: List[Dict[str, Any]] = []
+        self.ticks_recorded = 0
+        self.rows_recorded = 0
+        self.stalls = 0
+        self.error: Optional[BaseException] = None
+
+        self._buffer = self._new_buffer()
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending_chunks))
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # Writer-thread state: vehicle id -> stable integer code
+        self._codes: Dict[str, int] = {}
+        self._vehicle_ids: List[str] = []
+        self._last_ids: List[str] = []
+        self._last_codes = np.empty(0, dtype=np.int32)
+
+    @staticmethod
+    def _new_buffer() -> Dict[str, list]:
+        return {'time': [], 'ids': [], 'type': [], 'lat': [], 'lng': [], 'speed': [], 'heading': [],
+                'light_phase': [], 'light_state': [], 'metrics': []}
+
+    def attach(self, simulator):
+        """Start recording every tick of `simulator`"""
+        if self.simulator is not None:
+            raise RuntimeError('Recorder is already attached')
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.simulator = simulator
+        self.light_ids = [tl['id'] for tl in simulator.traffic_lights]
+        self.info = {
+            'scenario': simulator.current_scenario,
+            'step': simulator.clock.step,
+            'epoch': simulator.clock.epoch,
+            'network_bounds': getattr(simulator, 'network_bounds', None),
+            'lights': [
+                {key: tl[key] for key in ('id', 'position', 'phases', 'efficiency') if key in tl}
+                for tl in simulator.traffic_lights
+            ]
+        }
+        self._writer = threading.Thread(target=self._write_loop, name='trace-writer', daemon=True)
+        self._writer.start()
+        simulator.add_tick_listener(self.record)
+
+    def detach(self):
+        """Stop recording, flush buffered ticks and wait for the writer"""
+        self.unhook()
+        self.close()
+
+    def unhook(self):
+        """Stop receiving ticks (cheap; run it between ticks, then close() from any thread)"""
+        if self.simulator is not None:
+            self.simulator.remove_tick_listener(self.record)
+
+    def close(self):
+        """Flush buffered ticks and wait for the writer (after unhook())"""
+        if self.simulator is None:
+            return
+
+        self._submit()
+        self._queue.put(None)
+        self._writer.join()
+        self.simulator = None
+        self._write_manifest()
+
+    def record(self, simulator):
+        """Tick listener: buffer the current vehicle and light state"""
+        columns = simulator.vehicle_columns()
+        buffer = self._buffer
+
+        buffer['time'].append(simulator.clock.now)
+        buffer['ids'].append(columns['ids'])
+        buffer['type'].append(columns['type'])
+        buffer['lat'].append(columns['lat'])
+        buffer['lng'].append(columns['lng'])
+        buffer['speed'].append(columns['speed'])
+        buffer['heading'].append(columns['heading'])
+        buffer['light_phase'].append([tl['currentPhase'] for tl in simulator.traffic_lights])
+        buffer['light_state'].append([tl['state'] for tl in simulator.traffic_lights])
+        buffer['metrics'].append(simulator.metrics)
+
+        self.ticks_recorded += 1
+        self.rows_recorded += len(columns['ids'])
+
+        if len(buffer['time']) >= self.chunk_ticks:
+            self._submit()
+
+    def _submit(self):
+        """Hand the buffered ticks to the writer thread"""
+        if not self._buffer['time']:
+            return
+
+        buffer, self._buffer = self._buffer, self._new_buffer()
+        if self._queue.full():
+            self.stalls += 1
+        self._queue.put(buffer)
+
+    def _write_loop(self):
+        """Writer thread: encode and persist chunks until told to stop"""
+        while True:
+            buffer = self._queue.get()
+            if buffer is None:
+                return
+            try:
+                self._write_chunk(buffer)
+            except Exception as e:  # keep draining so the simulation never blocks forever
+                self.error = e
+
+    def _encode_ids(self, ids: List[str]) -> np.ndarray:
+        """Map one tick's vehicle ids to their codes (reusing the previous tick's when unchanged)"""
+        if ids == self._last_ids:
+            return self._last_codes
+
+        for vehicle_id in set(ids).difference(self._codes):
+            self._codes[vehicle_id] = len(self._vehicle_ids)
+            self._vehicle_ids.append(vehicle_id)
+
+        self._last_ids = ids
+        self._last_codes = np.fromiter(map(self._codes.__getitem__, ids), dtype=np.int32, count=len(ids))
+        return self._last_codes
+
+    def _write_chunk(self, buffer: Dict[str, list]):
+        """Concatenate one buffer into columns and write it as a chunk file"""
+        counts = np.fromiter((len(ids) for ids in buffer['ids']), dtype=np.int64, count=len(buffer['ids']))
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        codes = [self._encode_ids(ids) for ids in buffer['ids']]
+
+        def stack(name, dtype):
+            parts = buffer[name]
+            return np.concatenate(parts).astype(dtype, copy=False) if parts else np.empty(0, dtype=dtype)
+
+        index = len(self.chunks)
+        name = f'chunk_{index:06d}.npz'
+        tick_time = np.asarray(buffer['time'], dtype=np.float64)
+
+        columns = {
+            'tick_time': tick_time,
+            'tick_offsets': offsets,
+            'vehicle_code': np.concatenate(codes) if codes else np.empty(0, dtype=np.int32),
+            'vehicle_ids': np.array(self._vehicle_ids, dtype=str),
+            'type': stack('type', np.int8),
+            'lat': stack('lat', np.float64),
+            'lng': stack('lng', np.float64),
+            'speed': stack('speed', np.float32),
+            'heading': stack('heading', np.float32),
+            'light_ids': np.array(self.light_ids, dtype=str),
+            'light_phase': np.asarray(buffer['light_phase'], dtype=np.int8).reshape(len(tick_time), len(self.light_ids)),
+            'light_state': np.asarray(buffer['light_state'], dtype=str).reshape(len(tick_time), len(self.light_ids)),
+            'metrics': np.frombuffer(json.dumps(buffer['metrics']).encode('utf-8'), dtype=np.uint8)
+        }
+
+        with open(os.path.join(self.directory, name), 'wb') as f:
+            (np.savez_compressed if self.compress else np.savez)(f, **columns)
+
+        with self._lock:
+            self.chunks.append({
+                'file': name,
+                'ticks': len(tick_time),
+                'rows': int(offsets[-1]),
+                'start_time': float(tick_time[0]),
+                'end_time': float(tick_time[-1])
+            })
+        self._write_manifest()
+
+    def _write_manifest(self):
+        """Rewrite the manifest listing every chunk written so far"""
+        with self._lock:
+            manifest = {
+                'version': TRACE_FORMAT_VERSION,
+                'chunk_ticks': self.chunk_ticks,
+                'light_ids': self.light_ids,
+                **self.info,
+                'chunks': list(self.chunks)
+            }
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Recording counters"""
+        return {
+            'directory': self.directory,
+            'recording': self.simulator is not None,
+            'ticksRecorded': self.ticks_recorded,
+            'rowsRecorded': self.rows_recorded,
+            'chunksWritten': len(self.chunks),
+            'pendingChunks': self._queue.qsize(),
+            'stalls': self.stalls,
+            'error': str(self.error) if self.error else None
+        }
+
+
+def _mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """
+    Memory-map every member of an uncompressed .npz.
+    Compressed members cannot be mapped and are read into memory instead.
+    """
+    columns = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    columns[name] = np.lib.format.read_array(member, allow_pickle=False)
+                continue
+
+            # Skip the local file header to reach the .npy payload
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+
+            version = np.lib.format.read_magic(f)
+            read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                           else np.lib.format.read_array_header_2_0)
+            shape, fortran_order, dtype = read_header(f)
+            if 0 in shape:
+                columns[name] = np.empty(shape, dtype=dtype)
+            else:
+                columns[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                          order='F' if fortran_order else 'C')
+    return columns
+
+
+def load_trace_chunk(directory: str, chunk: Dict[str, Any], mmap: bool = False) -> Dict[str, np.ndarray]:
+    """
+    Load every column of one chunk listed in a trace manifest.
+    With `mmap`, columns are memory-mapped so only the rows touched are read.
+    """
+    path = os.path.join(directory, chunk['file'])
+    if mmap:
+        return _mmap_npz(path)
+    with np.load(path, allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+
+def load_trace_manifest(directory: str) -> Dict[str, Any]:
+    """Read the manifest of a recorded trace"""
+    with open(os.path.join(directory, MANIFEST_NAME)) as f:
+        return json.load(f)
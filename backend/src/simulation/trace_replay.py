@@ -0,0 +1,253 @@
+"""
+Playback of recorded simulation traces
+"""
+import json
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+import numpy as np
+
+from .sim_clock import SimulationClock
+from .trace_recorder import load_trace_chunk, load_trace_manifest
+from .vehicle_arrays import VEHICLE_TYPES, TYPE_COLORS
+
+# Tolerance when matching a sim time to a recorded tick time
+TIME_EPSILON = 1e-6
+
+
+class TraceReplaySource:
+    """
+    Plays a trace written by TraceRecorder back through the same interface
+    as MockSimulator, so SimulationStream can stream it unchanged.
+
+    Chunk start times in the manifest act as keyframes: seeking bisects them
+    to pick a chunk, then bisects the chunk's tick times. Chunks are
+    memory-mapped, so a seek only reads the rows of the target tick.
+    """
+
+    def __init__(self, directory: str, cache_chunks: int = 2):
+        self.directory = directory
+        self.manifest = load_trace_manifest(directory)
+        self.chunks: List[Dict[str, Any]] = self.manifest['chunks']
+        if not self.chunks:
+            raise ValueError(f'Trace has no recorded chunks: {directory}')
+
+        self.keyframe_times = np.array([c['start_time'] for c in self.chunks], dtype=np.float64)
+        self.start_time = self.chunks[0]['start_time']
+        self.end_time = self.chunks[-1]['end_time']
+
+        self.clock = SimulationClock(step=self.manifest.get('step', 0.1))
+        self.clock.epoch = self.manifest.get('epoch', self.clock.epoch)
+        self.current_scenario = self.manifest.get('scenario')
+        self.network_bounds = self.manifest.get('network_bounds')
+        self.is_running = False
+        self.is_paused = False
+        self.config: Dict[str, Any] = {}
+        self.stats = {'replay': True, 'trace': directory}
+
+        self._lights = self.manifest.get('lights') or [{'id': i} for i in self.manifest.get('light_ids', [])]
+        self._cache_size = max(1, cache_chunks)
+        self._cache: OrderedDict = OrderedDict()  # chunk index -> columns
+        self._chunk_index = 0
+        self._tick = 0
+        self._frame: Optional[Dict[str, Any]] = None
+
+        self.seek(self.start_time)
+
+    def _load_chunk(self, index: int) -> Dict[str, Any]:
+        """Get a chunk's (memory-mapped) columns, keeping a small LRU cache"""
+        if index in self._cache:
+            self._cache.move_to_end(index)
+            return self._cache[index]
+
+        columns = load_trace_chunk(self.directory, self.chunks[index], mmap=True)
+        columns['tick_time'] = np.asarray(columns['tick_time'])
+        columns['tick_offsets'] = np.asarray(columns['tick_offsets'])
+        columns['metrics_list'] = json.loads(bytes(columns['metrics']).decode('utf-8')) if 'metrics' in columns else []
+
+        self._cache[index] = columns
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return columns
+
+    def seek(self, sim_time: float) -> float:
+        """Jump to the last recorded tick at or before `sim_time`; returns its time"""
+        sim_time = min(max(float(sim_time), self.start_time), self.end_time)
+
+        index = int(np.searchsorted(self.keyframe_times, sim_time + TIME_EPSILON, side='right')) - 1
+        index = max(index, 0)
+        tick_time = self._load_chunk(index)['tick_time']
+        tick = max(int(np.searchsorted(tick_time, sim_time + TIME_EPSILON, side='right')) - 1, 0)
+
+        self._chunk_index, self._tick = index, tick
+        self._frame = None
+        self.clock.now = float(tick_time[tick])
+        self.clock.reset_accumulator()
+        return self.clock.now
+
+    @property
+    def simulation_time(self) -> float:
+        return self.clock.now
+
+    @simulation_time.setter
+    def simulation_time(self, value: float):
+        self.seek(value)
+
+    # Playback control (mirrors MockSimulator)
+
+    def start_simulation(self, scenario_id: str = None):
+        """Start playback (from the beginning if the end was reached)"""
+        if self.clock.now >= self.end_time:
+            self.seek(self.start_time)
+        self.is_running = True
+        self.is_paused = False
+        return True
+
+    def stop_simulation(self):
+        """Stop playback and rewind"""
+        self.is_running = False
+        self.is_paused = False
+        self.seek(self.start_time)
+        return True
+
+    def pause_simulation(self):
+        """Pause playback"""
+        self.is_paused = True
+        return True
+
+    def resume_simulation(self):
+        """Resume playback"""
+        self.is_paused = False
+        return True
+
+    def set_speed(self, speed):
+        """Set the playback time-warp factor (or 'max')"""
+        return self.clock.set_speed(speed)
+
+    def advance(self, real_elapsed: float) -> int:
+        """Move playback forward by the recorded ticks owed for `real_elapsed` wall seconds"""
+        if not self.is_running or self.is_paused:
+            return 0
+
+        steps = 1 if self.clock.max_speed else self.clock.steps_due(real_elapsed)
+        if steps == 0:
+            return 0
+
+        pending = self.clock.pending
+        self.seek(self.clock.now + steps * self.clock.step)
+        self.clock.pending = pending
+        if self.clock.now >= self.end_time - TIME_EPSILON:
+            self.is_paused = True
+        return steps
+
+    # Frame access
+
+    def _current_frame(self) -> Dict[str, Any]:
+        """Decode the current tick into vehicle/light/metrics structures"""
+        if self._frame is not None:
+            return self._frame
+
+        columns = self._load_chunk(self._chunk_index)
+        tick = self._tick
+        start, stop = int(columns['tick_offsets'][tick]), int(columns['tick_offsets'][tick + 1])
+
+        ids = columns['vehicle_ids'][np.asarray(columns['vehicle_code'][start:stop])].tolist()
+        types = np.asarray(columns['type'][start:stop]).tolist()
+        lats = np.asarray(columns['lat'][start:stop]).tolist()
+        lngs = np.asarray(columns['lng'][start:stop]).tolist()
+        speeds = np.asarray(columns['speed'][start:stop]).tolist()
+        headings = np.asarray(columns['heading'][start:stop]).tolist()
+
+        vehicles = []
+        for i, vehicle_id in enumerate(ids):
+            vehicle_type = VEHICLE_TYPES[types[i]]
+            vehicles.append({
+                'id': vehicle_id,
+                'type': vehicle_type,
+                'position': {'lat': lats[i], 'lng': lngs[i]},
+                'speed': speeds[i],
+                'heading': headings[i],
+                'color': TYPE_COLORS[vehicle_type]
+            })
+
+        phases = np.asarray(columns['light_phase'][tick]).tolist()
+        states = np.asarray(columns['light_state'][tick]).tolist()
+        traffic_lights = [
+            {**light, 'currentPhase': phases[i], 'state': states[i]}
+            for i, light in enumerate(self._lights)
+        ]
+
+        metrics_list = columns['metrics_list']
+        metrics = metrics_list[tick] if tick < len(metrics_list) else {}
+
+        self._frame = {'vehicles': vehicles, 'traffic_lights': traffic_lights, 'metrics': metrics}
+        return self._frame
+
+    def vehicle_columns(self) -> Dict[str, Any]:
+        """Columnar view of the current tick (same layout as MockSimulator.vehicle_columns)"""
+        columns = self._load_chunk(self._chunk_index)
+        start, stop = (int(x) for x in columns['tick_offsets'][self._tick:self._tick + 2])
+        return {
+            'ids': columns['vehicle_ids'][np.asarray(columns['vehicle_code'][start:stop])].tolist(),
+            'type': np.array(columns['type'][start:stop]),
+            'lat': np.array(columns['lat'][start:stop]),
+            'lng': np.array(columns['lng'][start:stop]),
+            'speed': np.array(columns['speed'][start:stop]),
+            'heading': np.array(columns['heading'][start:stop])
+        }
+
+    @property
+    def vehicles(self) -> List[Dict]:
+        return self._current_frame()['vehicles']
+
+    @property
+    def traffic_lights(self) -> List[Dict]:
+        return self._current_frame()['traffic_lights']
+
+    @property
+    def metrics(self) -> Dict:
+        return self._current_frame()['metrics']
+
+    def get_simulation_data(self) -> Dict:
+        """Get the current replay frame in the live simulation data layout"""
+        frame = self._current_frame()
+        return {
+            'vehicles': frame['vehicles'],
+            'traffic_lights': frame['traffic_lights'],
+            'metrics': frame['metrics'],
+            'timestamp': self.clock.timestamp(),
+            'simulation_time': self.simulation_time,
+            'scenario': self.current_scenario,
+            'is_running': self.is_running,
+            'is_paused': self.is_paused,
+            'speed': self.clock.speed,
+            'stats': self.stats,
+            'replay': self.get_replay_status()
+        }
+
+    def get_simulation_snapshot(self) -> Dict:
+        """Replay frames are never mutated, so the data is already a snapshot"""
+        return self.get_simulation_data()
+
+    def get_replay_status(self) -> Dict[str, Any]:
+        """Position of the playback head within the trace"""
+        return {
+            'trace': self.directory,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'position': self.simulation_time
+        }
+
+    def get_vehicle_by_id(self, vehicle_id: str) -> Optional[Dict]:
+        """Get vehicle by ID in the current frame"""
+        for vehicle in self.vehicles:
+            if vehicle['id'] == vehicle_id:
+                return vehicle
+        return None
+
+    def add_emergency_vehicle(self):
+        """Recorded traces are read-only"""
+        return None
+
+    def remove_vehicle(self, vehicle_id: str) -> bool:
+        """Recorded traces are read-only"""
+        return False
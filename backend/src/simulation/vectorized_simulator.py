@@ -0,0 +1,287 @@
+"""
+Vectorized mock simulator backed by NumPy column arrays
+"""
+from typing import Dict, Any, Optional
+import numpy as np
+
+from .mock_simulator import MockSimulator
+from .vehicle_arrays import (
+    VehicleArrays, VehicleListView,
+    VEHICLE_TYPES, EMERGENCY_TYPE, EMERGENCY_SUBTYPES,
+    VEHICLE_PALETTE, TYPE_COLORS, SPEED_RANGES
+)
+
+# Types drawn for regular traffic (emergency vehicles are spawned separately)
+REGULAR_TYPES = np.array([VEHICLE_TYPES.index(t) for t in ['passenger', 'bus', 'truck', 'motorcycle', 'bicycle']], dtype=np.int8)
+TYPE_COLOR_CODES = np.array([VEHICLE_PALETTE.index(TYPE_COLORS[t]) for t in VEHICLE_TYPES], dtype=np.int8)
+SPEED_MIN = np.array([SPEED_RANGES[t][0] for t in VEHICLE_TYPES], dtype=np.float64)
+SPEED_MAX = np.array([SPEED_RANGES[t][1] for t in VEHICLE_TYPES], dtype=np.float64)
+BASE_SPEEDS = np.where(np.arange(len(VEHICLE_TYPES)) == EMERGENCY_TYPE, 70.0, 50.0)
+
+
+class VectorizedSimulator(MockSimulator):
+    """
+    Drop-in MockSimulator whose vehicle state lives in contiguous arrays.
+    A tick is a fixed number of whole-array operations, independent of
+    the vehicle count; dicts are only built when data is serialized.
+    """
+
+    def __init__(self, config=None):
+        self.arrays = VehicleArrays(capacity=(config or {}).get('initial_capacity', 1024))
+        super().__init__(config)
+        self.rng = np.random.default_rng(self.config.get('seed'))
+
+    @property
+    def vehicles(self) -> VehicleListView:
+        """Vehicles as a lazily materialized sequence of dicts"""
+        return VehicleListView(self.arrays, self.edge_ids)
+
+    @vehicles.setter
+    def vehicles(self, value):
+        self.arrays.clear()
+        for vehicle in value or []:
+            self.arrays.append_dict(vehicle, self.edge_index, self.clock.timestamp())
+        self._resync_running_metrics()
+
+    def _initialize_network_edges(self):
+        """Initialize network edges and their array representation"""
+        super()._initialize_network_edges()
+        self._build_edge_arrays()
+
+    def _build_edge_arrays(self):
+        """Precompute per-edge geometry used by the vectorized step"""
+        self.edge_ids = [e['id'] for e in self.edges]
+        self.edge_index = {edge_id: i for i, edge_id in enumerate(self.edge_ids)}
+        self.edge_from_lat = np.array([e['from_lat'] for e in self.edges])
+        self.edge_from_lng = np.array([e['from_lng'] for e in self.edges])
+        self.edge_dlat = np.array([e['to_lat'] - e['from_lat'] for e in self.edges])
+        self.edge_dlng = np.array([e['to_lng'] - e['from_lng'] for e in self.edges])
+
+        # Same heading formula as the dict engine, evaluated once per edge
+        slope = np.divide(self.edge_dlat, self.edge_dlng,
+                          out=np.zeros_like(self.edge_dlat), where=self.edge_dlng != 0)
+        self.edge_heading = (180 / 3.14159) * (3.14159 / 2 - slope)
+
+    def _sample_routes(self, first_edges: np.ndarray, extra: int) -> np.ndarray:
+        """Build routes: the current edge followed by `extra` distinct random edges"""
+        count = len(first_edges)
+        picks = self.rng.random((count, len(self.edge_ids))).argsort(axis=1)[:, :extra]
+        return np.concatenate([first_edges[:, None], picks], axis=1).astype(np.int32)
+
+    def _generate_initial_vehicles(self, count: int):
+        """Generate initial vehicles in one batch"""
+        self.arrays.clear()
+        if count <= 0:
+            return
+
+        rng = self.rng
+        types = rng.choice(REGULAR_TYPES, size=count)
+        edges = rng.integers(0, len(self.edge_ids), size=count)
+        progress = rng.random(count)
+        speed = np.round(rng.uniform(SPEED_MIN[types], SPEED_MAX[types]), 1)
+
+        start = self.stats['total_vehicles_created']
+        ids = [f'veh_{i:03d}' for i in range(start, start + count)]
+
+        self.arrays.extend(ids, self._sample_routes(edges, 2), {
+            'type': types,
+            'color': np.arange(count) % len(VEHICLE_PALETTE),
+            'subtype': -1,
+            'speed': speed,
+            'progress': progress,
+            'direction': np.where(rng.random(count) > 0.5, 1, -1),
+            'edge': edges,
+            'lane': rng.integers(0, 2, size=count),
+            'lat': self.edge_from_lat[edges] + self.edge_dlat[edges] * progress,
+            'lng': self.edge_from_lng[edges] + self.edge_dlng[edges] * progress,
+            'heading': rng.uniform(0, 360, size=count),
+            'distance': 0.0,
+            'created_at': self.clock.timestamp(),
+            'route_pos': 0,
+        })
+        self.stats['total_vehicles_created'] += count
+        self._resync_running_metrics()
+
+    def _red_light_mask(self, lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+        """True for vehicles whose first nearby traffic light is red"""
+        light_idx = self.find_traffic_lights_near(lat, lng)
+        if not self.traffic_lights:
+            return np.zeros(len(lat), dtype=bool)
+
+        red = np.array([tl['state'][0] == 'r' for tl in self.traffic_lights], dtype=bool)
+        return (light_idx >= 0) & red[light_idx]
+
+    def _update_vehicles(self, delta_time: float):
+        """Update vehicle positions and speeds for all rows at once"""
+        n = self.arrays.size
+        if n == 0:
+            return
+
+        a = self.arrays
+        speed = a.column('speed')
+        progress = a.column('progress')
+        direction = a.column('direction')
+        edge = a.column('edge')
+        lat = a.column('lat')
+        lng = a.column('lng')
+        types = a.column('type')
+
+        # Decelerate at red lights, otherwise drift towards a noisy target speed
+        red = self._red_light_mask(lat, lng)
+        target = BASE_SPEEDS[types] + self.rng.uniform(-10, 10, size=n)
+        new_speed = np.where(red, np.maximum(0, speed - 20 * delta_time),
+                             speed + (target - speed) * 0.1)
+        self.running_metrics.speed_changed(float(new_speed.sum() - speed.sum()))
+        np.copyto(speed, new_speed)
+
+        # Advance along the edge
+        distance = speed / 3.6 * delta_time
+        progress += distance / 1000 * direction
+        a.column('distance')[:] += distance / 1000
+
+        distance_by_type = np.bincount(types, weights=distance / 1000, minlength=len(VEHICLE_TYPES))
+        for type_code in np.flatnonzero(distance_by_type):
+            self.running_metrics.distance_added(VEHICLE_TYPES[type_code], float(distance_by_type[type_code]))
+
+        # Move finished vehicles to the next edge of their route
+        done = np.flatnonzero((progress > 1.0) | (progress < 0))
+        if len(done):
+            route_pos = a.column('route_pos')
+            next_pos = (route_pos[done] + 1) % a.column('route_len')[done]
+            route_pos[done] = next_pos
+            edge[done] = a.route[done, next_pos]
+            progress[done] = np.where(direction[done] > 0, 0.0, 1.0)
+            a.column('lane')[done] = self.rng.integers(0, 2, size=len(done))
+
+        # Interpolate positions and headings
+        np.copyto(lat, self.edge_from_lat[edge] + self.edge_dlat[edge] * progress)
+        np.copyto(lng, self.edge_from_lng[edge] + self.edge_dlng[edge] * progress)
+        np.copyto(a.column('heading'), self.edge_heading[edge])
+
+    def _manage_vehicle_population(self):
+        """Randomly add or remove vehicles"""
+        if self.rng.random() < 0.1:
+            self._add_random_vehicle()
+
+        if self.rng.random() < 0.05 and self.arrays.size > 10:
+            self._remove_slot(int(self.rng.integers(self.arrays.size)))
+
+    def _remove_slot(self, slot: int):
+        """Remove one row and take it out of the running aggregates"""
+        self.running_metrics.remove(VEHICLE_TYPES[self.arrays.column('type')[slot]],
+                                    float(self.arrays.column('speed')[slot]),
+                                    float(self.arrays.column('distance')[slot]))
+        self.arrays.remove(slot)
+
+    def _spawn(self, vehicle_id: str, type_code: int, speed: float, route_extra: int,
+               subtype: int = -1) -> int:
+        """Append one vehicle on a random edge and return its slot"""
+        edge = int(self.rng.integers(len(self.edge_ids)))
+        progress = float(self.rng.random())
+        route = self._sample_routes(np.array([edge]), route_extra)[0].tolist()
+
+        slot = self.arrays.append(
+            vehicle_id, route,
+            type=type_code,
+            color=TYPE_COLOR_CODES[type_code],
+            subtype=subtype,
+            speed=speed,
+            progress=progress,
+            direction=1 if self.rng.random() > 0.5 else -1,
+            edge=edge,
+            lane=int(self.rng.integers(0, 2)),
+            lat=self.edge_from_lat[edge] + self.edge_dlat[edge] * progress,
+            lng=self.edge_from_lng[edge] + self.edge_dlng[edge] * progress,
+            heading=self.rng.uniform(0, 360),
+            distance=0.0,
+            created_at=self.clock.timestamp(),
+            route_pos=0
+        )
+        self.stats['total_vehicles_created'] += 1
+        self.running_metrics.add(VEHICLE_TYPES[type_code], float(speed))
+        return slot
+
+    def _add_random_vehicle(self):
+        """Add a random vehicle to simulation"""
+        if self.rng.random() < 0.1:
+            type_code = EMERGENCY_TYPE
+        else:
+            type_code = int(self.rng.choice(REGULAR_TYPES))
+
+        vehicle_id = f'veh_{self.stats["total_vehicles_created"]:04d}'
+        self._spawn(vehicle_id, type_code, self.rng.uniform(30, 60), 2)
+
+    def add_emergency_vehicle(self) -> Dict:
+        """Add an emergency vehicle"""
+        vehicle_id = f'emergency_{self.stats["total_vehicles_created"]:04d}'
+        slot = self._spawn(vehicle_id, EMERGENCY_TYPE, self.rng.uniform(60, 90), 3,
+                           subtype=int(self.rng.integers(len(EMERGENCY_SUBTYPES))))
+        self.stats['emergency_vehicles_served'] += 1
+
+        return self.arrays.to_dict(slot, self.edge_ids)
+
+    def _resync_running_metrics(self):
+        """Recompute the running aggregates exactly with whole-array reductions"""
+        types = self.arrays.column('type')
+        counts = np.bincount(types, minlength=len(VEHICLE_TYPES))
+        speed_sums = np.bincount(types, weights=self.arrays.column('speed'), minlength=len(VEHICLE_TYPES))
+        distance_sums = np.bincount(types, weights=self.arrays.column('distance'), minlength=len(VEHICLE_TYPES))
+
+        self.running_metrics.reset()
+        for type_code in np.flatnonzero(counts):
+            self.running_metrics.add(VEHICLE_TYPES[type_code], float(speed_sums[type_code]),
+                                     float(distance_sums[type_code]), count=int(counts[type_code]))
+        self._ticks_since_resync = 0
+
+    def get_simulation_data(self) -> Dict:
+        """
+        Get complete simulation data. 'vehicles' is the live lazy view: building
+        every dict costs several microseconds per vehicle (~0.7 s at 100k), so only iterate it
+        when dicts are really needed (frames and traces read the columns)
+        """
+        return super().get_simulation_data()
+
+    def get_simulation_snapshot(self) -> Dict:
+        """Get simulation data detached from live state (materializes every vehicle dict)"""
+        data = self.get_simulation_data()
+        data['vehicles'] = self.arrays.to_dicts(self.edge_ids)
+        data['traffic_lights'] = [dict(tl) for tl in data['traffic_lights']]
+        data['stats'] = dict(data['stats'])
+        return data
+
+    def get_frame_state(self):
+        """
+        Simulation data without vehicles, plus a read-only copy of the vehicle
+        arrays; SimulationFrame materializes the dicts only when read
+        """
+        data = super().get_simulation_data()
+        del data['vehicles']
+        data['traffic_lights'] = [dict(tl) for tl in data['traffic_lights']]
+        data['stats'] = dict(data['stats'])
+        return data, self.arrays.frozen_copy(), self.edge_ids
+
+    def vehicle_columns(self) -> Dict[str, Any]:
+        """Columnar copy of per-vehicle id, type, position, speed and heading"""
+        return {
+            'ids': list(self.arrays.ids),
+            'type': self.arrays.column('type').copy(),
+            'lat': self.arrays.column('lat').copy(),
+            'lng': self.arrays.column('lng').copy(),
+            'speed': self.arrays.column('speed').astype(np.float32),
+            'heading': self.arrays.column('heading').astype(np.float32)
+        }
+
+    def get_vehicle_by_id(self, vehicle_id: str) -> Optional[Dict]:
+        """Get vehicle by ID"""
+        slot = self.arrays.index.get(vehicle_id)
+        if slot is None:
+            return None
+        return self.arrays.to_dict(slot, self.edge_ids)
+
+    def remove_vehicle(self, vehicle_id: str) -> bool:
+        """Remove vehicle by ID"""
+        slot = self.arrays.index.get(vehicle_id)
+        if slot is None:
+            return False
+        self._remove_slot(slot)
+        return True
@@ -0,0 +1,310 @@
+"""
+Structure-of-arrays vehicle table for the vectorized simulator
+"""
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+# Categorical encodings shared by the array engine
+VEHICLE_TYPES = ['passenger', 'bus', 'truck', 'motorcycle', 'bicycle', 'emergency']
+EMERGENCY_TYPE = VEHICLE_TYPES.index('emergency')
+EMERGENCY_SUBTYPES = ['ambulance', 'police', 'fire_truck']
+
+# Palette used for initial vehicles (assigned by index) and spawned vehicles (by type)
+VEHICLE_PALETTE = ['#3b82f6', '#10b981', '#8b5cf6', '#f59e0b', '#ef4444', '#06b6d4']
+TYPE_COLORS = {
+    'passenger': '#3b82f6',
+    'emergency': '#ef4444',
+    'bus': '#f59e0b',
+    'truck': '#8b5cf6',
+    'motorcycle': '#10b981',
+    'bicycle': '#06b6d4'
+}
+
+SPEED_RANGES = {
+    'passenger': (30, 60),
+    'bus': (20, 40),
+    'truck': (30, 70),
+    'motorcycle': (40, 80),
+    'bicycle': (15, 25),
+    'emergency': (60, 90)
+}
+
+CO2_PER_KM = {
+    'passenger': 120,
+    'emergency': 180,
+    'bus': 80,
+    'truck': 150,
+    'motorcycle': 60,
+    'bicycle': 0
+}
+
+ROUTE_WIDTH = 4
+
+
+class VehicleArrays:
+    """
+    Contiguous column storage for vehicle state.
+    Rows are kept dense: removal swaps the last row into the freed slot.
+    """
+
+    COLUMNS = {
+        'type': np.int8,
+        'color': np.int8,
+        'subtype': np.int8,
+        'speed': np.float64,
+        'progress': np.float64,
+        'direction': np.int8,
+        'edge': np.int32,
+        'lane': np.int8,
+        'lat': np.float64,
+        'lng': np.float64,
+        'heading': np.float64,
+        'distance': np.float64,
+        'created_at': np.float64,
+        'route_len': np.int8,
+        'route_pos': np.int8,
+    }
+
+    def __init__(self, capacity: int = 64):
+        self.size = 0
+        self.ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self._capacity = max(1, capacity)
+        self._data = {name: np.zeros(self._capacity, dtype=dtype) for name, dtype in self.COLUMNS.items()}
+        self._route = np.full((self._capacity, ROUTE_WIDTH), -1, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def column(self, name: str) -> np.ndarray:
+        """Get a live view of a column (first `size` rows)"""
+        return self._data[name][:self.size]
+
+    @property
+    def route(self) -> np.ndarray:
+        """Live view of the route matrix (edge indexes, -1 padded)"""
+        return self._route[:self.size]
+
+    def _reserve(self, extra: int):
+        """Grow storage so that `extra` more rows fit"""
+        needed = self.size + extra
+        if needed <= self._capacity:
+            return
+
+        capacity = self._capacity
+        while capacity < needed:
+            capacity *= 2
+
+        for name, array in self._data.items():
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            self._data[name] = grown
+
+        route = np.full((capacity, ROUTE_WIDTH), -1, dtype=np.int32)
+        route[:self.size] = self._route[:self.size]
+        self._route = route
+        self._capacity = capacity
+
+    def append(self, vehicle_id: str, route: List[int], **values) -> int:
+        """Append a single vehicle row and return its slot"""
+        self._reserve(1)
+        slot = self.size
+
+        for name, array in self._data.items():
+            array[slot] = values.get(name, 0)
+        self._route[slot] = -1
+        self._route[slot, :len(route)] = route
+        self._data['route_len'][slot] = len(route)
+
+        self.ids.append(vehicle_id)
+        self.index[vehicle_id] = slot
+        self.size += 1
+        return slot
+
+    def append_dict(self, vehicle: Dict[str, Any], edge_index: Dict[str, int], created_at: float = 0.0) -> int:
+        """Append a vehicle given in the legacy dict layout"""
+        route = [edge_index[e] for e in vehicle.get('route', []) if e in edge_index][:ROUTE_WIDTH]
+        edge = edge_index.get(vehicle.get('edge'), route[0] if route else 0)
+        route = route or [edge]
+        subtype = vehicle.get('subtype')
+        lane = str(vehicle.get('lane', '0')).rsplit('_', 1)[-1]
+
+        return self.append(
+            vehicle['id'], route,
+            type=VEHICLE_TYPES.index(vehicle.get('type', 'passenger')),
+            color=VEHICLE_PALETTE.index(vehicle['color']) if vehicle.get('color') in VEHICLE_PALETTE else 0,
+            subtype=EMERGENCY_SUBTYPES.index(subtype) if subtype in EMERGENCY_SUBTYPES else -1,
+            speed=vehicle.get('speed', 0),
+            progress=vehicle.get('progress', 0),
+            direction=vehicle.get('direction', 1),
+            edge=edge,
+            lane=int(lane) if lane.isdigit() else 0,
+            lat=vehicle['position']['lat'],
+            lng=vehicle['position']['lng'],
+            heading=vehicle.get('heading', 0),
+            distance=vehicle.get('distanceTraveled', 0),
+            created_at=vehicle.get('createdAt', created_at),
+            route_pos=route.index(edge) if edge in route else 0
+        )
+
+    @classmethod
+    def from_dicts(cls, vehicles: List[Dict[str, Any]], edge_index: Dict[str, int]) -> 'VehicleArrays':
+        """Build a table from vehicles in the legacy dict layout"""
+        arrays = cls(capacity=len(vehicles))
+        for vehicle in vehicles:
+            arrays.append_dict(vehicle, edge_index)
+        return arrays
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """Copy of the live rows as plain arrays (ids, route and every column)"""
+        state = {name: array[:self.size].copy() for name, array in self._data.items()}
+        state['route'] = self._route[:self.size].copy()
+        state['ids'] = np.array(self.ids, dtype=str) if self.ids else np.empty(0, dtype='<U1')
+        return state
+
+    def frozen_copy(self) -> 'VehicleArrays':
+        """Read-only copy of the live rows: one memcpy per column plus the id list and index"""
+        copy = VehicleArrays.__new__(VehicleArrays)
+        copy.size = self.size
+        copy.ids = list(self.ids)
+        copy.index = dict(self.index)
+        copy._capacity = self.size
+        copy._data = {name: array[:self.size].copy() for name, array in self._data.items()}
+        copy._route = self._route[:self.size].copy()
+        for array in (*copy._data.values(), copy._route):
+            array.flags.writeable = False
+        return copy
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> 'VehicleArrays':
+        """Rebuild a table from state() output"""
+        ids = state['ids'].tolist()
+        arrays = cls(capacity=len(ids))
+        arrays.extend(ids, state['route'], {name: state[name] for name in cls.COLUMNS})
+        return arrays
+
+    def extend(self, vehicle_ids: List[str], routes: np.ndarray, columns: Dict[str, np.ndarray]):
+        """Append many vehicle rows at once"""
+        count = len(vehicle_ids)
+        if count == 0:
+            return
+
+        self._reserve(count)
+        start, end = self.size, self.size + count
+
+        for name, array in self._data.items():
+            array[start:end] = columns.get(name, 0)
+        self._route[start:end] = -1
+        self._route[start:end, :routes.shape[1]] = routes
+        if 'route_len' not in columns:
+            self._data['route_len'][start:end] = (routes >= 0).sum(axis=1)
+
+        self.ids.extend(vehicle_ids)
+        self.index.update(zip(vehicle_ids, range(start, end)))
+        self.size = end
+
+    def remove(self, slot: int) -> str:
+        """Remove the row at `slot` by swapping the last row into it"""
+        last = self.size - 1
+        vehicle_id = self.ids[slot]
+
+        if slot != last:
+            for array in self._data.values():
+                array[slot] = array[last]
+            self._route[slot] = self._route[last]
+            moved_id = self.ids[last]
+            self.ids[slot] = moved_id
+            self.index[moved_id] = slot
+
+        self.ids.pop()
+        del self.index[vehicle_id]
+        self.size = last
+        return vehicle_id
+
+    def clear(self):
+        """Remove all rows (storage is kept)"""
+        self.size = 0
+        self.ids = []
+        self.index = {}
+
+    def to_dict(self, slot: int, edge_ids: List[str]) -> Dict[str, Any]:
+        """Materialize one row in the legacy vehicle dict layout"""
+        return self._materialize(slot, slot + 1, edge_ids)[0]
+
+    def to_dicts(self, edge_ids: List[str], start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Materialize rows in the legacy vehicle dict layout"""
+        stop = self.size if stop is None else min(stop, self.size)
+        return self._materialize(start, stop, edge_ids)
+
+    def _materialize(self, start: int, stop: int, edge_ids: List[str]) -> List[Dict[str, Any]]:
+        """Build vehicle dicts for rows [start, stop)"""
+        if stop <= start:
+            return []
+
+        cols = {name: array[start:stop].tolist() for name, array in self._data.items()}
+        routes = self._route[start:stop].tolist()
+        vehicles = []
+
+        for i, vehicle_id in enumerate(self.ids[start:stop]):
+            edge_id = edge_ids[cols['edge'][i]]
+            vehicle = {
+                'id': vehicle_id,
+                'type': VEHICLE_TYPES[cols['type'][i]],
+                'position': {'lat': cols['lat'][i], 'lng': cols['lng'][i]},
+                'speed': cols['speed'][i],
+                'lane': f'{edge_id}_lane_{cols["lane"][i]}',
+                'route': [edge_ids[e] for e in routes[i][:cols['route_len'][i]]],
+                'color': VEHICLE_PALETTE[cols['color'][i]],
+                'heading': cols['heading'][i],
+                'edge': edge_id,
+                'progress': cols['progress'][i],
+                'direction': cols['direction'][i],
+                'distanceTraveled': cols['distance'][i],
+                'createdAt': cols['created_at'][i]
+            }
+
+            subtype = cols['subtype'][i]
+            if subtype >= 0:
+                vehicle['subtype'] = EMERGENCY_SUBTYPES[subtype]
+                vehicle['sirenActive'] = True
+                vehicle['priority'] = 'highest'
+
+            vehicles.append(vehicle)
+
+        return vehicles
+
+
+class VehicleListView:
+    """
+    Read-only sequence over a VehicleArrays table.
+    len() is O(1); items are materialized on access.
+    """
+
+    def __init__(self, arrays: VehicleArrays, edge_ids: List[str]):
+        self._arrays = arrays
+        self._edge_ids = edge_ids
+
+    def __len__(self) -> int:
+        return self._arrays.size
+
+    def __bool__(self) -> bool:
+        return self._arrays.size > 0
+
+    def __iter__(self):
+        return iter(self._arrays.to_dicts(self._edge_ids))
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._arrays.size)
+            return self._arrays.to_dicts(self._edge_ids, start, stop)[::step]
+
+        size = self._arrays.size
+        if item < 0:
+            item += size
+        if not 0 <= item < size:
+            raise IndexError('vehicle index out of range')
+        return self._arrays.to_dict(item, self._edge_ids)
+
+    def clear(self):
+        """Remove all vehicles"""
+        self._arrays.clear()
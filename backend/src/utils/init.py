@@ -5,5 +5,7 @@ Utilities package
 from .mock_data import MockDataGenerator
 from .constants import TrafficConstants
 from .helpers import format_timestamp, calculate_distance, validate_coordinates
+from .scheduler import FixedRateTicker
 
-__all__ = ['MockDataGenerator', 'TrafficConstants', 'format_timestamp', 'calculate_distance', 'validate_coordinates']
\ No newline at end of file
+__all__ = ['MockDataGenerator', 'TrafficConstants', 'format_timestamp', 'calculate_distance', 'validate_coordinates',
+           'FixedRateTicker']
\ No newline at end of file
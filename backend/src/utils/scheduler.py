@@ -0,0 +1,105 @@
+"""
+Drift-free fixed-rate tick scheduling
+"""
+import time
+from typing import Dict, List, Any, Callable
+
+
+class FixedRateTicker:
+    """
+    Fixed-rate scheduler on the monotonic clock.
+
+    Tick n is due at start + phase + n * period, so time spent working between
+    ticks never accumulates as drift. Named channels fire every k-th base
+    tick (e.g. 10 Hz base with 5 Hz and 0.5 Hz channels).
+
+    A tick that starts more than `late_tolerance` after its deadline counts
+    as late; whole periods that passed while overrunning are skipped rather
+    than burst through, and counted as skipped ticks.
+    """
+
+    def __init__(self, period: float, phase: float = 0.0, late_tolerance: float = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        if period <= 0:
+            raise ValueError('period must be positive')
+
+        self.period = period
+        self.phase = phase
+        self.late_tolerance = period * 0.1 if late_tolerance is None else late_tolerance
+        self._clock = clock
+        self._sleep = sleep
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        self.reset()
+
+    def add_channel(self, name: str, rate_hz: float) -> int:
+        """Register a channel firing at `rate_hz` (rounded to a divisor of the base rate); returns its divider"""
+        every = max(1, int(round(1.0 / (rate_hz * self.period))))
+        self.channels[name] = {'every': every, 'next_tick': self.tick, 'fired': 0, 'missed': 0}
+        return every
+
+    def reset(self):
+        """Re-anchor the schedule at the current time and clear the counters"""
+        self.ticks = 0
+        self.late_ticks = 0
+        self.skipped_ticks = 0
+        self.max_lateness = 0.0
+        self.last_lateness = 0.0
+        self.resync()
+
+    def resync(self):
+        """Re-anchor the schedule at the current time (e.g. after a pause), keeping the counters"""
+        self.start = self._clock() + self.phase
+        self.tick = 0
+        for channel in self.channels.values():
+            channel['next_tick'] = 0
+
+    def wait(self) -> List[str]:
+        """
+        Sleep until the next tick's deadline and return the channels due on it.
+        Call once per loop iteration, before doing the tick's work.
+        """
+        deadline = self.start + self.tick * self.period
+        now = self._clock()
+        if now < deadline:
+            self._sleep(deadline - now)
+            now = self._clock()
+
+        lateness = now - deadline
+        self.last_lateness = lateness
+        if lateness > self.late_tolerance:
+            self.late_ticks += 1
+            self.max_lateness = max(self.max_lateness, lateness)
+
+            # Jump to the latest deadline already passed; the ones in between are skipped
+            missed = int(lateness / self.period)
+            if missed:
+                self.skipped_ticks += missed
+                self.tick += missed
+
+        due = []
+        for name, channel in self.channels.items():
+            if self.tick >= channel['next_tick']:
+                every = channel['every']
+                channel['missed'] += (self.tick - channel['next_tick']) // every
+                channel['next_tick'] = (self.tick // every + 1) * every
+                channel['fired'] += 1
+                due.append(name)
+
+        self.tick += 1
+        self.ticks += 1
+        return due
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Scheduler counters for status reporting"""
+        return {
+            'period': self.period,
+            'ticks': self.ticks,
+            'late_ticks': self.late_ticks,
+            'skipped_ticks': self.skipped_ticks,
+            'max_lateness': round(self.max_lateness, 6),
+            'last_lateness': round(self.last_lateness, 6),
+            'channels': {
+                name: {'every': c['every'], 'fired': c['fired'], 'missed': c['missed']}
+                for name, c in self.channels.items()
+            }
+        }
@@ -0,0 +1,147 @@
+"""
+asyncio (ASGI) Socket.IO runtime
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import flask
+import socketio
+from asgiref.wsgi import WsgiToAsgi
+
+
+def _client_manager(message_queue: Optional[str]):
+    """asyncio client manager for a message queue URL (None: single process)"""
+    if not message_queue:
+        return None
+    if message_queue.startswith(('redis://', 'rediss://', 'unix://')):
+        return socketio.AsyncRedisManager(message_queue)
+    if message_queue.startswith(('amqp://', 'amqps://')):
+        return socketio.AsyncAioPikaManager(message_queue)
+    raise ValueError(f"Unsupported message queue for asyncio mode: {message_queue}")
+
+
+class _LoopServer:
+    """
+    Thread-side view of the AsyncServer: room changes and disconnects are
+    scheduled on the event loop, everything else is read through.
+    """
+
+    def __init__(self, runtime: 'AsyncSocketIO'):
+        self._runtime = runtime
+
+    def enter_room(self, sid, room, namespace=None):
+        self._runtime.call_soon(self._runtime.async_server.enter_room(sid, room, namespace=namespace))
+
+    def leave_room(self, sid, room, namespace=None):
+        self._runtime.call_soon(self._runtime.async_server.leave_room(sid, room, namespace=namespace))
+
+    def disconnect(self, sid, namespace=None):
+        self._runtime.call_soon(self._runtime.async_server.disconnect(sid, namespace=namespace))
+
+    def __getattr__(self, name):
+        return getattr(self._runtime.async_server, name)
+
+
+class AsyncSocketIO:
+    """
+    Flask-SocketIO compatible front for a python-socketio AsyncServer, so
+    SimulationStream and WebSocketManager run unchanged on an asyncio loop.
+
+    The loop only does socket I/O. Event handlers run on a bounded pool of
+    handler threads (inside a Flask request context, like Flask-SocketIO);
+    each client's events run one at a time and in order, so a slow command
+    only holds up the client that sent it. The stream steps and encodes
+    frames on its own threads, and the emits they make are handed to the
+    loop in order.
+    """
+
+    def __init__(self, app: flask.Flask, cors_allowed_origins=None, message_queue: str = None, json=None,
+                 handler_workers: int = 8):
+        self.app = app
+        # always_connect: the connect handler emits its welcome/status events
+        self.async_server = socketio.AsyncServer(async_mode='asgi',
+                                                 cors_allowed_origins=cors_allowed_origins,
+                                                 client_manager=_client_manager(message_queue),
+                                                 json=json,
+                                                 always_connect=True)
+        self.server = _LoopServer(self)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.handler_executor = ThreadPoolExecutor(max_workers=max(1, handler_workers),
+                                                   thread_name_prefix='socketio-handlers')
+        self._client_locks = {}  # sid -> asyncio.Lock, serializes each client's events (loop only)
+
+        # REST routes stay on Flask, run by asgiref's thread pool
+        self.asgi_app = socketio.ASGIApp(self.async_server,
+                                         other_asgi_app=WsgiToAsgi(app),
+                                         on_startup=self._on_startup,
+                                         on_shutdown=self._on_shutdown)
+        app.extensions['socketio'] = self
+
+    async def _on_startup(self):
+        self.loop = asyncio.get_running_loop()
+        print("⚡ Socket.IO running on asyncio")
+
+    def _on_shutdown(self):
+        self.handler_executor.shutdown(wait=False)
+
+    def call_soon(self, coro):
+        """Run a server coroutine on the event loop, from any thread"""
+        if self.loop is None:
+            coro.close()  # not serving yet: there is nobody to deliver to
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.loop.create_task(coro)
+        else:
+            asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def on(self, message: str, namespace: str = '/'):
+        """Register a Flask-SocketIO style handler (request.sid, emit())"""
+        def decorator(handler):
+            async def dispatch(sid, *args):
+                # Look the connection up on the loop: by the time the handler thread
+                # runs a disconnect handler, the server may have forgotten it
+                environ = args[0] if message == 'connect' else self.async_server.get_environ(sid, namespace=namespace)
+                if not environ:
+                    return None
+                if message == 'connect':
+                    args = args[1:]
+                lock = self._client_locks.setdefault(sid, asyncio.Lock())
+                try:
+                    async with lock:
+                        return await asyncio.get_running_loop().run_in_executor(
+                            self.handler_executor, self._handle_event, handler, message, namespace, sid, environ, *args)
+                finally:
+                    if message == 'disconnect' and not lock.locked():
+                        self._client_locks.pop(sid, None)
+
+            self.async_server.on(message, dispatch, namespace=namespace)
+            return handler
+        return decorator
+
+    def _handle_event(self, handler, message, namespace, sid, environ, *args):
+        """Call a handler inside a request context for the client's connection"""
+        environ.setdefault('wsgi.url_scheme', 'http')
+
+        with self.app.request_context(environ):
+            flask.request.sid = sid
+            flask.request.namespace = namespace
+            if message == 'connect':
+                return handler(args[0] if args else None)
+            if message == 'disconnect':
+                return handler()
+            return handler(*args)
+
+    def emit(self, event: str, *args, to=None, room=None, namespace: str = '/', skip_sid=None,
+             include_self: bool = True, callback=None, ignore_queue: bool = False, **kwargs):
+        """Emit from any thread (same arguments as Flask-SocketIO's emit)"""
+        to = to or room
+        if not include_self and to is None and flask.has_request_context():
+            skip_sid = flask.request.sid
+        data = args[0] if len(args) == 1 else (args or None)
+        self.call_soon(self.async_server.emit(event, data, to=to, skip_sid=skip_sid, namespace=namespace,
+                                              callback=callback, ignore_queue=ignore_queue))
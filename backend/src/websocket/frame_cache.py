@@ -0,0 +1,108 @@
+"""
+Serialize-once payload cache for stream frames
+"""
+import json
+import re
+import secrets
+from datetime import datetime
+from typing import Dict, Any, Callable, Optional
+
+
+class PreEncoded:
+    """JSON text that FrameJSON splices verbatim into outgoing packets"""
+
+    __slots__ = ('text',)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+
+class FrameJSON:
+    """
+    json module for the Socket.IO server (``SocketIO(json=FrameJSON)``).
+    Behaves like the stdlib module, except that PreEncoded values anywhere
+    in the data are emitted as their stored text instead of re-serialized.
+    """
+
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        while True:
+            # Placeholders carry a random per-call marker; if a data string happens
+            # to contain it, the counts disagree and the call retries with another
+            marker = secrets.token_hex(8)
+            raw = []
+
+            def default(value):
+                if isinstance(value, PreEncoded):
+                    raw.append(value.text)
+                    return f'{marker}{len(raw) - 1}'
+                raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+            text = json.dumps(obj, default=default, **kwargs)
+            if not raw:
+                return text
+            if text.count(marker) == len(raw):
+                break
+
+        parts = re.split(f'"{marker}(\\d+)"', text)
+        # split() alternates text and captured indices: text, index, text, ...
+        parts[1::2] = [raw[int(index)] for index in parts[1::2]]
+        return ''.join(parts)
+
+    @staticmethod
+    def loads(*args, **kwargs):
+        return json.loads(*args, **kwargs)
+
+
+def pre_encode(obj) -> PreEncoded:
+    """Serialize `obj` once (compact separators, as Socket.IO packets use)"""
+    return PreEncoded(FrameJSON.dumps(obj, separators=(',', ':')))
+
+
+class FrameCache:
+    """
+    Encoded payloads of one published frame (a SimulationFrame). Each payload
+    (and each large field shared between payloads, such as the vehicle list)
+    is serialized the first time it is asked for and reused for every room
+    and recipient. The frame's vehicle dicts are only touched by payloads
+    that carry them.
+    """
+
+    def __init__(self, frame, timestamp: Optional[str] = None, seq: int = 0):
+        self.frame = frame
+        self.timestamp = timestamp or datetime.utcnow().isoformat()
+        self.seq = seq  # vehicle sequence number the frame's payloads carry
+        self._payloads: Dict[str, PreEncoded] = {}
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """The frame in the simulation data layout, vehicle dicts included"""
+        return self.frame.data
+
+    @property
+    def fields(self) -> Dict[str, Any]:
+        """The frame's simulation fields other than the vehicles"""
+        return self.frame.fields
+
+    def payload(self, key: str, build: Callable[[], Any]) -> PreEncoded:
+        """Encoded payload `key`, built and serialized on first use"""
+        encoded = self._payloads.get(key)
+        if encoded is None:
+            encoded = self._payloads[key] = pre_encode(build())
+        return encoded
+
+    def get(self, key: str) -> Optional[PreEncoded]:
+        """Encoded payload `key` if it was already built"""
+        return self._payloads.get(key)
+
+    def put(self, key: str, encoded: PreEncoded):
+        """Store a payload encoded elsewhere"""
+        self._payloads[key] = encoded
+
+    def field(self, name: str) -> PreEncoded:
+        """Encoded top-level field of the frame data"""
+        return self.payload('field:' + name,
+                            lambda: self.frame.vehicles if name == 'vehicles' else self.frame.fields[name])
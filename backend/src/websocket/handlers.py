@@ -1,16 +1,24 @@
 """
 WebSocket event handlers
 """
+import os
 import time
 from flask import request
-from flask_socketio import emit, join_room, leave_room
+from flask_socketio import emit
+
+from config import Config
+from simulation.trace_replay import TraceReplaySource
+from .simulation_stream import STREAM_EVENTS
+
+# Subscriptions that switch how vehicles are encoded for the client
+VEHICLE_ENCODING_SUBSCRIPTIONS = {'vehicle_delta': 'delta', 'vehicle_binary': 'binary'}
 
 class WebSocketManager:
     """Manages WebSocket connections and events"""
     
     def __init__(self, socketio, simulator, simulation_stream):
         self.socketio = socketio
-        self.simulator = simulator
+        self.live_simulator = simulator
         self.simulation_stream = simulation_stream
         self.connected_clients = set()
         self.client_info = {}  # Store additional client info
@@ -18,11 +26,16 @@ class WebSocketManager:
         # Register event handlers
         self._register_handlers()
     
+    @property
+    def simulator(self):
+        """Active frame source: the live simulator or a trace being replayed"""
+        return self.simulation_stream.simulator
+    
     def _register_handlers(self):
         """Register all WebSocket event handlers"""
         @self.socketio.on('connect')
-        def handle_connect():
-            self.on_connect()
+        def handle_connect(auth=None):
+            self.on_connect(auth)
         
         @self.socketio.on('disconnect')
         def handle_disconnect():
@@ -47,9 +60,21 @@ class WebSocketManager:
         @self.socketio.on('unsubscribe')
         def handle_unsubscribe(data):
             self.on_unsubscribe(data)
+        
+        @self.socketio.on('set_viewport')
+        def handle_set_viewport(data):
+            self.on_set_viewport(data)
+        
+        @self.socketio.on('set_detail')
+        def handle_set_detail(data):
+            self.on_set_detail(data)
+        
+        @self.socketio.on('resume')
+        def handle_resume(data):
+            self.on_resume(data)
     
-    def on_connect(self):
-        """Handle new client connection"""
+    def on_connect(self, auth=None):
+        """Handle new client connection (auth may carry last_seq/stream_id to resume)"""
         client_id = request.sid
         self.connected_clients.add(client_id)
         
@@ -61,15 +86,25 @@ class WebSocketManager:
             'ip': request.remote_addr
         }
         
+        # Receives every stream event, with full vehicle lists, until it subscribes
+        self.simulation_stream.register_client(client_id, {'ip': request.remote_addr})
+        
         print(f"✅ Client connected: {client_id}")
         
         # Send welcome message
         emit('connect', {
             'message': 'Connected to Urban Flow WebSocket API',
             'client_id': client_id,
+            'stream_id': self.simulation_stream.stream_id,
             'timestamp': time.time()
         })
         
+        if self.simulation_stream.relay_only:
+            # Status and frames come from the simulator process through the message queue
+            if auth and auth.get('last_seq') is not None:
+                self._resume(auth)
+            return
+        
         # Send current simulation status
         emit('simulation_status', {
             'status': 'running' if self.simulator.is_running else 'stopped',
@@ -78,10 +113,14 @@ class WebSocketManager:
             'simulation_time': self.simulator.simulation_time
         })
         
+        # A reconnecting client catches up from its last seq instead of a full update
+        if auth and auth.get('last_seq') is not None:
+            self._resume(auth)
+            return
+        
         # If simulation is running, send current data
         if self.simulator.is_running and not self.simulator.is_paused:
-            data = self.simulator.get_simulation_data()
-            emit('simulation_update', data)
+            emit('simulation_update', self.simulation_stream.initial_update())
     
     def on_disconnect(self):
         """Handle client disconnection"""
@@ -93,6 +132,8 @@ class WebSocketManager:
         if client_id in self.client_info:
             del self.client_info[client_id]
         
+        self.simulation_stream.unregister_client(client_id)
+        
         print(f"❌ Client disconnected: {client_id}")
     
     def on_command(self, data):
@@ -103,6 +144,9 @@ class WebSocketManager:
             emit('error', {'message': 'Client not connected'})
             return
         
+        if self._rejected_on_worker('Commands'):
+            return
+        
         command = data.get('command')
         
         if not command:
@@ -111,10 +155,15 @@ class WebSocketManager:
         
         print(f"📨 Command from {client_id}: {command}")
         
+        # Mutations are queued and applied by the stepper at the next tick boundary
+        run = self.simulation_stream.run_command
+        
         try:
             if command == 'start':
                 scenario_id = data.get('scenario_id', 'default')
-                success = self.simulator.start_simulation(scenario_id)
+                if self._rejected_while_replaying('Starting a scenario') or not self._valid_scenario_id(scenario_id):
+                    return
+                success = run(self.simulator.start_simulation, scenario_id)
                 
                 if success:
                     # Start streaming if not already
@@ -137,7 +186,7 @@ class WebSocketManager:
                     emit('error', {'message': 'Failed to start simulation'})
             
             elif command == 'pause':
-                success = self.simulator.pause_simulation()
+                success = run(self.simulator.pause_simulation)
                 
                 if success:
                     emit('simulation_status', {
@@ -148,7 +197,7 @@ class WebSocketManager:
                     emit('error', {'message': 'Failed to pause simulation'})
             
             elif command == 'resume':
-                success = self.simulator.resume_simulation()
+                success = run(self.simulator.resume_simulation)
                 
                 if success:
                     emit('simulation_status', {
@@ -159,7 +208,7 @@ class WebSocketManager:
                     emit('error', {'message': 'Failed to resume simulation'})
             
             elif command == 'stop':
-                success = self.simulator.stop_simulation()
+                success = run(self.simulator.stop_simulation)
                 
                 if success:
                     emit('simulation_status', {
@@ -171,8 +220,7 @@ class WebSocketManager:
             
             elif command == 'reset':
                 # Stop and reset
-                self.simulator.stop_simulation()
-                self.simulator.simulation_time = 0
+                run(self._reset_simulation)
                 
                 emit('simulation_status', {
                     'status': 'stopped',
@@ -181,14 +229,64 @@ class WebSocketManager:
                 })
             
             elif command == 'speed':
-                speed = data.get('speed', 1.0)
-                # Note: In mock simulator, speed control would be implemented
-                emit('notification', {
+                speed = run(self.simulator.set_speed, data.get('speed', 1.0))
+                label = 'max' if speed == 'max' else f'{speed}x'
+                
+                # Broadcast so every client's speed display stays in sync
+                self.socketio.emit('notification', {
                     'type': 'info',
-                    'message': f'Simulation speed set to {speed}x',
+                    'message': f'Simulation speed set to {label}',
+                    'speed': speed,
                     'timestamp': time.time()
                 })
             
+            elif command == 'replay':
+                # Stream a recorded trace instead of the live simulation
+                trace = os.path.basename(str(data.get('trace', '')))
+                directory = os.path.join(Config.SIMULATION_TRACE_DIR, trace)
+                
+                if not trace or not os.path.isdir(directory):
+                    emit('error', {'message': f'Trace not found: {trace}'})
+                    return
+                
+                # Positioned and started before the stepper can see it, so nothing races
+                source = TraceReplaySource(directory)
+                if 'time' in data:
+                    source.seek(float(data['time']))
+                source.start_simulation()
+                self.simulation_stream.set_source(source)
+                
+                if not self.simulation_stream.streaming:
+                    self.simulation_stream.start_streaming()
+                
+                self.socketio.emit('simulation_status', {
+                    'status': 'running',
+                    'scenario': source.current_scenario,
+                    'replay': source.get_replay_status(),
+                    'message': f'Replaying trace: {trace}'
+                })
+            
+            elif command == 'seek':
+                if not self.simulation_stream.replaying:
+                    emit('error', {'message': 'Seek is only available while replaying a trace'})
+                    return
+                
+                run(self.simulator.seek, float(data.get('time', 0)))
+                self.simulation_stream.send_immediate_update()
+                self.socketio.emit('replay_position', self.simulator.get_replay_status())
+            
+            elif command == 'live':
+                # Leave replay mode and stream the live simulation again
+                self.simulation_stream.set_source(None)
+                
+                self.socketio.emit('simulation_status', {
+                    'status': 'running' if self.simulator.is_running else 'stopped',
+                    'is_paused': self.simulator.is_paused,
+                    'current_scenario': self.simulator.current_scenario,
+                    'simulation_time': self.simulator.simulation_time,
+                    'message': 'Streaming live simulation'
+                })
+            
             elif command == 'get_status':
                 # Send current status
                 emit('simulation_status', {
@@ -196,7 +294,7 @@ class WebSocketManager:
                     'is_paused': self.simulator.is_paused,
                     'current_scenario': self.simulator.current_scenario,
                     'simulation_time': self.simulator.simulation_time,
-                    'vehicle_count': len(self.simulator.vehicles),
+                    'vehicle_count': self.simulation_stream.current_frame().vehicle_count,
                     'timestamp': time.time()
                 })
             
@@ -216,9 +314,12 @@ class WebSocketManager:
             emit('error', {'message': 'Client not connected'})
             return
         
+        if self._rejected_on_worker('Emergency vehicles') or self._rejected_while_replaying('Emergency vehicles'):
+            return
+        
         try:
-            # Add emergency vehicle to simulation
-            vehicle = self.simulator.add_emergency_vehicle()
+            # Add emergency vehicle to simulation (at the next tick boundary)
+            vehicle = self.simulation_stream.run_command(self.simulator.add_emergency_vehicle)
             
             if vehicle:
                 # Send notification
@@ -252,20 +353,23 @@ class WebSocketManager:
             emit('error', {'message': 'Client not connected'})
             return
         
+        if self._rejected_on_worker('Scenario changes') or self._rejected_while_replaying('Scenario changes'):
+            return
+        
         scenario_id = data.get('scenario_id')
         
         if not scenario_id:
             emit('error', {'message': 'No scenario_id specified'})
             return
         
+        if not self._valid_scenario_id(scenario_id):
+            return
+        
         try:
             # Check if simulation is running
             if self.simulator.is_running:
-                # Stop current simulation
-                self.simulator.stop_simulation()
-                
-                # Start new simulation with requested scenario
-                success = self.simulator.start_simulation(scenario_id)
+                # Stop current simulation and start the requested scenario in one tick boundary
+                success = self.simulation_stream.run_command(self._switch_scenario, scenario_id)
                 
                 if success:
                     emit('simulation_status', {
@@ -309,15 +413,26 @@ class WebSocketManager:
             emit('error', {'message': 'No event_type specified'})
             return
         
+        if event_type not in STREAM_EVENTS and event_type not in VEHICLE_ENCODING_SUBSCRIPTIONS:
+            emit('error', {'message': f'Unknown event_type: {event_type}'})
+            return
+        
         # Add subscription
         if client_id in self.client_info:
             self.client_info[client_id]['subscriptions'].add(event_type)
         
+        if event_type in STREAM_EVENTS:
+            self.simulation_stream.subscribe(client_id, event_type)
+        
         emit('subscription_update', {
             'event_type': event_type,
             'subscribed': True,
+            'events': sorted(self.simulation_stream.subscriptions.get(client_id, ())),
             'message': f'Subscribed to {event_type} events'
         })
+        
+        if event_type in VEHICLE_ENCODING_SUBSCRIPTIONS:
+            self._set_vehicle_encoding(VEHICLE_ENCODING_SUBSCRIPTIONS[event_type])
     
     def on_unsubscribe(self, data):
         """Handle unsubscription from events"""
@@ -337,12 +452,136 @@ class WebSocketManager:
         if client_id in self.client_info and event_type in self.client_info[client_id]['subscriptions']:
             self.client_info[client_id]['subscriptions'].remove(event_type)
         
+        if (event_type in VEHICLE_ENCODING_SUBSCRIPTIONS and
+                self.simulation_stream.get_vehicle_encoding(client_id) == VEHICLE_ENCODING_SUBSCRIPTIONS[event_type]):
+            self._set_vehicle_encoding('full')
+        elif event_type in STREAM_EVENTS:
+            self.simulation_stream.unsubscribe(client_id, event_type)
+        
         emit('subscription_update', {
             'event_type': event_type,
             'subscribed': False,
+            'events': sorted(self.simulation_stream.subscriptions.get(client_id, ())),
             'message': f'Unsubscribed from {event_type} events'
         })
     
+    def on_set_viewport(self, data):
+        """Handle a map viewport change: vehicles are then limited to the visible area"""
+        client_id = request.sid
+        
+        if client_id not in self.connected_clients:
+            emit('error', {'message': 'Client not connected'})
+            return
+        
+        if self.simulation_stream.relay_only:
+            # No per-viewport rooms reach workers (see Config.VIEWPORT_TILE_SIZE): keep the
+            # client's current encoding for the whole network and tell it so
+            emit('viewport_update', {
+                'viewport': None,
+                'encoding': self.simulation_stream.get_vehicle_encoding(client_id),
+                'message': 'Viewport filtering is not available on this server; vehicles cover the whole network',
+                'timestamp': time.time()
+            })
+            return
+        
+        # A null/empty viewport goes back to the whole network
+        bbox = (data or {}).get('viewport')
+        
+        try:
+            viewport = self.simulation_stream.set_viewport(client_id, bbox or None)
+        except (KeyError, TypeError, ValueError):
+            emit('error', {'message': 'viewport needs min_lat, min_lng, max_lat and max_lng'})
+            return
+        
+        emit('viewport_update', {
+            'viewport': viewport,
+            'timestamp': time.time()
+        })
+    
+    def on_set_detail(self, data):
+        """Handle a map zoom change: zoomed-out clients get density grids instead of vehicles"""
+        client_id = request.sid
+        
+        if client_id not in self.connected_clients:
+            emit('error', {'message': 'Client not connected'})
+            return
+        
+        zoom = (data or {}).get('zoom')
+        
+        try:
+            bins = self.simulation_stream.set_detail(client_id, zoom)
+        except (TypeError, ValueError):
+            emit('error', {'message': f'Invalid zoom: {zoom}'})
+            return
+        
+        emit('detail_update', {
+            'zoom': zoom,
+            'mode': 'vehicles' if bins is None else 'density',
+            'bins': bins,
+            'timestamp': time.time()
+        })
+    
+    def on_resume(self, data):
+        """Handle a resume request from a client that reconnected without auth data"""
+        if request.sid not in self.connected_clients:
+            emit('error', {'message': 'Client not connected'})
+            return
+        
+        self._resume(data or {})
+    
+    def _resume(self, data):
+        """Resume the requesting client's vehicle deltas after data['last_seq']"""
+        try:
+            last_seq = int(data.get('last_seq'))
+        except (TypeError, ValueError):
+            emit('error', {'message': 'resume needs an integer last_seq'})
+            return
+        
+        client_id = request.sid
+        if client_id in self.client_info:
+            self.client_info[client_id]['subscriptions'].add('vehicle_delta')
+        
+        status = self.simulation_stream.resume_client(client_id, last_seq, data.get('stream_id'))
+        emit('resume_status', {**status, 'timestamp': time.time()})
+    
+    def _reset_simulation(self):
+        """Stop the simulation and rewind it (queued command)"""
+        self.simulator.stop_simulation()
+        self.simulator.simulation_time = 0
+    
+    def _switch_scenario(self, scenario_id: str) -> bool:
+        """Restart the simulation on another scenario (queued command)"""
+        self.simulator.stop_simulation()
+        return self.simulator.start_simulation(scenario_id)
+    
+    def _valid_scenario_id(self, scenario_id) -> bool:
+        """Reject scenario ids that are not printable strings (they are echoed into every frame)"""
+        if isinstance(scenario_id, str) and scenario_id.isprintable() and len(scenario_id) <= 64:
+            return True
+        
+        emit('error', {'message': 'scenario_id must be a printable string of at most 64 characters'})
+        return False
+    
+    def _rejected_on_worker(self, action: str) -> bool:
+        """Reject requests that need the simulation when this process is a stream worker"""
+        if not self.simulation_stream.relay_only:
+            return False
+        
+        emit('error', {'message': f'{action} must be sent to the simulation server; this process only streams'})
+        return True
+    
+    def _rejected_while_replaying(self, action: str) -> bool:
+        """Reject live-simulation requests while a recorded trace is being streamed"""
+        if not self.simulation_stream.replaying:
+            return False
+        
+        emit('error', {'message': f"{action} is not available while replaying a trace; send the 'live' command first"})
+        return True
+    
+    def _set_vehicle_encoding(self, encoding: str):
+        """Switch the requesting client's vehicle encoding (the stream sends its starting state)"""
+        self.simulation_stream.set_vehicle_encoding(request.sid, encoding)
+    
     def get_connected_clients_count(self) -> int:
         """Get number of connected clients"""
         return len(self.connected_clients)
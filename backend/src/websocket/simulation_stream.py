@@ -4,37 +4,153 @@ Real-time simulation data streaming
 import threading
 import time
 import json
+import uuid
+from collections import deque
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Set, Optional, Tuple
+import numpy as np
+
+from config import Config
+from simulation.spatial_index import SpatialGrid
+from simulation.command_queue import CommandQueue
+from simulation.frame import SimulationFrame
+from utils.scheduler import FixedRateTicker
+from .delta_encoder import VehicleDeltaEncoder
+from .binary_frames import BinaryFrameEncoder
+from .frame_cache import FrameCache, PreEncoded, pre_encode
+
+# Clients receive vehicles as full lists (legacy), as deltas or as packed binary frames
+VEHICLES_FULL_ROOM = 'vehicles_full'
+VEHICLES_DELTA_ROOM = 'vehicles_delta'
+VEHICLES_BINARY_ROOM = 'vehicles_binary'
+VEHICLE_ROOMS = {'full': VEHICLES_FULL_ROOM, 'delta': VEHICLES_DELTA_ROOM, 'binary': VEHICLES_BINARY_ROOM}
+
+# Streamed event types clients can subscribe to; a client that has not
+# subscribed to anything explicitly receives all of them
+STREAM_EVENTS = ('simulation_update', 'vehicle_update', 'traffic_light_update', 'metrics_update', 'simulation_status')
+# simulation_update carries the vehicle list only for full-encoding clients
+SIMULATION_FULL_ROOM = 'simulation_full'
+SIMULATION_COMPACT_ROOM = 'simulation_compact'
+# Viewport clients share one room (and one payload) per snapped tile range
+VIEWPORT_ROOM_PREFIX = 'viewport:'
+# Zoomed-out clients share one room per density grid resolution
+DENSITY_ROOM_PREFIX = 'density:'
+# 'simulator' publishes to every room through the message queue, 'worker' only serves clients
+STREAM_ROLES = ('standalone', 'simulator', 'worker')
+# Frame fields shared by several payloads, serialized once per frame
+SHARED_FIELDS = ('vehicles', 'traffic_lights', 'metrics')
+# Channels sent when a full update is requested (e.g. after a seek)
+FULL_PUBLISH_CHANNELS = ('simulation', 'vehicles', 'traffic_lights', 'metrics')
+# Wall seconds of max-speed stepping per hold of step_lock
+MAX_SPEED_SLICE = 0.005
+# Seconds a handler waits for the stepper to apply its command
+COMMAND_TIMEOUT = 5.0
 
 class SimulationStream:
     """
     Manages real-time streaming of simulation data via WebSocket
     """
     
-    def __init__(self, socketio, simulator):
+    def __init__(self, socketio, simulator, role: str = 'standalone'):
+        if role not in STREAM_ROLES:
+            raise ValueError(f"Unknown stream role: {role}")
+        
         self.socketio = socketio
-        self.simulator = simulator
-        self.stream_thread = None
+        self.role = role
+        # Behind a message queue the rooms' members live in other processes, so
+        # the simulator process publishes to every room; workers never publish
+        self.fanout = role == 'simulator'
+        self.relay_only = role == 'worker'
+        self.fanout_rooms = {room.strip() for room in Config.STREAM_FANOUT_ROOMS if room.strip()}
+        self.simulator = simulator  # active frame source (live simulator or trace replay)
+        self.live_simulator = simulator
+        self.step_thread = None
+        self.publish_thread = None
         self.streaming = False
-        self.update_interval = 0.1  # 100ms
-        self.last_metrics_update = 0
+        self.update_interval = 0.1  # 100ms simulation step cadence
+        self.publish_interval = 0.1  # 100ms publisher cadence
         self.metrics_interval = 2.0  # Update metrics every 2 seconds
-        self.last_vehicle_update = 0
         self.vehicle_interval = 0.5  # Update vehicles every 500ms
+        # Publisher channels and their periods (seconds)
+        self.channel_intervals = {
+            'traffic_lights': 0.1,  # changed lights only
+            'traffic_lights_full': 5.0,  # every light, for clients that missed a change
+            'simulation': 0.2,
+            'vehicles': self.vehicle_interval,
+            'metrics': self.metrics_interval,
+            'status': 5.0,
+            'idle_status': 10.0
+        }
+        if self.fanout:
+            # Delta/binary clients of workers start from the periodic keyframes
+            self.channel_intervals['keyframes'] = Config.STREAM_KEYFRAME_INTERVAL
         self.clients = {}  # Track connected clients
+        self.subscriptions: Dict[str, Set[str]] = {}  # client -> subscribed stream events
+        self.explicit_subscriptions = set()  # Clients that chose their events (no longer on the defaults)
+        self.client_rooms: Dict[str, Set[str]] = {}  # client -> rooms joined for its subscriptions
+        self.room_members: Dict[str, Set[str]] = {}  # room -> clients, to skip empty rooms
+        self._light_states = None  # light id -> (phase, state) as last sent
+        self._light_joiners = set()  # Clients owed the full light list before the next change
+        self.delta_clients = set()  # Clients that opted into vehicle deltas
+        self.delta_encoder = VehicleDeltaEncoder()
+        # Reconnecting delta clients resume from the history of recent deltas
+        self.stream_id = uuid.uuid4().hex[:12]
+        self.resume_window = Config.STREAM_RESUME_WINDOW
+        self.delta_history = deque(maxlen=max(1, int(round(self.resume_window / self.channel_intervals['simulation']))))
+        self._resume_until = 0.0
+        self._snapshot_cache = None  # (seq, encoded vehicle_snapshot)
+        self.binary_clients = set()  # Clients that opted into packed binary frames
+        self.binary_encoder = BinaryFrameEncoder()
+        self.viewports: Dict[str, Tuple[int, int, int, int]] = {}  # client -> tile range (row0, col0, row1, col1)
+        self.viewport_tile_size = Config.VIEWPORT_TILE_SIZE
+        self.density_clients: Dict[str, int] = {}  # client -> density grid cells per side
+        self.density_levels = sorted(Config.DENSITY_LEVELS)
+        
+        # Backpressure: clients whose outbound queue is too deep skip frames until it drains
+        self.max_queue_depth = Config.STREAM_MAX_QUEUE_DEPTH
+        self.laggard_timeout = Config.STREAM_LAGGARD_TIMEOUT
+        self.lagging: Dict[str, float] = {}  # client -> monotonic time it started lagging
+        self._skip_sids = []
+        self.backpressure_stats = {'dropped_frames': 0, 'resyncs': 0, 'laggard_disconnects': 0}
+        
+        # Stepper -> readers hand-off: the latest SimulationFrame, replaced (never
+        # modified) at the end of each tick that changed something
+        self.step_lock = threading.Lock()
+        self.frame: Optional[SimulationFrame] = None
+        self._frame_seq = 0
+        self._last_published = None
+        self.frame_cache = None  # FrameCache of the last published frame
+        self._full_publish = False  # set by handlers, picked up on the publisher's next tick
+        # Held by the publisher while it publishes a frame, and by handlers that read
+        # the delta/binary encoders or replay history, so a client's catch-up
+        # messages never interleave with a frame going out
+        self.publish_lock = threading.Lock()
+        self.step_ticker = None
+        self.publish_ticker = None
+        self.stepper_stats = {'steps': 0, 'last_duration': 0.0}
+        
+        # Simulator mutations from handlers, applied by the stepper between ticks
+        self.commands = CommandQueue()
+        self.publisher_stats = {'frames': 0, 'stale_ticks': 0, 'last_duration': 0.0}
         
         print("📡 Simulation stream initialized")
     
     def start_streaming(self):
-        """Start streaming simulation data"""
+        """Start the simulation stepper and the publisher threads"""
         if self.streaming:
             print("⚠️ Streaming already active")
             return
         
+        if self.relay_only:
+            print("⚠️ Stream worker: frames are published by the simulator process")
+            return
+        
         self.streaming = True
-        self.stream_thread = threading.Thread(target=self._stream_loop, daemon=True)
-        self.stream_thread.start()
+        self.step_thread = threading.Thread(target=self._step_loop, name='simulation-stepper', daemon=True)
+        self.publish_thread = threading.Thread(target=self._publish_loop, name='simulation-publisher', daemon=True)
+        self.step_thread.start()
+        self.publish_thread.start()
         
         print("🚀 Simulation stream started")
     
@@ -42,84 +158,161 @@ class SimulationStream:
         """Stop streaming simulation data"""
         self.streaming = False
         
-        if self.stream_thread and self.stream_thread.is_alive():
-            self.stream_thread.join(timeout=2.0)
+        for thread in (self.step_thread, self.publish_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=2.0)
+        
+        # Nothing steps any more: apply what the stepper left queued
+        with self.step_lock:
+            self._apply_commands_now()
         
         print("⏹️ Simulation stream stopped")
     
-    def _stream_loop(self):
-        """Main streaming loop"""
-        print("🔄 Starting simulation stream loop")
+    def set_source(self, source=None):
+        """Stream frames from `source` (e.g. a TraceReplaySource); None returns to the live simulator"""
+        with self.step_lock:
+            self.simulator = source if source is not None else self.live_simulator
+            self.frame = None  # the stepper publishes the new source's first frame
+            self._light_states = None
+        print(f"🎞️ Stream source: {'live simulator' if source is None else type(source).__name__}")
+    
+    def _capture_frame(self) -> SimulationFrame:
+        """Publish the active source's state as a new frame (stepper side, under step_lock)"""
+        self._frame_seq += 1
+        # The dict engine copies columns only for binary clients (the array engine always has them)
+        frame = SimulationFrame.capture(self.simulator, self._frame_seq,
+                                        with_columns=self._has_members(VEHICLES_BINARY_ROOM))
+        self.frame = frame
+        return frame
+    
+    def _frame_columns(self, frame: SimulationFrame) -> Optional[Dict[str, Any]]:
+        """A frame's vehicle columns, built only while binary clients need them"""
+        return frame.columns if self._has_members(VEHICLES_BINARY_ROOM) else None
+    
+    def current_frame(self) -> SimulationFrame:
+        """Latest frame; readers use it as is, without locking or copying"""
+        frame = self.frame
+        if frame is None:
+            # Nothing published yet (no stepper, or the source just changed)
+            with self.step_lock:
+                frame = self.frame or self._capture_frame()
+        return frame
+    
+    def submit_command(self, fn, *args, **kwargs) -> Future:
+        """Queue a simulator mutation for the start of the next tick"""
+        future = self.commands.submit(fn, *args, **kwargs)
+        
+        if self.step_thread is None or not self.step_thread.is_alive():
+            # No stepper to race with (or to drain the queue): apply it now
+            with self.step_lock:
+                self._apply_commands_now()
+        return future
+    
+    def _apply_commands_now(self):
+        """Apply queued commands outside the stepper and publish their frame (under step_lock)"""
+        try:
+            if self.commands.drain(settle=False):
+                self._capture_frame()
+        finally:
+            self.commands.settle()
+    
+    def run_command(self, fn, *args, **kwargs):
+        """Apply a simulator mutation at the next tick boundary and return its result"""
+        return self.submit_command(fn, *args, **kwargs).result(timeout=COMMAND_TIMEOUT)
+    
+    @property
+    def replaying(self) -> bool:
+        return self.simulator is not self.live_simulator
+    
+    def _step_loop(self):
+        """Simulation stepper: advances the active source at its own fixed rate"""
+        print("🔄 Starting simulation stepper loop")
+        ticker = self.step_ticker = FixedRateTicker(self.update_interval)
+        last_step = time.monotonic()
+        next_capture = last_step  # max speed: frames are captured at the normal tick rate
+        dirty = False  # steps run since the last captured frame
         
         while self.streaming:
             try:
-                current_time = time.time()
+                simulator = self.simulator
+                max_speed = simulator.clock.max_speed and simulator.is_running and not simulator.is_paused
+                if max_speed:
+                    # Step in short slices and yield between them, so handlers, REST
+                    # routes and the publisher get the lock and the GIL in between
+                    time.sleep(0)
+                    ticker.resync()
+                else:
+                    ticker.wait()
                 
-                # Check if simulation is running and not paused
-                if self.simulator.is_running and not self.simulator.is_paused:
-                    # Update simulation
-                    self.simulator.update_simulation(self.update_interval)
-                    
-                    # Get simulation data
-                    simulation_data = self.simulator.get_simulation_data()
-                    
-                    # Send full simulation update (less frequent)
-                    if int(current_time * 10) % 2 == 0:  # Every 200ms
-                        self.socketio.emit('simulation_update', simulation_data)
-                    
-                    # Send vehicle updates (more frequent)
-                    if current_time - self.last_vehicle_update >= self.vehicle_interval:
-                        vehicle_data = {
-                            'vehicles': simulation_data['vehicles'],
-                            'count': len(simulation_data['vehicles']),
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                        self.socketio.emit('vehicle_update', vehicle_data)
-                        self.last_vehicle_update = current_time
-                    
-                    # Send traffic light updates
-                    traffic_light_data = {
-                        'traffic_lights': simulation_data['traffic_lights'],
-                        'timestamp': datetime.utcnow().isoformat()
-                    }
-                    self.socketio.emit('traffic_light_update', traffic_light_data)
-                    
-                    # Send metrics updates (less frequent)
-                    if current_time - self.last_metrics_update >= self.metrics_interval:
-                        metrics_data = {
-                            'metrics': simulation_data['metrics'],
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                        self.socketio.emit('metrics_update', metrics_data)
-                        self.last_metrics_update = current_time
-                    
-                    # Send simulation status periodically
-                    if int(current_time) % 5 == 0:  # Every 5 seconds
-                        status_data = {
-                            'status': 'running',
-                            'is_paused': False,
-                            'current_scenario': self.simulator.current_scenario,
-                            'simulation_time': self.simulator.simulation_time,
-                            'vehicle_count': len(self.simulator.vehicles),
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                        self.socketio.emit('simulation_status', status_data)
+                now = time.monotonic()
+                elapsed, last_step = now - last_step, now
                 
-                else:
-                    # Simulation is stopped or paused
-                    if int(current_time) % 10 == 0:  # Every 10 seconds
-                        status = 'paused' if self.simulator.is_paused else 'stopped'
-                        status_data = {
-                            'status': status,
-                            'is_paused': self.simulator.is_paused,
-                            'current_scenario': self.simulator.current_scenario,
-                            'simulation_time': self.simulator.simulation_time,
-                            'timestamp': datetime.utcnow().isoformat()
-                        }
-                        self.socketio.emit('simulation_status', status_data)
+                with self.step_lock:
+                    try:
+                        # Queued commands run here, never while a tick advances or is captured
+                        applied = self.commands.drain(settle=False)
+                        
+                        simulator = self.simulator
+                        if simulator.is_running and not simulator.is_paused:
+                            # Advance simulated time by what this tick owes (time-warp aware)
+                            steps = simulator.advance(MAX_SPEED_SLICE if max_speed else elapsed)
+                            self.stepper_stats['steps'] += steps
+                            dirty = dirty or steps > 0
+                        
+                        if applied or self.frame is None or (dirty and (not max_speed or now >= next_capture)):
+                            self._capture_frame()
+                            dirty = False
+                            next_capture = now + self.update_interval
+                    finally:
+                        # Callers waiting on a command resume once a frame including it is published
+                        self.commands.settle()
+                
+                self.stepper_stats['last_duration'] = time.monotonic() - now
+            
+            except Exception as e:
+                print(f"❌ Error in simulation stepper: {e}")
+                self.socketio.emit('error', {
+                    'message': f'Simulation error: {str(e)}',
+                    'timestamp': datetime.utcnow().isoformat()
+                })
+                time.sleep(1.0)
+                ticker.resync()
+                last_step = time.monotonic()
+    
+    def _publish_loop(self):
+        """Publisher: samples the latest completed frame and emits each channel at its own rate"""
+        print("🔄 Starting simulation publisher loop")
+        # Run half a period behind the stepper so a fresh frame is usually waiting
+        ticker = self.publish_ticker = FixedRateTicker(self.publish_interval, phase=self.publish_interval / 2)
+        for channel, interval in self.channel_intervals.items():
+            ticker.add_channel(channel, 1.0 / interval)
+        pending = set()
+        
+        while self.streaming:
+            pending.update(ticker.wait())
+            started = time.monotonic()
+            try:
+                if self._full_publish:
+                    # Requested by a handler: every channel, even for an already published frame
+                    self._full_publish = False
+                    pending.update(FULL_PUBLISH_CHANNELS)
+                    self._last_published = None
                 
-                # Small sleep to prevent CPU overload
-                time.sleep(self.update_interval)
+                frame = self.frame
+                active = self.simulator.is_running and not self.simulator.is_paused
+                
+                if frame is not None and frame is not self._last_published:
+                    self._last_published = frame
+                    with self.publish_lock:
+                        self._publish_frame(frame, pending)
+                    pending.clear()
+                    self.publisher_stats['frames'] += 1
+                elif active:
+                    # Tick came around before the stepper produced a new frame
+                    self.publisher_stats['stale_ticks'] += 1
+                elif 'idle_status' in pending:
+                    self._publish_idle_status()
+                    pending.clear()
             
             except Exception as e:
                 print(f"❌ Error in stream loop: {e}")
@@ -130,43 +323,619 @@ class SimulationStream:
                 })
                 # Small delay before retry
                 time.sleep(1.0)
-    
-    def send_immediate_update(self):
-        """Send immediate update to all clients"""
-        if self.simulator.is_running:
-            simulation_data = self.simulator.get_simulation_data()
+                ticker.resync()
             
-            # Send all updates immediately
-            self.socketio.emit('simulation_update', simulation_data)
-            
-            # Send individual component updates
-            self.socketio.emit('vehicle_update', {
-                'vehicles': simulation_data['vehicles'],
-                'count': len(simulation_data['vehicles']),
-                'timestamp': datetime.utcnow().isoformat()
+            self.publisher_stats['last_duration'] = time.monotonic() - started
+    
+    def _publish_frame(self, frame: SimulationFrame, channels):
+        """
+        Emit the events of every channel due for one captured frame. Vehicle dicts
+        are only built for the full and delta streams; binary, viewport and density
+        clients are served from the frame's columns.
+        """
+        self._update_backpressure()
+        timestamp = datetime.utcnow().isoformat()
+        
+        # Encode the vehicle delta first so every payload of the frame carries its seq
+        delta = None
+        if 'simulation' in channels or 'vehicles' in channels:
+            delta = self._encode_delta(frame, timestamp)
+        
+        # Payloads are serialized once per frame and shared by every room that gets them
+        cache = self.frame_cache = FrameCache(frame, timestamp, self.delta_encoder.seq)
+        if delta is not None:
+            cache.put('vehicle_delta', delta)
+        
+        # Every event goes to its subscribers' room only; empty rooms are not serialized
+        # Full simulation update (5 Hz)
+        if 'simulation' in channels and self._has_members(SIMULATION_FULL_ROOM):
+            self._emit('simulation_update', self._simulation_payload(cache), room=SIMULATION_FULL_ROOM)
+        
+        # Vehicle updates (2 Hz)
+        if 'vehicles' in channels and self._has_members(VEHICLES_FULL_ROOM):
+            vehicle_data = cache.payload('vehicle_update', lambda: {
+                'vehicles': cache.field('vehicles'),
+                'count': frame.vehicle_count,
+                'seq': cache.seq,
+                'timestamp': timestamp
             })
-            
-            self.socketio.emit('traffic_light_update', {
-                'traffic_lights': simulation_data['traffic_lights'],
-                'timestamp': datetime.utcnow().isoformat()
+            self._emit('vehicle_update', vehicle_data, room=VEHICLES_FULL_ROOM)
+        
+        # Delta and binary clients get vehicles at the simulation_update rate
+        # and simulation updates without the vehicle list
+        if 'simulation' in channels or 'vehicles' in channels:
+            self._publish_compact(cache, 'simulation' in channels)
+        
+        # Traffic light changes (10 Hz) and full refresh (every 5 seconds)
+        if 'traffic_lights' in channels and self._has_members('traffic_light_update'):
+            self._publish_traffic_lights(cache, 'traffic_lights_full' in channels)
+        
+        # Metrics updates (0.5 Hz)
+        if 'metrics' in channels and self._has_members('metrics_update'):
+            metrics_data = cache.payload('metrics_update', lambda: {
+                'metrics': cache.field('metrics'),
+                'timestamp': timestamp
             })
+            self._emit('metrics_update', metrics_data, room='metrics_update')
+        
+        # Keyframes for delta/binary clients connected to other processes
+        if 'keyframes' in channels:
+            self._publish_keyframes()
+        
+        # Simulation status (every 5 seconds)
+        if 'status' in channels and self._has_members('simulation_status'):
+            status_data = {
+                'status': 'running',
+                'is_paused': False,
+                'current_scenario': frame.fields['scenario'],
+                'simulation_time': frame.simulation_time,
+                'vehicle_count': frame.vehicle_count,
+                'timestamp': timestamp
+            }
+            self._emit('simulation_status', status_data, room='simulation_status')
+    
+    def _publish_keyframes(self):
+        """Emit the vehicle snapshot and id dictionary that delta/binary streams can start from"""
+        if self._has_members(VEHICLES_DELTA_ROOM):
+            self._emit('vehicle_snapshot', self._vehicle_snapshot(), room=VEHICLES_DELTA_ROOM)
+        if self._has_members(VEHICLES_BINARY_ROOM):
+            self._emit('vehicle_dictionary', self.binary_encoder.dictionary(), room=VEHICLES_BINARY_ROOM)
+    
+    def _emit(self, event: str, data, room: str, skip_sids: list = None):
+        """Emit a stream event to a room, skipping clients that are behind"""
+        if self._skip_sids:
+            skipped = self.room_members.get(room, set()).intersection(self._skip_sids)
+            self.backpressure_stats['dropped_frames'] += len(skipped)
+            for client_id in skipped:
+                if client_id in self.clients:
+                    self.clients[client_id]['dropped_frames'] = self.clients[client_id].get('dropped_frames', 0) + 1
+            skip_sids = self._skip_sids + (skip_sids or [])
+        
+        if skip_sids:
+            self.socketio.emit(event, data, room=room, skip_sid=skip_sids)
+        else:
+            self.socketio.emit(event, data, room=room)
+    
+    def _publish_traffic_lights(self, cache: FrameCache, full: bool):
+        """
+        Emit the lights whose phase changed since the last update ('full': False),
+        or every light on the periodic refresh ('full': True). Clients that just
+        joined or recovered from lagging get the full list on the next update.
+        """
+        lights = cache.fields['traffic_lights']
+        states = {tl['id']: (tl.get('currentPhase'), tl.get('state')) for tl in lights}
+        previous, self._light_states = self._light_states, states
+        joiners, self._light_joiners = self._light_joiners, set()
+        
+        full_update = cache.payload('traffic_light_update', lambda: {
+            'traffic_lights': cache.field('traffic_lights'),
+            'full': True,
+            'timestamp': cache.timestamp
+        })
+        
+        if full or previous is None:
+            self._emit('traffic_light_update', full_update, room='traffic_light_update')
+            return
+        
+        joiners = [client_id for client_id in joiners if client_id in self.clients]
+        if joiners:
+            self.socketio.emit('traffic_light_update', full_update, to=joiners)
+        
+        changed = [tl for tl in lights if previous.get(tl['id']) != states[tl['id']]]
+        if changed:
+            self._emit('traffic_light_update', {
+                'traffic_lights': changed,
+                'full': False,
+                'timestamp': cache.timestamp
+            }, room='traffic_light_update', skip_sids=joiners)
+    
+    def _queue_depth(self, client_id: str) -> int:
+        """Packets waiting in a client's engine.io outbound queue (0 if not local)"""
+        server = self.socketio.server
+        try:
+            socket = server.eio.sockets.get(server.manager.eio_sid_from_sid(client_id, '/'))
+        except (AttributeError, KeyError):
+            return 0
+        return socket.queue.qsize() if socket is not None else 0
+    
+    def _update_backpressure(self):
+        """
+        Decide which clients skip this frame. A client whose queue is deeper than
+        max_queue_depth gets no new frames, so once it drains it resumes with the
+        newest one instead of working through stale positions. Delta and binary
+        clients are resynced on recovery; clients behind for longer than
+        laggard_timeout are disconnected.
+        """
+        now = time.monotonic()
+        
+        for client_id in list(self.clients):
+            depth = self._queue_depth(client_id)
+            self.clients[client_id]['queue_depth'] = depth
             
-            self.socketio.emit('metrics_update', {
-                'metrics': simulation_data['metrics'],
-                'timestamp': datetime.utcnow().isoformat()
-            })
+            if depth > self.max_queue_depth:
+                since = self.lagging.setdefault(client_id, now)
+                if now - since > self.laggard_timeout:
+                    print(f"🐢 Disconnecting lagging client: {client_id} ({depth} packets queued)")
+                    self.backpressure_stats['laggard_disconnects'] += 1
+                    self.unregister_client(client_id)
+                    # Closing the socket runs the app's disconnect handler: not on the publisher
+                    threading.Thread(target=self._disconnect_client, args=(client_id,),
+                                     name='laggard-disconnect', daemon=True).start()
+            elif client_id in self.lagging:
+                del self.lagging[client_id]
+                self._resync_client(client_id)
+        
+        self._skip_sids = list(self.lagging)
+    
+    def _disconnect_client(self, client_id: str):
+        """Close a client's connection (off the stream threads)"""
+        try:
+            self.socketio.server.disconnect(client_id, namespace='/')
+        except Exception as e:
+            print(f"❌ Error disconnecting client {client_id}: {e}")
+    
+    def _resync_client(self, client_id: str):
+        """Send a recovered client the state its vehicle encoding builds on"""
+        # Light updates it skipped may have carried changes
+        self._light_joiners.add(client_id)
+        
+        encoding = self.get_vehicle_encoding(client_id)
+        if encoding == 'delta':
+            self.socketio.emit('vehicle_snapshot', self._vehicle_snapshot(), room=client_id)
+        elif encoding == 'binary':
+            self.socketio.emit('vehicle_dictionary', self.binary_encoder.dictionary(), room=client_id)
+        else:
+            return
+        self.backpressure_stats['resyncs'] += 1
+    
+    def _simulation_payload(self, cache: FrameCache) -> PreEncoded:
+        """Encoded full simulation_update, reusing the frame's encoded shared fields"""
+        return cache.payload('simulation_update', lambda: {
+            **{key: cache.field(key) if key in SHARED_FIELDS else value for key, value in cache.fields.items()},
+            'vehicles': cache.field('vehicles'),
+            'seq': cache.seq
+        })
+    
+    def _encode_delta(self, frame: SimulationFrame, timestamp: str) -> Optional[PreEncoded]:
+        """
+        Encode the frame's vehicle delta and keep it in the resume history.
+        Runs while delta clients are connected and for resume_window seconds
+        after the last one leaves, so clients dropped by a network blip can resume.
+        """
+        now = time.monotonic()
+        if self._has_members(VEHICLES_DELTA_ROOM):
+            self._resume_until = now + self.resume_window
+        elif now >= self._resume_until:
+            return None
+        
+        delta = self.delta_encoder.encode(frame.vehicles)
+        delta['timestamp'] = timestamp
+        encoded = pre_encode(delta)
+        self.delta_history.append((delta['seq'], encoded))
+        return encoded
+    
+    def _vehicle_snapshot(self) -> PreEncoded:
+        """Encoded vehicle_snapshot, shared by every client joining before the next delta"""
+        snapshot = self.delta_encoder.snapshot()
+        cached = self._snapshot_cache
+        if cached is None or cached[0] != snapshot['seq']:
+            cached = self._snapshot_cache = (snapshot['seq'], pre_encode(snapshot))
+        return cached[1]
+    
+    def resume_client(self, client_id: str, last_seq: int, stream_id: str = None) -> Dict[str, Any]:
+        """
+        Resume a reconnecting client's vehicle deltas after `last_seq`: replay the
+        missed deltas from the history, or send the shared snapshot when the gap
+        is no longer covered (or the seq belongs to another stream instance).
+        """
+        if self.relay_only:
+            # The delta history lives in the simulator process
+            self._assign_encoding(client_id, 'delta')
+            return {'mode': 'keyframe', 'from_seq': last_seq, 'stream_id': self.stream_id}
+        
+        # No frame goes out between joining the delta room and the catch-up
+        # messages, so the live deltas continue exactly where they end
+        with self.publish_lock:
+            self._assign_encoding(client_id, 'delta')
+            history = list(self.delta_history)
+            current = self.delta_encoder.seq
+            same_stream = stream_id is None or stream_id == self.stream_id
+            if same_stream and (last_seq == current or (history and history[0][0] <= last_seq + 1 <= history[-1][0])):
+                missed = [payload for seq, payload in history if seq > last_seq]
+                for payload in missed:
+                    self.socketio.emit('vehicle_delta', payload, room=client_id)
+                return {'mode': 'deltas', 'from_seq': last_seq, 'replayed': len(missed), 'stream_id': self.stream_id}
             
-            print("📤 Sent immediate update to all clients")
+            snapshot = self._vehicle_snapshot()
+            self.socketio.emit('vehicle_snapshot', snapshot, room=client_id)
+            return {'mode': 'snapshot', 'from_seq': last_seq, 'seq': self._snapshot_cache[0], 'stream_id': self.stream_id}
+    
+    def _publish_compact(self, cache: FrameCache, with_simulation: bool = True):
+        """Emit vehicle deltas / binary frames, plus simulation_update without the vehicle list"""
+        timestamp = cache.timestamp
+        columns = self._frame_columns(cache.frame)
+        
+        delta = cache.get('vehicle_delta')
+        if delta is not None and self._has_members(VEHICLES_DELTA_ROOM):
+            self._emit('vehicle_delta', delta, room=VEHICLES_DELTA_ROOM)
+        
+        if self._has_members(VEHICLES_BINARY_ROOM) and columns is not None:
+            # Sent as a Socket.IO binary attachment
+            frame = self.binary_encoder.encode(columns)
+            frame['timestamp'] = timestamp
+            self._emit('vehicle_frame', frame, room=VEHICLES_BINARY_ROOM)
+        
+        self._publish_viewports(cache)
+        self._publish_density(cache)
+        
+        if with_simulation and self._has_members(SIMULATION_COMPACT_ROOM):
+            self._emit('simulation_update', self._without_vehicles(cache), room=SIMULATION_COMPACT_ROOM)
+    
+    def _publish_viewports(self, cache: FrameCache):
+        """
+        Emit one vehicle_update per occupied viewport tile range, filtered through a
+        spatial grid over the position columns; only visible vehicles become dicts
+        """
+        rooms = [room for room, members in list(self.room_members.items())
+                 if members and room.startswith(VIEWPORT_ROOM_PREFIX)]
+        if not rooms:
+            return
+        
+        frame = cache.frame
+        lats, lngs, _ = self._position_columns(frame)
+        grid = SpatialGrid(lats, lngs, cell_size=self.viewport_tile_size, halo=False)
+        
+        for room in rooms:
+            bbox = self._tile_bbox(self._room_tiles(room))
+            visible = frame.vehicles_at(grid.query_bbox(*bbox).tolist())
+            self._emit('vehicle_update', {
+                'vehicles': visible,
+                'count': len(visible),
+                'total_count': frame.vehicle_count,
+                'viewport': bbox,
+                'seq': self.delta_encoder.seq,
+                'timestamp': cache.timestamp
+            }, room=room)
+    
+    def _publish_density(self, cache: FrameCache):
+        """Emit one fixed-size density grid per resolution in use (vehicle counts and mean speed per cell)"""
+        if self.fanout:
+            rooms = [DENSITY_ROOM_PREFIX + str(bins) for _, bins in self.density_levels
+                     if DENSITY_ROOM_PREFIX + str(bins) in self.fanout_rooms]
+        else:
+            rooms = [room for room, members in list(self.room_members.items())
+                     if members and room.startswith(DENSITY_ROOM_PREFIX)]
+        if not rooms:
+            return
+        
+        count = cache.frame.vehicle_count
+        lats, lngs, speeds = self._position_columns(cache.frame)
+        bounds = getattr(self.simulator, 'network_bounds', None) or Config.MOCK_NETWORK_BOUNDS
+        extent = [[bounds['min_lat'], bounds['max_lat']], [bounds['min_lng'], bounds['max_lng']]]
+        
+        for room in rooms:
+            bins = int(room[len(DENSITY_ROOM_PREFIX):])
+            
+            def build():
+                # Rows run south to north, columns west to east
+                counts, _, _ = np.histogram2d(lats, lngs, bins=bins, range=extent)
+                speed_sums, _, _ = np.histogram2d(lats, lngs, bins=bins, range=extent, weights=speeds)
+                mean_speed = np.divide(speed_sums, counts, out=np.zeros_like(speed_sums), where=counts > 0)
+                inside = int(counts.sum())
+                return {
+                    'bins': bins,
+                    'bounds': bounds,
+                    'counts': counts.astype(np.int64).ravel().tolist(),
+                    'mean_speed': np.round(mean_speed, 1).ravel().tolist(),
+                    'total_count': count,
+                    'outside_count': count - inside,
+                    'seq': cache.seq,
+                    'timestamp': cache.timestamp
+                }
+            
+            self._emit('vehicle_density', cache.payload(room, build), room=room)
+    
+    @staticmethod
+    def _position_columns(frame: SimulationFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Latitude, longitude and speed arrays of a frame, from its columns when it has them"""
+        columns = frame.columns
+        if columns is not None:
+            return columns['lat'], columns['lng'], columns['speed']
+        
+        # Dict engine without captured columns: its vehicle dicts already exist
+        vehicles = frame.vehicles
+        count = len(vehicles)
+        return (np.fromiter((v['position']['lat'] for v in vehicles), np.float64, count),
+                np.fromiter((v['position']['lng'] for v in vehicles), np.float64, count),
+                np.fromiter((v['speed'] for v in vehicles), np.float64, count))
+    
+    def density_bins_for_zoom(self, zoom: float) -> Optional[int]:
+        """Density grid resolution for a map zoom level, or None when vehicles should be sent"""
+        for max_zoom, bins in self.density_levels:
+            if zoom <= max_zoom:
+                return bins
+        return None
+    
+    def set_detail(self, client_id: str, zoom: Optional[float]) -> Optional[int]:
+        """
+        Pick a client's level of detail from its map zoom: a density grid when
+        zoomed out, individual vehicles otherwise (None clears density mode).
+        Returns the grid resolution in use, or None for vehicles.
+        """
+        bins = None if zoom is None else self.density_bins_for_zoom(float(zoom))
+        if bins is not None and self.relay_only and DENSITY_ROOM_PREFIX + str(bins) not in self.fanout_rooms:
+            # The simulator process does not publish this grid
+            bins = None
+        if bins is None:
+            self.density_clients.pop(client_id, None)
+        else:
+            self.density_clients[client_id] = bins
+            self.subscriptions.setdefault(client_id, set(STREAM_EVENTS)).add('vehicle_update')
+        self._sync_rooms(client_id)
+        return bins
+    
+    def _snap_viewport(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> Tuple[int, int, int, int]:
+        """Tile range covering a bounding box"""
+        size = self.viewport_tile_size
+        row0, row1 = int(np.floor(min(min_lat, max_lat) / size)), int(np.floor(max(min_lat, max_lat) / size))
+        col0, col1 = int(np.floor(min(min_lng, max_lng) / size)), int(np.floor(max(min_lng, max_lng) / size))
+        return row0, col0, row1, col1
+    
+    def _tile_bbox(self, tiles: Tuple[int, int, int, int]) -> Tuple[float, float, float, float]:
+        """(min_lat, min_lng, max_lat, max_lng) of a tile range"""
+        row0, col0, row1, col1 = tiles
+        size = self.viewport_tile_size
+        return (row0 * size, col0 * size, (row1 + 1) * size, (col1 + 1) * size)
+    
+    @staticmethod
+    def _viewport_room(tiles: Tuple[int, int, int, int]) -> str:
+        return VIEWPORT_ROOM_PREFIX + ':'.join(str(t) for t in tiles)
+    
+    @staticmethod
+    def _room_tiles(room: str) -> Tuple[int, int, int, int]:
+        return tuple(int(t) for t in room[len(VIEWPORT_ROOM_PREFIX):].split(':'))
+    
+    def set_viewport(self, client_id: str, bbox: Optional[Dict[str, float]]) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Restrict a client's vehicles to a map viewport ({min_lat, min_lng, max_lat, max_lng}),
+        or clear it with None. The box is widened to whole tiles so clients looking at the
+        same area share a room; returns the effective box. Bounds that are not valid
+        coordinates raise ValueError.
+        """
+        if bbox is None:
+            self.viewports.pop(client_id, None)
+            self._sync_rooms(client_id)
+            return None
+        
+        min_lat, min_lng, max_lat, max_lng = (float(bbox[key]) for key in ('min_lat', 'min_lng', 'max_lat', 'max_lng'))
+        if not all(abs(lat) <= 90 for lat in (min_lat, max_lat)) or not all(abs(lng) <= 180 for lng in (min_lng, max_lng)):
+            # Also rejects NaN and infinities, which cannot be snapped to tiles
+            raise ValueError('viewport bounds must be finite coordinates')
+        tiles = self._snap_viewport(min_lat, min_lng, max_lat, max_lng)
+        self.delta_clients.discard(client_id)
+        self.binary_clients.discard(client_id)
+        self.viewports[client_id] = tiles
+        self.subscriptions.setdefault(client_id, set(STREAM_EVENTS)).add('vehicle_update')
+        self._sync_rooms(client_id)
+        return self._tile_bbox(tiles)
+    
+    def _without_vehicles(self, cache: FrameCache) -> PreEncoded:
+        """simulation_update payload for delta/binary/viewport clients (vehicles travel separately)"""
+        def build():
+            data = {
+                key: cache.field(key) if key in SHARED_FIELDS else value
+                for key, value in cache.fields.items()
+            }
+            data['vehicle_count'] = cache.frame.vehicle_count
+            data['vehicle_seq'] = cache.seq
+            data['seq'] = cache.seq
+            return data
+        return cache.payload('simulation_update_compact', build)
+    
+    def initial_update(self) -> PreEncoded:
+        """
+        simulation_update for a newly connected client. Reuses the last published
+        frame's encoding while streaming, so clients joining together share it.
+        """
+        cache = self.frame_cache
+        if cache is None or not self.streaming:
+            cache = FrameCache(self.current_frame(), seq=self.delta_encoder.seq)
+        return self._simulation_payload(cache)
+    
+    def get_vehicle_encoding(self, client_id: str) -> str:
+        """Vehicle encoding currently used for a client"""
+        if client_id in self.density_clients:
+            return 'density'
+        if client_id in self.viewports:
+            return 'viewport'
+        if client_id in self.delta_clients:
+            return 'delta'
+        if client_id in self.binary_clients:
+            return 'binary'
+        return 'full'
+    
+    def set_vehicle_encoding(self, client_id: str, encoding: str):
+        """
+        Switch a client between 'full', 'delta' and 'binary' vehicle encodings
+        and send it the snapshot/dictionary that encoding starts from
+        """
+        if self.relay_only:
+            # Workers have no vehicle state: the client starts from the next keyframe
+            self._assign_encoding(client_id, encoding)
+            return
+        
+        # Join the room and send the starting state with no frame published in
+        # between, so the first live delta/frame builds on exactly that state
+        with self.publish_lock:
+            self._assign_encoding(client_id, encoding)
+            if encoding == 'delta':
+                self.socketio.emit('vehicle_snapshot', self._vehicle_snapshot(), room=client_id)
+            elif encoding == 'binary':
+                self.socketio.emit('vehicle_dictionary', self.binary_encoder.dictionary(), room=client_id)
+    
+    def _assign_encoding(self, client_id: str, encoding: str):
+        """Record a client's vehicle encoding and move it to the matching rooms"""
+        if encoding not in VEHICLE_ROOMS:
+            raise ValueError(f"Unknown vehicle encoding: {encoding}")
+        
+        self.delta_clients.discard(client_id)
+        self.binary_clients.discard(client_id)
+        self.viewports.pop(client_id, None)
+        self.density_clients.pop(client_id, None)
+        if encoding == 'delta':
+            self.delta_clients.add(client_id)
+        elif encoding == 'binary':
+            self.binary_clients.add(client_id)
+        
+        self.subscriptions.setdefault(client_id, set(STREAM_EVENTS)).add('vehicle_update')
+        self._sync_rooms(client_id)
+    
+    def subscribe(self, client_id: str, event_type: str) -> Set[str]:
+        """
+        Subscribe a client to a stream event. The first explicit subscription
+        replaces the default of receiving every event. Returns the client's events.
+        """
+        if event_type not in STREAM_EVENTS:
+            raise ValueError(f"Unknown stream event: {event_type}")
+        
+        if client_id not in self.explicit_subscriptions:
+            self.explicit_subscriptions.add(client_id)
+            self.subscriptions[client_id] = set()
+        self.subscriptions[client_id].add(event_type)
+        self._sync_rooms(client_id)
+        return self.subscriptions[client_id]
+    
+    def unsubscribe(self, client_id: str, event_type: str) -> Set[str]:
+        """Stop sending a stream event to a client; returns the client's events"""
+        if event_type not in STREAM_EVENTS:
+            raise ValueError(f"Unknown stream event: {event_type}")
+        
+        self.explicit_subscriptions.add(client_id)
+        self.subscriptions.setdefault(client_id, set(STREAM_EVENTS)).discard(event_type)
+        self._sync_rooms(client_id)
+        return self.subscriptions[client_id]
+    
+    def _rooms_for(self, client_id: str) -> Set[str]:
+        """Rooms a client belongs in for its subscriptions and vehicle encoding"""
+        encoding = self.get_vehicle_encoding(client_id)
+        rooms = set()
+        for event_type in self.subscriptions.get(client_id, ()):
+            if event_type == 'vehicle_update':
+                if encoding == 'density':
+                    rooms.add(DENSITY_ROOM_PREFIX + str(self.density_clients[client_id]))
+                elif encoding == 'viewport':
+                    rooms.add(self._viewport_room(self.viewports[client_id]))
+                else:
+                    rooms.add(VEHICLE_ROOMS[encoding])
+            elif event_type == 'simulation_update':
+                rooms.add(SIMULATION_FULL_ROOM if encoding == 'full' else SIMULATION_COMPACT_ROOM)
+            else:
+                rooms.add(event_type)
+        return rooms
+    
+    def _sync_rooms(self, client_id: str):
+        """Move a client's socket into exactly the rooms its subscriptions need"""
+        current = self.client_rooms.get(client_id, set())
+        wanted = self._rooms_for(client_id) if client_id in self.clients else set()
+        
+        for room in wanted - current:
+            self.socketio.server.enter_room(client_id, room, namespace='/')
+            self.room_members.setdefault(room, set()).add(client_id)
+            if room == 'traffic_light_update':
+                self._light_joiners.add(client_id)
+        for room in current - wanted:
+            self.socketio.server.leave_room(client_id, room, namespace='/')
+            self._leave_room_members(room, client_id)
+        
+        self.client_rooms[client_id] = wanted
+    
+    def _leave_room_members(self, room: str, client_id: str):
+        members = self.room_members.get(room)
+        if members is not None:
+            members.discard(client_id)
+            if not members and room.startswith((VIEWPORT_ROOM_PREFIX, DENSITY_ROOM_PREFIX)):
+                # Viewport and density rooms are created on demand; drop them once empty
+                self.room_members.pop(room, None)
+    
+    def _has_members(self, room: str) -> bool:
+        if self.fanout:
+            # Members live in the workers: publish the configured rooms only
+            return room in self.fanout_rooms
+        return bool(self.room_members.get(room))
+    
+    def _publish_idle_status(self):
+        """Emit the stopped/paused status while no frames are produced"""
+        status = 'paused' if self.simulator.is_paused else 'stopped'
+        status_data = {
+            'status': status,
+            'is_paused': self.simulator.is_paused,
+            'current_scenario': self.simulator.current_scenario,
+            'simulation_time': self.simulator.simulation_time,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        if self._has_members('simulation_status'):
+            self._emit('simulation_status', status_data, room='simulation_status')
+    
+    def send_immediate_update(self):
+        """
+        Have the publisher send every channel on its next tick. Only the publisher
+        thread publishes: it owns the delta seq, resume history and light states.
+        """
+        if self.simulator.is_running:
+            self._full_publish = True
+            print("📤 Full update requested for all clients")
     
     def get_stream_status(self) -> Dict[str, Any]:
         """Get streaming status"""
         return {
             'streaming': self.streaming,
+            'role': self.role,
             'update_interval': self.update_interval,
             'connected_clients': len(self.clients),
+            'delta_clients': len(self.delta_clients),
+            'binary_clients': len(self.binary_clients),
+            'viewport_clients': len(self.viewports),
+            'density_clients': len(self.density_clients),
+            'backpressure': {
+                **self.backpressure_stats,
+                'lagging_clients': len(self.lagging),
+                'max_queue_depth': self.max_queue_depth,
+                'lagging': {client_id: self.clients[client_id].get('queue_depth', 0)
+                            for client_id in list(self.lagging) if client_id in self.clients}
+            },
+            'subscribers': {room: len(members) for room, members in list(self.room_members.items())},
+            'vehicle_seq': self.delta_encoder.seq,
+            'stream_id': self.stream_id,
+            'resume_history': len(self.delta_history),
             'simulation_running': self.simulator.is_running,
             'simulation_paused': self.simulator.is_paused,
-            'vehicle_count': len(self.simulator.vehicles),
+            'simulation_speed': self.simulator.clock.speed,
+            'replaying': self.replaying,
+            'stepper': {**self.stepper_stats, **(self.step_ticker.get_stats() if self.step_ticker else {})},
+            'commands': {**self.commands.stats, 'pending': len(self.commands)},
+            'publisher': {**self.publisher_stats, **(self.publish_ticker.get_stats() if self.publish_ticker else {})},
+            'vehicle_count': self.current_frame().vehicle_count,
+            'frame_seq': self._frame_seq,
             'last_update': datetime.utcnow().isoformat()
         }
     
@@ -178,10 +947,23 @@ class SimulationStream:
             'info': client_info or {}
         }
         
+        # Every stream event until the client subscribes explicitly
+        self.subscriptions[client_id] = set(STREAM_EVENTS)
+        self._sync_rooms(client_id)
+        
         print(f"👤 Client registered: {client_id}")
     
     def unregister_client(self, client_id: str):
         """Unregister a client"""
+        self.delta_clients.discard(client_id)
+        self.binary_clients.discard(client_id)
+        self.viewports.pop(client_id, None)
+        self.density_clients.pop(client_id, None)
+        self.lagging.pop(client_id, None)
+        self.explicit_subscriptions.discard(client_id)
+        self.subscriptions.pop(client_id, None)
+        for room in self.client_rooms.pop(client_id, ()):
+            self._leave_room_members(room, client_id)
         if client_id in self.clients:
             del self.clients[client_id]
             print(f"👋 Client unregistered: {client_id}")
@@ -0,0 +1,58 @@
+"""
+Backend tests import modules the way app.py does, from src/
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from flask import Flask  # noqa: E402
+from flask_socketio import SocketIO  # noqa: E402
+
+from simulation.factory import create_simulator  # noqa: E402
+from websocket.frame_cache import FrameJSON  # noqa: E402
+from websocket.handlers import register_socketio_handlers  # noqa: E402
+from websocket.simulation_stream import SimulationStream  # noqa: E402
+
+
+@pytest.fixture
+def make_stream():
+    """Build SimulationStreams (threading Socket.IO, not streaming yet); stopped after the test"""
+    streams = []
+
+    def make(engine: str = 'dict', role: str = 'standalone', message_queue: str = None, client_manager=None, **config):
+        config = {'engine': engine, 'seed': 2, 'vehicle_count': 20, 'update_interval': 0.05, **config}
+        app = Flask(__name__)
+        options = {'client_manager': client_manager} if client_manager is not None else {}
+        socketio = SocketIO(app, async_mode='threading', message_queue=message_queue, json=FrameJSON, **options)
+        stream = SimulationStream(socketio, create_simulator(config), role=role)
+        stream.socketio.test_app = app  # for connect()
+        streams.append(stream)
+        return stream
+
+    yield make
+    for stream in streams:
+        stream.stop_streaming()
+
+
+@pytest.fixture
+def stream(make_stream):
+    """SimulationStream over a small dict-engine simulator"""
+    return make_stream()
+
+
+@pytest.fixture
+def connect():
+    """Connect a Socket.IO test client to a stream, with the app's event handlers registered"""
+    managers = {}
+
+    def connect(stream):
+        if stream not in managers:
+            managers[stream] = register_socketio_handlers(stream.socketio, stream.simulator, stream)
+        client = stream.socketio.test_client(stream.socketio.test_app)
+        client.get_received()  # welcome and initial status
+        return client
+
+    return connect
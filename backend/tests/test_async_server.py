@@ -0,0 +1,80 @@
+"""
+The asyncio (ASGI) runtime delivers handler replies and stream emits to a real client
+"""
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+import socketio
+import uvicorn
+from flask import Flask
+
+from simulation.factory import create_simulator
+from websocket.async_server import AsyncSocketIO
+from websocket.frame_cache import FrameJSON
+from websocket.handlers import register_socketio_handlers
+from websocket.simulation_stream import SimulationStream
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def served():
+    """A stream on the asyncio runtime, served by uvicorn on a local port"""
+    sio = AsyncSocketIO(Flask(__name__), json=FrameJSON, handler_workers=2)
+    stream = SimulationStream(sio, create_simulator({'seed': 2, 'vehicle_count': 20, 'update_interval': 0.05}))
+    register_socketio_handlers(sio, stream.simulator, stream)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(sio.asgi_app, host='127.0.0.1', port=port, log_level='warning'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while not server.started and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    yield stream, f'http://127.0.0.1:{port}'
+    stream.stop_streaming()
+    server.should_exit = True
+    thread.join(timeout=5)
+
+
+async def session(url, actions):
+    """Connect a client, run `actions(client)` and return the events it received"""
+    received = []
+    client = socketio.AsyncClient(reconnection=False)
+
+    @client.on('*')
+    async def record(event, data=None):
+        received.append((event, data))
+
+    await client.connect(url, transports=['websocket'])
+    try:
+        await actions(client)
+    finally:
+        await client.disconnect()
+    return received
+
+
+def test_handler_replies_and_stream_emits_reach_the_client(served):
+    stream, url = served
+
+    async def start_and_listen(client):
+        await client.emit('command', {'command': 'start', 'scenario_id': 'default'})
+        await asyncio.sleep(1.0)
+
+    received = asyncio.run(session(url, start_and_listen))
+    names = [event for event, _ in received]
+
+    assert 'simulation_status' in names  # handler reply, from a handler thread
+    updates = [data for event, data in received if event == 'simulation_update']  # publisher thread
+    update = updates[-1]
+    assert len(updates) > 1 and update['scenario'] == 'default'
+    assert len(update['vehicles']) == update['metrics']['totalVehicles']
+    assert stream.publish_thread is not None and stream.publish_thread.is_alive()
@@ -0,0 +1,79 @@
+"""
+Backpressure: lagging clients skip frames, are resynced on recovery and
+disconnected when they stay behind
+"""
+import threading
+import time
+
+
+def publish(stream):
+    stream.simulator.update_simulation(stream.simulator.clock.step)
+    with stream.step_lock:
+        frame = stream._capture_frame()
+    with stream.publish_lock:
+        stream._publish_frame(frame, {'simulation', 'vehicles'})
+
+
+def lagging_client(stream, connect, monkeypatch, event_type='vehicle_delta'):
+    """A client whose outbound queue depth the test controls"""
+    client = connect(stream)
+    client.emit('subscribe', {'event_type': event_type})
+    client.get_received()
+    client_id = next(iter(stream.clients))
+    depths = {client_id: 0}
+    monkeypatch.setattr(stream, '_queue_depth', lambda sid: depths.get(sid, 0))
+    return client, client_id, depths
+
+
+def names(client):
+    return [m['name'] for m in client.get_received()]
+
+
+def test_lagging_clients_skip_frames(stream, connect, monkeypatch):
+    stream.simulator.start_simulation('default')
+    client, client_id, depths = lagging_client(stream, connect, monkeypatch)
+
+    depths[client_id] = stream.max_queue_depth + 1
+    publish(stream)
+
+    assert client_id in stream.lagging
+    assert 'vehicle_delta' not in names(client)
+    assert stream.clients[client_id]['dropped_frames'] >= 1
+    assert stream.backpressure_stats['dropped_frames'] >= 1
+
+
+def test_recovered_clients_are_resynced(stream, connect, monkeypatch):
+    stream.simulator.start_simulation('default')
+    client, client_id, depths = lagging_client(stream, connect, monkeypatch)
+    depths[client_id] = stream.max_queue_depth + 1
+    publish(stream)
+    client.get_received()
+
+    depths[client_id] = 0
+    publish(stream)
+
+    received = names(client)
+    assert client_id not in stream.lagging
+    assert received.index('vehicle_snapshot') < received.index('vehicle_delta')
+    assert stream.backpressure_stats['resyncs'] == 1
+
+
+def test_laggards_are_disconnected_off_the_publisher(stream, connect, monkeypatch):
+    stream.simulator.start_simulation('default')
+    stream.laggard_timeout = 0.0
+    client, client_id, depths = lagging_client(stream, connect, monkeypatch)
+    disconnected_on = []
+    disconnect = stream._disconnect_client
+    monkeypatch.setattr(stream, '_disconnect_client',
+                        lambda sid: (disconnected_on.append(threading.current_thread()), disconnect(sid)))
+
+    depths[client_id] = stream.max_queue_depth + 1
+    publish(stream)
+    time.sleep(0.01)
+    publish(stream)
+    time.sleep(0.2)
+
+    assert stream.backpressure_stats['laggard_disconnects'] == 1
+    assert client_id not in stream.clients and client_id not in stream.lagging
+    assert disconnected_on and disconnected_on[0] is not threading.current_thread()
+    assert not client.is_connected()
@@ -0,0 +1,35 @@
+"""
+Headless runs are reproducible for a given seed
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from simulation.batch_runner import run_scenario
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.mark.parametrize('engine', ['dict', 'numpy'])
+def test_seeded_runs_are_identical(engine):
+    first = run_scenario('default', 30, seed=7, engine=engine, config={'vehicle_count': 40})
+    second = run_scenario('default', 30, seed=7, engine=engine, config={'vehicle_count': 40})
+
+    assert len(first) == 30
+    assert first == second
+    assert first[0]['timestamp'] == '1970-01-01T00:00:01+00:00'
+    assert run_scenario('default', 30, seed=8, engine=engine, config={'vehicle_count': 40}) != first
+
+
+def test_headless_cli_output_is_reproducible(tmp_path):
+    outputs = []
+    for name in ('a.jsonl', 'b.jsonl'):
+        path = tmp_path / name
+        subprocess.run([sys.executable, 'run_headless.py', 'weekend', '--duration', '20', '--seed', '3',
+                        '--vehicles', '30', '-o', str(path)], cwd=BACKEND, check=True, capture_output=True)
+        outputs.append(path.read_bytes())
+
+    assert outputs[0] and outputs[0] == outputs[1]
+
@@ -0,0 +1,86 @@
+"""
+Packed binary vehicle frames: encode -> decode round trips
+"""
+import numpy as np
+import pytest
+
+from websocket.binary_frames import BinaryFrameEncoder, decode_binary_frame, POSITION_SCALE
+
+
+def columns(ids, seed=0):
+    rng = np.random.default_rng(seed)
+    count = len(ids)
+    return {
+        'ids': list(ids),
+        'type': rng.integers(0, 6, count).astype(np.int8),
+        'lat': rng.uniform(48.8, 48.9, count),
+        'lng': rng.uniform(2.3, 2.4, count),
+        'speed': rng.uniform(0, 130, count).astype(np.float32),
+        'heading': rng.uniform(-180, 540, count).astype(np.float32)
+    }
+
+
+def assert_decodes_to(decoded, source):
+    assert decoded['ids'] == source['ids']
+    np.testing.assert_array_equal(decoded['type'], source['type'])
+    np.testing.assert_allclose(decoded['lat'], source['lat'], atol=0.5 / POSITION_SCALE)
+    np.testing.assert_allclose(decoded['lng'], source['lng'], atol=0.5 / POSITION_SCALE)
+    np.testing.assert_allclose(decoded['speed'], source['speed'], atol=0.051)
+    np.testing.assert_allclose(decoded['heading'], np.mod(source['heading'], 360), atol=0.051)
+
+
+def test_round_trip_with_incremental_dictionary():
+    encoder = BinaryFrameEncoder()
+    dictionary = encoder.dictionary()
+
+    first = columns([f'v{i}' for i in range(100)], seed=1)
+    frame = encoder.encode(first)
+    assert frame['dict_base'] == 0 and len(frame['dict_ids']) == 100
+    assert_decodes_to(decode_binary_frame(frame, dictionary), first)
+
+    # Later frames only carry the ids the dictionary has not seen
+    second = columns([f'v{i}' for i in range(50, 130)], seed=2)
+    frame = encoder.encode(second)
+    assert frame['dict_base'] == 100 and frame['dict_ids'] == [f'v{i}' for i in range(100, 130)]
+    assert_decodes_to(decode_binary_frame(frame, dictionary), second)
+    assert frame['seq'] == 2
+
+
+def test_dictionary_rebuild_starts_a_new_epoch():
+    encoder = BinaryFrameEncoder(rebuild_factor=2, min_dictionary=10)
+    dictionary = encoder.dictionary()
+    for start in range(0, 40, 10):
+        decode_binary_frame(encoder.encode(columns([f'v{i}' for i in range(start, start + 10)])), dictionary)
+
+    assert encoder.epoch > 0
+    small = columns(['a', 'b'], seed=3)
+    assert_decodes_to(decode_binary_frame(encoder.encode(small), dictionary), small)
+
+
+def test_joining_client_decodes_from_the_full_dictionary():
+    encoder = BinaryFrameEncoder()
+    encoder.encode(columns([f'v{i}' for i in range(20)]))
+
+    late = encoder.dictionary()
+    frame = columns([f'v{i}' for i in range(5, 15)], seed=4)
+    assert_decodes_to(decode_binary_frame(encoder.encode(frame), late), frame)
+
+
+def test_frame_size_and_empty_frames():
+    encoder = BinaryFrameEncoder()
+    frame = encoder.encode(columns([f'v{i}' for i in range(7)]))
+    # count + codes + lat + lng (4 bytes), speed + heading (2 bytes), type (1 byte)
+    assert len(frame['data']) == 4 + 7 * (4 * 3 + 2 * 2 + 1)
+
+    empty = encoder.encode(columns([]))
+    assert decode_binary_frame(empty, encoder.dictionary())['ids'] == []
+
+
+@pytest.mark.parametrize('speed, expected', [(5000.0, 3276.7), (-5000.0, -3276.8)])
+def test_speed_saturates_instead_of_wrapping(speed, expected):
+    source = columns(['a'])
+    source['speed'] = np.array([speed], dtype=np.float32)
+
+    decoded = decode_binary_frame(BinaryFrameEncoder().encode(source), {})
+
+    assert decoded['speed'][0] == pytest.approx(expected)
@@ -0,0 +1,65 @@
+"""
+Checkpoint save -> restore round trips
+"""
+import numpy as np
+import pytest
+
+import simulation.checkpoint as checkpoint
+from simulation.checkpoint import save_checkpoint, load_checkpoint
+from simulation.factory import create_simulator
+
+
+def run(simulator, ticks):
+    for _ in range(ticks):
+        simulator.update_simulation(simulator.clock.step)
+
+
+def state(simulator):
+    return {
+        'time': simulator.clock.now,
+        'vehicles': [dict(v) for v in simulator.vehicles],
+        'lights': [(tl['id'], tl['currentPhase'], tl['state']) for tl in simulator.traffic_lights],
+        'metrics': simulator.metrics,
+        'stats': dict(simulator.stats)
+    }
+
+
+@pytest.mark.parametrize('engine', ['dict', 'numpy'])
+@pytest.mark.parametrize('compress', [False, True])
+def test_restore_continues_identically(tmp_path, engine, compress):
+    original = create_simulator({'engine': engine, 'seed': 11, 'vehicle_count': 60})
+    original.start_simulation('default')
+    run(original, 30)
+
+    path = save_checkpoint(original, str(tmp_path / 'sim.npz'), compress=compress)
+    restored = load_checkpoint(path)
+
+    assert type(restored) is type(original)
+    assert restored.is_running and not restored.is_paused
+    assert state(restored)['vehicles'] == state(original)['vehicles']
+
+    # Same RNG and clock state: both continue on the same trajectory
+    run(original, 20)
+    run(restored, 20)
+    assert state(restored) == state(original)
+
+
+def test_restore_into_existing_simulator(tmp_path):
+    original = create_simulator({'engine': 'numpy', 'seed': 3, 'vehicle_count': 40})
+    original.start_simulation('default')
+    run(original, 10)
+    path = save_checkpoint(original, str(tmp_path / 'nested' / 'sim.npz'))
+
+    target = create_simulator({'engine': 'numpy', 'seed': 99})
+    assert load_checkpoint(path, target) is target
+    assert target.running_metrics.total_vehicles == len(original.vehicles)
+    np.testing.assert_array_equal(target.arrays.column('lat'), original.arrays.column('lat'))
+
+
+def test_rejects_unknown_version(tmp_path, monkeypatch):
+    simulator = create_simulator({'engine': 'dict', 'seed': 1})
+    path = save_checkpoint(simulator, str(tmp_path / 'sim.npz'))
+    monkeypatch.setattr(checkpoint, 'CHECKPOINT_VERSION', checkpoint.CHECKPOINT_VERSION + 1)
+
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
@@ -0,0 +1,120 @@
+"""
+CommandQueue batches and the stream's command path (stepper thread vs inline)
+"""
+import threading
+import time
+from concurrent.futures import TimeoutError
+
+import pytest
+
+import websocket.simulation_stream as simulation_stream
+from simulation.command_queue import CommandQueue
+
+
+def test_drain_applies_in_order_and_resolves_futures():
+    queue = CommandQueue()
+    applied = []
+    first = queue.submit(applied.append, 1)
+    failing = queue.submit(lambda: 1 / 0)
+    last = queue.submit(lambda value: applied.append(value) or value * 2, 3)
+
+    assert not first.done() and len(queue) == 3
+    assert queue.drain() == 3
+
+    assert applied == [1, 3]
+    assert first.result(timeout=0) is None and last.result(timeout=0) == 6
+    with pytest.raises(ZeroDivisionError):
+        failing.result(timeout=0)
+    assert queue.stats == {'applied': 3, 'failed': 1, 'batches': 1}
+    assert queue.drain() == 0 and queue.stats['batches'] == 1
+
+
+def test_commands_submitted_while_draining_wait_for_the_next_batch():
+    queue = CommandQueue()
+    nested = []
+    queue.submit(lambda: nested.append(queue.submit(lambda: 'later')))
+
+    assert queue.drain() == 1
+    assert not nested[0].done()
+    assert queue.drain() == 1 and nested[0].result(timeout=0) == 'later'
+
+
+def test_futures_can_wait_for_settle():
+    queue = CommandQueue()
+    done = queue.submit(lambda: 'ok')
+    failed = queue.submit(lambda: 1 / 0)
+
+    assert queue.drain(settle=False) == 2
+    assert not done.done() and not failed.done()
+
+    queue.settle()
+    assert done.result(timeout=0) == 'ok'
+    assert isinstance(failed.exception(timeout=0), ZeroDivisionError)
+
+
+def test_cancelled_commands_are_skipped():
+    queue = CommandQueue()
+    applied = []
+    queue.submit(applied.append, 1).cancel()
+
+    assert queue.drain() == 0 and applied == []
+
+
+def test_commands_apply_inline_without_a_stepper(stream):
+    assert stream.run_command(stream.simulator.start_simulation, 'default') is True
+
+    assert stream.simulator.is_running
+    assert stream.current_frame().data['is_running'] is True
+
+
+def test_commands_run_on_the_stepper_thread(stream):
+    stream.simulator.start_simulation('default')
+    stream.start_streaming()
+
+    thread = stream.run_command(threading.current_thread)
+    vehicle = stream.run_command(stream.simulator.add_emergency_vehicle)
+
+    assert thread is stream.step_thread
+    frame = stream.current_frame()
+    assert frame.vehicle(vehicle['id']) is not None
+
+
+@pytest.mark.parametrize('speed', [1, 'max'])
+def test_commands_are_not_starved_by_stepping(stream, speed):
+    stream.simulator.start_simulation('default')
+    stream.simulator.set_speed(speed)
+    stream.start_streaming()
+
+    started = time.monotonic()
+    for _ in range(5):
+        stream.run_command(stream.simulator.get_vehicle_by_id, 'none')
+    assert time.monotonic() - started < 5 * (stream.update_interval + 0.1)
+
+
+def test_run_command_times_out_when_the_stepper_is_stuck(stream, monkeypatch):
+    monkeypatch.setattr(simulation_stream, 'COMMAND_TIMEOUT', 0.2)
+    stream.simulator.start_simulation('default')
+    stream.start_streaming()
+
+    with stream.step_lock:
+        with pytest.raises(TimeoutError):
+            stream.run_command(stream.simulator.pause_simulation)
+    # Still queued, and applied once the stepper gets the lock back
+    time.sleep(0.3)
+    assert stream.simulator.is_paused
+
+
+def test_forced_updates_are_published_by_the_publisher_thread(stream, monkeypatch):
+    emits = []
+    monkeypatch.setattr(stream, '_emit', lambda event, *args, **kwargs: emits.append(threading.current_thread()))
+    monkeypatch.setattr(stream, '_has_members', lambda room: True)
+    stream.simulator.start_simulation('default')
+    stream.start_streaming()
+    stream.run_command(stream.simulator.pause_simulation)
+    time.sleep(0.3)
+    emits.clear()
+
+    stream.send_immediate_update()
+    assert emits == []
+    time.sleep(0.3)
+    assert emits and set(emits) == {stream.publish_thread}
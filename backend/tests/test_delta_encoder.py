@@ -0,0 +1,103 @@
+"""
+Vehicle deltas applied client-side rebuild the encoded frames
+"""
+import copy
+import random
+
+import pytest
+
+from websocket.delta_encoder import VehicleDeltaEncoder, FIELD_PRECISION
+
+
+def vehicle(vehicle_id, lat, lng, speed=30.0, heading=90.0):
+    return {'id': vehicle_id, 'type': 'passenger', 'position': {'lat': lat, 'lng': lng},
+            'speed': speed, 'heading': heading}
+
+
+def apply_delta(state, delta):
+    """What a client does with a vehicle_delta (state: {'seq', 'vehicles': {id: vehicle}})"""
+    assert delta['base_seq'] == state['seq']
+    vehicles = state['vehicles']
+    for vehicle_id in delta['removed']:
+        del vehicles[vehicle_id]
+    for added in delta['added']:
+        vehicles[added['id']] = copy.deepcopy(added)
+
+    updated = delta['updated']
+    for i, vehicle_id in enumerate(updated['ids']):
+        target = vehicles[vehicle_id]
+        target['position'] = {'lat': updated['lat'][i], 'lng': updated['lng'][i]}
+        target['speed'] = updated['speed'][i]
+        target['heading'] = updated['heading'][i]
+
+    state['seq'] = delta['seq']
+    assert len(vehicles) == delta['count']
+
+
+def quantized(v):
+    return (round(v['position']['lat'], FIELD_PRECISION['lat']), round(v['position']['lng'], FIELD_PRECISION['lng']),
+            round(v['speed'], FIELD_PRECISION['speed']), int(round(v['heading'])))
+
+
+def random_frames(count=30):
+    rng = random.Random(4)
+    fleet = {f'v{i}': vehicle(f'v{i}', 48.85 + rng.random() / 100, 2.35 + rng.random() / 100) for i in range(50)}
+    next_id = 50
+    frames = []
+    for _ in range(count):
+        for v in rng.sample(list(fleet.values()), 20):
+            v['position']['lat'] += rng.uniform(-1e-4, 1e-4)
+            v['speed'] = rng.uniform(0, 60)
+        for vehicle_id in rng.sample(list(fleet), 3):
+            del fleet[vehicle_id]
+        for _ in range(rng.randint(0, 5)):
+            fleet[f'v{next_id}'] = vehicle(f'v{next_id}', 48.85, 2.35)
+            next_id += 1
+        frames.append(copy.deepcopy(list(fleet.values())))
+    return frames
+
+
+def test_deltas_rebuild_every_frame():
+    encoder = VehicleDeltaEncoder()
+    frames = random_frames()
+
+    encoder.encode(frames[0])
+    snapshot = encoder.snapshot()
+    state = {'seq': snapshot['seq'], 'vehicles': {v['id']: copy.deepcopy(v) for v in snapshot['vehicles']}}
+
+    for frame in frames[1:]:
+        apply_delta(state, encoder.encode(frame))
+        assert {i: quantized(v) for i, v in state['vehicles'].items()} == {v['id']: quantized(v) for v in frame}
+
+
+def test_changes_below_wire_precision_are_not_sent():
+    encoder = VehicleDeltaEncoder()
+    encoder.encode([vehicle('a', 48.8500001, 2.35)])
+
+    delta = encoder.encode([vehicle('a', 48.8500002, 2.35, speed=30.04)])
+
+    assert delta['updated']['ids'] == []
+    assert delta['added'] == [] and delta['removed'] == []
+    assert (delta['base_seq'], delta['seq']) == (1, 2)
+
+
+def test_reset_resends_everything_as_added():
+    encoder = VehicleDeltaEncoder()
+    frame = [vehicle('a', 48.85, 2.35), vehicle('b', 48.86, 2.36)]
+    encoder.encode(frame)
+    encoder.reset()
+
+    delta = encoder.encode(frame)
+
+    assert [v['id'] for v in delta['added']] == ['a', 'b']
+    assert delta['seq'] == 2
+
+
+@pytest.mark.parametrize('heading', [90.4, 270.6])
+def test_heading_is_sent_in_whole_degrees(heading):
+    encoder = VehicleDeltaEncoder()
+    encoder.encode([vehicle('a', 48.85, 2.35, heading=180)])
+
+    delta = encoder.encode([vehicle('a', 48.85, 2.35, heading=heading)])
+
+    assert delta['updated']['heading'] == [round(heading)]
@@ -0,0 +1,50 @@
+"""
+The dict and numpy engines simulate the same model: same population, lights
+and metrics invariants after the same ticks (their random streams differ)
+"""
+import pytest
+
+from simulation.factory import create_simulator
+
+TICKS = 150
+
+
+def run(engine, seed=4, vehicle_count=40, churn=True):
+    simulator = create_simulator({'engine': engine, 'seed': seed, 'vehicle_count': vehicle_count, 'verbose': False})
+    simulator.start_simulation('default')
+    if not churn:
+        simulator._manage_vehicle_population = lambda: None
+    for _ in range(TICKS):
+        simulator.update_simulation(simulator.clock.step)
+    return simulator
+
+
+def test_engines_agree_without_population_churn():
+    dict_engine, numpy_engine = run('dict', churn=False), run('numpy', churn=False)
+    dict_vehicles, numpy_vehicles = list(dict_engine.vehicles), list(numpy_engine.vehicles)
+
+    assert len(dict_vehicles) == len(numpy_vehicles) == 40
+    assert {v['id'] for v in dict_vehicles} == {v['id'] for v in numpy_vehicles}
+    assert set(dict_vehicles[0]) == set(numpy_vehicles[0])
+    assert dict_engine.simulation_time == pytest.approx(numpy_engine.simulation_time)
+    assert ([tl['currentPhase'] for tl in dict_engine.traffic_lights] ==
+            [tl['currentPhase'] for tl in numpy_engine.traffic_lights])
+    assert set(dict_engine.metrics) == set(numpy_engine.metrics)
+    assert dict_engine.metrics['totalVehicles'] == numpy_engine.metrics['totalVehicles'] == 40
+
+
+@pytest.mark.parametrize('engine', ['dict', 'numpy'])
+@pytest.mark.parametrize('seed', [1, 2])
+def test_metrics_match_the_vehicles(engine, seed):
+    simulator = run(engine, seed=seed)
+    vehicles = list(simulator.vehicles)
+    metrics = simulator.metrics
+    counts = {}
+    for vehicle in vehicles:
+        counts[vehicle['type']] = counts.get(vehicle['type'], 0) + 1
+
+    assert metrics['totalVehicles'] == len(vehicles) == len({v['id'] for v in vehicles})
+    assert metrics['vehicleCounts'] == counts
+    assert metrics['emergencyVehiclesActive'] == counts.get('emergency', 0)
+    assert metrics['avgSpeed'] == pytest.approx(sum(v['speed'] for v in vehicles) / len(vehicles), abs=0.06)
+    assert metrics['totalDistanceTraveled'] == pytest.approx(sum(v['distanceTraveled'] for v in vehicles), abs=0.01)
@@ -0,0 +1,105 @@
+"""
+Multi-process fan-out: the simulator role publishes once through the message
+queue and worker roles relay the events to their own clients
+"""
+import base64
+import time
+
+import pytest
+import socketio
+from socketio.packet import Packet
+
+from websocket.simulation_stream import DENSITY_ROOM_PREFIX
+
+
+class LocalQueue(socketio.PubSubManager):
+    """
+    In-process stand-in for the redis/kombu message queue: delivers what the
+    simulator publishes to the workers' servers the way their queue listener would
+    (the Flask-SocketIO test client refuses a pub/sub manager on its own server)
+    """
+    name = 'local'
+
+    def __init__(self):
+        super().__init__(write_only=True)
+        self.workers = []
+
+    def _publish(self, message):
+        data = message['data']
+        if message['binary']:
+            data = Packet.reconstruct_binary(data[0], [base64.b64decode(a) for a in data[1:]])
+        data = data[0] if len(data) == 1 else tuple(data)
+        for worker in self.workers:
+            worker.socketio.server.manager.emit(message['event'], data, namespace=message['namespace'],
+                                                room=message['room'], skip_sid=message['skip_sid'])
+
+
+def fanout(make_stream):
+    """A simulator-role stream publishing through the queue to a worker-role stream"""
+    queue = LocalQueue()
+    simulator = make_stream(role='simulator', client_manager=queue)
+    worker = make_stream(role='worker')
+    queue.workers.append(worker)
+    simulator.simulator.start_simulation('default')
+    return simulator, worker
+
+
+def received(client, seconds=1.0):
+    time.sleep(seconds)
+    return client.get_received()
+
+
+def test_worker_relays_the_simulators_events(make_stream, connect):
+    simulator, worker = fanout(make_stream)
+    client = connect(worker)
+
+    simulator.start_streaming()
+    names = [m['name'] for m in received(client)]
+
+    assert {'simulation_update', 'vehicle_update', 'traffic_light_update'} <= set(names)
+    assert worker.publish_thread is None
+
+
+@pytest.mark.parametrize('event_type, keyframe, live', [
+    ('vehicle_delta', 'vehicle_snapshot', 'vehicle_delta'),
+    ('vehicle_binary', 'vehicle_dictionary', 'vehicle_frame'),
+])
+def test_worker_compact_clients_start_from_keyframes(make_stream, connect, event_type, keyframe, live):
+    simulator, worker = fanout(make_stream)
+    simulator.channel_intervals['keyframes'] = 0.2
+    client = connect(worker)
+    client.emit('subscribe', {'event_type': event_type})
+    client.get_received()
+
+    simulator.start_streaming()
+    messages = received(client)
+    names = [m['name'] for m in messages]
+
+    assert keyframe in names and live in names
+    assert 'vehicle_update' not in names
+    if live == 'vehicle_frame':
+        frame = next(m['args'][0] for m in messages if m['name'] == live)
+        assert isinstance(frame['data'], bytes) and len(frame['data']) > 4
+
+
+def test_simulator_publishes_only_the_fanout_rooms(make_stream, monkeypatch):
+    simulator, _ = fanout(make_stream)
+    rooms = []
+    monkeypatch.setattr(simulator, '_emit', lambda event, data, room, **kwargs: rooms.append(room))
+
+    simulator.start_streaming()
+    time.sleep(0.5)
+
+    assert rooms and set(rooms) <= simulator.fanout_rooms
+    assert not any(room.startswith(DENSITY_ROOM_PREFIX) for room in rooms)
+
+
+def test_workers_keep_vehicles_for_unpublished_density_grids(make_stream, connect):
+    _, worker = fanout(make_stream)
+    client = connect(worker)
+
+    client.emit('set_detail', {'zoom': 10})
+    client.get_received()
+    client_id = next(iter(worker.clients))
+
+    assert worker.get_vehicle_encoding(client_id) == 'full'
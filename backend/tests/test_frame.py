@@ -0,0 +1,65 @@
+"""
+Immutable SimulationFrame snapshots of both engines
+"""
+import numpy as np
+import pytest
+
+from simulation.factory import create_simulator
+from simulation.frame import SimulationFrame
+
+
+@pytest.fixture(params=['dict', 'numpy'])
+def simulator(request):
+    simulator = create_simulator({'engine': request.param, 'seed': 6, 'vehicle_count': 40})
+    simulator.start_simulation('default')
+    simulator.update_simulation(simulator.clock.step)
+    return simulator
+
+
+def test_frame_matches_the_simulator_when_captured(simulator):
+    expected = simulator.get_simulation_snapshot()
+    frame = SimulationFrame.capture(simulator, seq=1, with_columns=True)
+
+    assert frame.vehicles == expected['vehicles']
+    assert frame.vehicle_count == len(expected['vehicles'])
+    assert frame.metrics == expected['metrics']
+    assert frame.simulation_time == expected['simulation_time']
+    assert frame.data['vehicles'] is frame.vehicles
+    assert frame.columns['ids'] == [v['id'] for v in expected['vehicles']]
+
+
+def test_frame_is_unaffected_by_later_ticks(simulator):
+    frame = SimulationFrame.capture(simulator, seq=1, with_columns=True)
+    before = [(v['id'], dict(v['position'])) for v in frame.vehicles]
+    lats = np.array(frame.columns['lat'])
+
+    for _ in range(10):
+        simulator.update_simulation(simulator.clock.step)
+    simulator.add_emergency_vehicle()
+
+    assert [(v['id'], v['position']) for v in frame.vehicles] == before
+    np.testing.assert_array_equal(frame.columns['lat'], lats)
+
+
+def test_frames_reject_writes(simulator):
+    frame = SimulationFrame.capture(simulator, seq=3, with_columns=True)
+
+    with pytest.raises(AttributeError):
+        frame.seq = 4
+    with pytest.raises(ValueError):
+        frame.columns['lat'][0] = 0.0
+
+
+def test_vehicle_lookup_by_id(simulator):
+    frame = SimulationFrame.capture(simulator, seq=1)
+
+    for row in (0, frame.vehicle_count - 1):
+        vehicle_id = simulator.vehicles[row]['id']
+        assert frame.vehicle(vehicle_id) == simulator.get_vehicle_by_id(vehicle_id)
+    assert frame.vehicle('missing') is None
+
+
+def test_dict_engine_skips_columns_unless_asked():
+    simulator = create_simulator({'engine': 'dict', 'seed': 1, 'vehicle_count': 5})
+
+    assert SimulationFrame.capture(simulator, seq=1).columns is None
@@ -0,0 +1,63 @@
+"""
+FrameJSON splicing of pre-encoded payloads and FrameCache reuse
+"""
+import json
+
+import pytest
+
+import websocket.frame_cache as frame_cache
+from simulation.frame import SimulationFrame
+from websocket.frame_cache import FrameCache, FrameJSON, PreEncoded, pre_encode
+
+
+def test_pre_encoded_values_are_spliced_verbatim():
+    vehicles = [{'id': 'v1', 'position': {'lat': 48.85, 'lng': 2.35}}]
+    packet = ['vehicle_update', {'vehicles': pre_encode(vehicles), 'nested': [pre_encode({'a': 1}), 2]}]
+
+    text = FrameJSON.dumps(packet, separators=(',', ':'))
+
+    assert json.loads(text) == ['vehicle_update', {'vehicles': vehicles, 'nested': [{'a': 1}, 2]}]
+    assert pre_encode(vehicles).text in text
+
+
+def test_plain_data_matches_the_stdlib():
+    data = {'a': [1, 2.5, None], 'b': 'text'}
+
+    assert FrameJSON.dumps(data) == json.dumps(data)
+    assert FrameJSON.loads(FrameJSON.dumps(data)) == data
+    with pytest.raises(TypeError):
+        FrameJSON.dumps({'when': object()})
+
+
+@pytest.mark.parametrize('text', ['\x000\x00', '"0"', 'marker0', '\\"'])
+def test_data_strings_are_never_mistaken_for_placeholders(text):
+    data = {'scenario': text, 'vehicles': PreEncoded('[1,2]'), text: 'key'}
+
+    assert json.loads(FrameJSON.dumps(data)) == {'scenario': text, 'vehicles': [1, 2], text: 'key'}
+
+
+def test_marker_collision_retries_with_a_new_marker(monkeypatch):
+    markers = iter(['aaaa', 'bbbb'])
+    monkeypatch.setattr(frame_cache.secrets, 'token_hex', lambda n: next(markers))
+
+    # The data contains the first marker's placeholder text itself
+    text = FrameJSON.dumps({'trap': 'aaaa0', 'raw': PreEncoded('{"x":1}')})
+
+    assert json.loads(text) == {'trap': 'aaaa0', 'raw': {'x': 1}}
+
+
+def test_frame_cache_encodes_each_payload_once():
+    cache = FrameCache(SimulationFrame(1, {'metrics': {'avgSpeed': 30}}, vehicles=[{'id': 'v1'}]), seq=4)
+    builds = []
+
+    def build():
+        builds.append(1)
+        return {'vehicles': cache.field('vehicles'), 'seq': cache.seq}
+
+    first = cache.payload('vehicle_update', build)
+    assert cache.payload('vehicle_update', build) is first
+    assert cache.get('vehicle_update') is first and cache.get('missing') is None
+    assert len(builds) == 1
+    assert cache.field('vehicles') is cache.field('vehicles')
+    assert json.loads(FrameJSON.dumps(['vehicle_update', first])) == [
+        'vehicle_update', {'vehicles': [{'id': 'v1'}], 'seq': 4}]
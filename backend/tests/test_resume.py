@@ -0,0 +1,90 @@
+"""
+Delta-stream resume: replayed history and snapshots line up with the live deltas
+"""
+import threading
+import time
+
+
+def publish(stream):
+    """One stepper + publisher iteration, as the stream threads run it"""
+    stream.simulator.update_simulation(stream.simulator.clock.step)
+    with stream.step_lock:
+        frame = stream._capture_frame()
+    with stream.publish_lock:
+        stream._publish_frame(frame, {'simulation', 'vehicles'})
+
+
+def vehicle_messages(client):
+    return [(m['name'], m['args'][0]) for m in client.get_received()
+            if m['name'] in ('vehicle_delta', 'vehicle_snapshot')]
+
+
+def assert_chain(messages, start_seq):
+    """Every delta builds on the previous message's seq, with no gap or duplicate"""
+    seq = start_seq
+    for _, payload in messages:
+        assert payload['base_seq'] == seq
+        seq = payload['seq']
+    return seq
+
+
+def publish_while_joining(stream, monkeypatch):
+    """Have the publisher try to send a frame right after the client joins the delta room"""
+    assign = stream._assign_encoding
+    threads = []
+
+    def assign_then_publish(client_id, encoding):
+        assign(client_id, encoding)
+        thread = threading.Thread(target=publish, args=(stream,))
+        thread.start()
+        threads.append(thread)
+        time.sleep(0.1)
+
+    monkeypatch.setattr(stream, '_assign_encoding', assign_then_publish)
+    return threads
+
+
+def started(stream, connect):
+    stream.simulator.start_simulation('default')
+    watcher = connect(stream)
+    watcher.emit('subscribe', {'event_type': 'vehicle_delta'})
+    for _ in range(4):
+        publish(stream)
+    messages = vehicle_messages(watcher)
+    assert messages[0][0] == 'vehicle_snapshot'
+    return [payload for name, payload in messages if name == 'vehicle_delta']
+
+
+def test_resume_replays_missed_deltas_then_goes_live(stream, connect, monkeypatch):
+    deltas = started(stream, connect)
+    last_seq = deltas[1]['seq']
+
+    client = connect(stream)
+    threads = publish_while_joining(stream, monkeypatch)
+    client.emit('resume', {'last_seq': last_seq, 'stream_id': stream.stream_id})
+    for thread in threads:
+        thread.join()
+
+    received = client.get_received()
+    status = next(m['args'][0] for m in received if m['name'] == 'resume_status')
+    assert status['mode'] == 'deltas' and status['replayed'] == 2
+    messages = [(m['name'], m['args'][0]) for m in received if m['name'] == 'vehicle_delta']
+    assert len(messages) == 3
+    assert assert_chain(messages, last_seq) == stream.delta_encoder.seq
+
+
+def test_resume_from_another_stream_gets_a_snapshot(stream, connect, monkeypatch):
+    started(stream, connect)
+
+    client = connect(stream)
+    threads = publish_while_joining(stream, monkeypatch)
+    client.emit('resume', {'last_seq': 2, 'stream_id': 'previous-server'})
+    for thread in threads:
+        thread.join()
+
+    messages = vehicle_messages(client)
+    name, snapshot = messages[0]
+    assert name == 'vehicle_snapshot'
+    assert len(snapshot['vehicles']) == snapshot['count']
+    assert assert_chain(messages[1:], snapshot['seq']) == stream.delta_encoder.seq
+    assert len(messages) == 2
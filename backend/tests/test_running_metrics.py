@@ -0,0 +1,70 @@
+"""
+RunningMetrics aggregates stay equal to a full rescan of the vehicles
+"""
+from collections import Counter
+
+import pytest
+
+from simulation.factory import create_simulator
+from simulation.running_metrics import RunningMetrics
+
+
+def rescan(simulator):
+    vehicles = simulator.vehicles
+    return {
+        'total': len(vehicles),
+        'speed_sum': sum(v['speed'] for v in vehicles),
+        'distance': sum(v['distanceTraveled'] for v in vehicles),
+        'counts': dict(Counter(v['type'] for v in vehicles))
+    }
+
+
+def assert_matches_rescan(simulator):
+    running, expected = simulator.running_metrics, rescan(simulator)
+    assert running.total_vehicles == expected['total']
+    assert running.speed_sum == pytest.approx(expected['speed_sum'], rel=1e-6)
+    assert running.total_distance == pytest.approx(expected['distance'], rel=1e-6, abs=1e-9)
+    assert running.vehicle_counts == expected['counts']
+
+
+@pytest.fixture(params=['dict', 'numpy'])
+def simulator(request):
+    simulator = create_simulator({'engine': request.param, 'seed': 7, 'vehicle_count': 80,
+                                  'metrics_resync_ticks': 25})
+    simulator.start_simulation('default')
+    return simulator
+
+
+def test_incremental_updates_track_a_rescan(simulator):
+    for _ in range(60):
+        simulator.update_simulation(simulator.clock.step)
+    assert simulator.metrics['totalVehicles'] == len(simulator.vehicles)
+
+    simulator.add_emergency_vehicle()
+    assert_matches_rescan(simulator)
+
+
+def test_periodic_resync_corrects_drift(simulator):
+    simulator.running_metrics.speed_sum += 1e6
+    simulator.running_metrics.total_vehicles += 3
+
+    for _ in range(simulator.metrics_resync_ticks):
+        simulator.update_simulation(simulator.clock.step)
+
+    assert simulator._ticks_since_resync == 0
+    assert_matches_rescan(simulator)
+
+
+def test_add_remove_round_trip():
+    metrics = RunningMetrics({'bus': 200.0}, default_co2=100)
+    metrics.add('bus', 30.0, 2.0)
+    metrics.add('car', 50.0, 1.0)
+    metrics.remove('bus', 30.0, 2.0)
+
+    assert metrics.total_vehicles == 1
+    assert metrics.avg_speed == 50.0
+    assert metrics.vehicle_counts == {'car': 1}
+    assert metrics.co2_emissions == pytest.approx(100.0)
+
+    metrics.reset()
+    assert metrics.avg_speed == 0.0
@@ -0,0 +1,93 @@
+"""
+FixedRateTicker deadlines, skipped ticks and channel accounting (fake clock)
+"""
+import pytest
+
+from utils.scheduler import FixedRateTicker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_ticks_do_not_drift(clock):
+    ticker = FixedRateTicker(0.1, clock=clock, sleep=clock.sleep)
+
+    for _ in range(5):
+        ticker.wait()
+        clock.now += 0.03  # work done in the tick
+
+    assert clock.sleeps == pytest.approx([0.07] * 4)  # the first tick is due at once
+    assert ticker.late_ticks == 0 and ticker.skipped_ticks == 0
+
+
+def test_overrun_skips_missed_ticks(clock):
+    ticker = FixedRateTicker(0.1, clock=clock, sleep=clock.sleep)
+    ticker.wait()
+
+    clock.now += 0.35  # the tick's work overran three deadlines
+    ticker.wait()
+
+    assert ticker.late_ticks == 1
+    assert ticker.skipped_ticks == 2
+    assert ticker.max_lateness == pytest.approx(0.25)
+    # The schedule stays on the original grid
+    ticker.wait()
+    assert clock.now == pytest.approx(100.4)
+
+
+def test_channels_fire_at_their_divider(clock):
+    ticker = FixedRateTicker(0.1, clock=clock, sleep=clock.sleep)
+    assert ticker.add_channel('fast', 5.0) == 2
+    assert ticker.add_channel('slow', 0.5) == 20
+    assert ticker.add_channel('every', 50.0) == 1
+
+    fired = {'fast': 0, 'slow': 0, 'every': 0}
+    for _ in range(40):
+        for name in ticker.wait():
+            fired[name] += 1
+
+    assert fired == {'fast': 20, 'slow': 2, 'every': 40}
+    assert ticker.get_stats()['channels']['slow'] == {'every': 20, 'fired': 2, 'missed': 0}
+
+
+def test_skipped_ticks_count_as_missed_channel_firings(clock):
+    ticker = FixedRateTicker(0.1, clock=clock, sleep=clock.sleep)
+    ticker.add_channel('fast', 5.0)
+    ticker.wait()
+
+    clock.now += 1.0  # ten periods lost
+    assert ticker.wait() == ['fast']
+
+    channel = ticker.get_stats()['channels']['fast']
+    assert channel['fired'] == 2
+    assert channel['missed'] == 4
+
+
+def test_resync_reanchors_but_keeps_counters(clock):
+    ticker = FixedRateTicker(0.1, phase=0.05, clock=clock, sleep=clock.sleep)
+    ticker.wait()
+    assert clock.now == pytest.approx(100.05)
+
+    clock.now += 5.0
+    ticker.resync()
+    ticker.wait()
+
+    assert ticker.ticks == 2 and ticker.late_ticks == 0
+    assert clock.now == pytest.approx(105.1)
+    with pytest.raises(ValueError):
+        FixedRateTicker(0)
@@ -0,0 +1,30 @@
+"""
+SimulationClock step accounting and timestamps
+"""
+from datetime import datetime
+
+import pytest
+
+from simulation.sim_clock import SimulationClock
+
+
+def test_steps_due_carries_the_owed_fraction():
+    clock = SimulationClock(step=0.1, time_warp=2.0)
+
+    assert clock.steps_due(0.08) == 1
+    assert clock.pending == pytest.approx(0.06)
+    assert clock.steps_due(0.02) == 1
+
+    clock.pending = 0.09
+    clock.reset_accumulator()
+    assert clock.pending == 0.0 and clock.steps_due(0.04) == 0
+
+
+def test_isoformat_is_utc():
+    clock = SimulationClock()
+    clock.epoch = 0.0
+    clock.advance(90.5)
+
+    parsed = datetime.fromisoformat(clock.isoformat())
+    assert parsed.utcoffset().total_seconds() == 0
+    assert parsed.timestamp() == 90.5
@@ -0,0 +1,68 @@
+"""
+REST routes backed by the simulation stream and its command queue
+"""
+import threading
+import time
+
+import pytest
+
+from api.routes import simulation as simulation_routes
+from api.routes.metrics import metrics_bp
+from api.routes.simulation import simulation_bp
+from config import Config
+from simulation.trace_recorder import TraceRecorder, load_trace_manifest
+from websocket import simulation_stream
+
+
+@pytest.fixture
+def client(stream, tmp_path, monkeypatch):
+    """REST client over the stream's app, with the simulation blueprint registered"""
+    monkeypatch.setattr(Config, 'SIMULATION_TRACE_DIR', str(tmp_path))
+    monkeypatch.setitem(simulation_routes.simulation_state, 'simulation_speed', 1.0)
+    app = stream.socketio.test_app
+    app.extensions['simulator'] = stream.simulator
+    app.extensions['simulation_stream'] = stream
+    app.register_blueprint(simulation_bp, url_prefix='/api')
+    stream.simulator.start_simulation('default')
+    stream.start_streaming()
+    return app.test_client()
+
+
+def test_stop_trace_writes_the_last_chunk_off_the_stepper(client, stream, tmp_path, monkeypatch):
+    closed_on = []
+    close = TraceRecorder.close
+    monkeypatch.setattr(TraceRecorder, 'close', lambda self: (closed_on.append(threading.current_thread()), close(self)))
+
+    assert client.post('/api/simulation/trace/start', json={'name': 'run'}).status_code == 200
+    time.sleep(0.3)
+    response = client.post('/api/simulation/trace/stop')
+
+    assert response.status_code == 200
+    assert response.get_json()['trace']['recording'] is False
+    assert closed_on == [threading.current_thread()]
+    assert stream.simulator.tick_listeners == []
+    manifest = load_trace_manifest(str(tmp_path / 'run'))
+    assert sum(chunk['ticks'] for chunk in manifest['chunks']) == response.get_json()['trace']['ticksRecorded'] > 0
+
+
+def test_command_timeout_is_a_503_and_still_applies(client, stream, monkeypatch):
+    monkeypatch.setattr(simulation_stream, 'COMMAND_TIMEOUT', 0.2)
+
+    with stream.step_lock:
+        response = client.post('/api/simulation/speed', json={'speed': 4})
+    assert response.status_code == 503
+    assert 'queued' in response.get_json()['error']
+
+    time.sleep(0.3)
+    assert stream.simulator.clock.time_warp == 4
+
+
+def test_metrics_before_the_first_tick_are_complete(stream):
+    app = stream.socketio.test_app
+    app.extensions['simulation_stream'] = stream
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+
+    metrics = app.test_client().get('/api/metrics').get_json()
+
+    assert stream.current_frame().metrics == {}
+    assert {'timestamp', 'totalVehicles', 'avgSpeed', 'trafficLights'} <= set(metrics)
@@ -0,0 +1,115 @@
+"""
+SimulationStream stepping and publishing
+"""
+import json
+import time
+
+import numpy as np
+import pytest
+
+from simulation.frame import SimulationFrame
+from websocket.simulation_stream import DENSITY_ROOM_PREFIX, VEHICLES_BINARY_ROOM, SIMULATION_COMPACT_ROOM
+
+
+def test_paused_max_speed_does_not_spin(stream):
+    stream.simulator.start_simulation('default')
+    stream.simulator.set_speed('max')
+    stream.start_streaming()
+    stream.run_command(stream.simulator.pause_simulation)
+
+    started = time.process_time()
+    time.sleep(1.0)
+
+    assert time.process_time() - started < 0.05
+
+
+
+def published(stream, monkeypatch, channels=('simulation', 'vehicles')):
+    """Publish the current frame once; returns the frame and the {event: [payload]} emitted"""
+    events = {}
+    monkeypatch.setattr(stream, '_emit', lambda event, data, room, skip_sids=None:
+                        events.setdefault(event, []).append(data))
+    frame = stream.current_frame()
+    stream._publish_frame(frame, set(channels))
+    return frame, events
+
+
+def test_binary_clients_never_build_vehicle_dicts(make_stream, monkeypatch):
+    stream = make_stream('numpy', vehicle_count=300)
+    stream.simulator.start_simulation('default')
+    stream.room_members = {VEHICLES_BINARY_ROOM: {'a'}, SIMULATION_COMPACT_ROOM: {'a'}}
+
+    frame, events = published(stream, monkeypatch)
+
+    assert frame._vehicles is None
+    assert set(events) == {'vehicle_frame', 'simulation_update'}
+    assert events['vehicle_frame'][0]['count'] == frame.vehicle_count
+
+
+def test_density_grids_are_built_from_columns(make_stream, monkeypatch):
+    stream = make_stream('numpy', vehicle_count=300)
+    stream.simulator.start_simulation('default')
+    stream.room_members = {DENSITY_ROOM_PREFIX + '16': {'b'}}
+
+    frame, events = published(stream, monkeypatch)
+
+    grid = json.loads(events['vehicle_density'][0].text)
+    assert sum(grid['counts']) + grid['outside_count'] == frame.vehicle_count == grid['total_count']
+    assert frame._vehicles is None
+
+
+
+def test_density_grid_is_the_same_from_columns_or_dicts(stream, monkeypatch):
+    stream.simulator.start_simulation('default')
+    stream.room_members = {DENSITY_ROOM_PREFIX + '16': {'b'}}
+    grids = []
+    for with_columns in (True, False):
+        frame = SimulationFrame.capture(stream.simulator, seq=1, with_columns=with_columns)
+        monkeypatch.setattr(stream, 'frame', frame)
+        grids.append(json.loads(published(stream, monkeypatch)[1]['vehicle_density'][0].text))
+
+    assert grids[0]['counts'] == grids[1]['counts']
+    assert grids[0]['mean_speed'] == grids[1]['mean_speed']
+
+
+def test_viewports_filter_columns_and_build_only_visible_dicts(make_stream, monkeypatch):
+    stream = make_stream('numpy', vehicle_count=300)
+    stream.simulator.start_simulation('default')
+    lats, lngs = stream.simulator.arrays.column('lat'), stream.simulator.arrays.column('lng')
+    tiles = stream._snap_viewport(float(lats.min()), float(lngs.min()), float(np.median(lats)), float(np.median(lngs)))
+    stream.room_members = {stream._viewport_room(tiles): {'c'}}
+
+    frame, events = published(stream, monkeypatch)
+
+    assert frame._vehicles is None
+    min_lat, min_lng, max_lat, max_lng = stream._tile_bbox(tiles)
+    inside = np.flatnonzero((lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng))
+    update = events['vehicle_update'][0]
+    assert 0 < update['count'] < frame.vehicle_count == update['total_count']
+    assert update['vehicles'] == [frame.vehicle(frame.columns['ids'][row]) for row in inside]
+
+
+@pytest.mark.parametrize('bad', [float('nan'), float('inf'), 1e300, '1e999'])
+def test_set_viewport_rejects_non_finite_bounds(stream, connect, bad):
+    client = connect(stream)
+
+    client.emit('set_viewport', {'viewport': {'min_lat': 48.85, 'min_lng': 2.35, 'max_lat': bad, 'max_lng': 2.36}})
+
+    received = client.get_received()
+    assert [message['name'] for message in received] == ['error']
+    assert stream.viewports == {}
+
+
+@pytest.mark.parametrize('event, data', [
+    ('command', {'command': 'start', 'scenario_id': '\x000\x00'}),
+    ('command', {'command': 'start', 'scenario_id': 'x' * 65}),
+    ('change_scenario', {'scenario_id': ['default']}),
+])
+def test_scenario_ids_must_be_printable_strings(stream, connect, event, data):
+    client = connect(stream)
+    client.emit(event, data)
+    received = client.get_received()
+
+    assert [m['name'] for m in received] == ['error']
+    assert 'scenario_id' in received[0]['args'][0]['message']
+    assert not stream.simulator.is_running
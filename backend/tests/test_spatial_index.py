@@ -0,0 +1,69 @@
+"""
+SpatialGrid radius and bounding-box queries against brute force
+"""
+import numpy as np
+import pytest
+
+from simulation.spatial_index import SpatialGrid
+
+CELL = 0.001
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(2)
+    return rng.uniform(48.85, 48.86, 500), rng.uniform(2.34, 2.35, 500)
+
+
+def brute_within(lats, lngs, qlats, qlngs, radius):
+    dist = np.abs(lats[None, :] - qlats[:, None]) + np.abs(lngs[None, :] - qlngs[:, None])
+    hits = dist < radius
+    return np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+
+
+@pytest.mark.parametrize('radius', [CELL, CELL / 3])
+def test_within_matches_brute_force(points, radius):
+    lats, lngs = points
+    rng = np.random.default_rng(3)
+    qlats, qlngs = rng.uniform(48.849, 48.861, 300), rng.uniform(2.339, 2.351, 300)
+
+    grid = SpatialGrid(lats, lngs, cell_size=CELL)
+
+    np.testing.assert_array_equal(grid.within(qlats, qlngs, radius),
+                                  brute_within(lats, lngs, qlats, qlngs, radius))
+
+
+def test_within_edge_cases(points):
+    lats, lngs = points
+    grid = SpatialGrid(lats, lngs, cell_size=CELL)
+
+    assert grid.nearest_within(lats[7], lngs[7]) <= 7
+    assert grid.nearest_within(0.0, 0.0) == -1
+    assert SpatialGrid([], [], cell_size=CELL).within([1.0], [1.0]).tolist() == [-1]
+    with pytest.raises(ValueError):
+        grid.within(lats, lngs, radius=CELL * 2)
+    with pytest.raises(ValueError):
+        SpatialGrid(lats, lngs, cell_size=CELL, halo=False).within(lats, lngs)
+
+
+@pytest.mark.parametrize('halo', [True, False])
+@pytest.mark.parametrize('bbox', [
+    (48.852, 2.342, 48.855, 2.347),   # a few cells
+    (48.80, 2.30, 48.90, 2.40),       # more cells than occupied: flat scan
+    (10.0, 10.0, 10.1, 10.1),         # nothing there
+])
+def test_query_bbox_matches_brute_force(points, halo, bbox):
+    lats, lngs = points
+    min_lat, min_lng, max_lat, max_lng = bbox
+    expected = np.flatnonzero((lats >= min_lat) & (lats <= max_lat) & (lngs >= min_lng) & (lngs <= max_lng))
+
+    grid = SpatialGrid(lats, lngs, cell_size=CELL, halo=halo)
+
+    np.testing.assert_array_equal(grid.query_bbox(*bbox), expected)
+
+
+def test_query_bbox_is_inclusive():
+    grid = SpatialGrid([1.0, 2.0], [1.0, 2.0], cell_size=0.5)
+
+    assert grid.query_bbox(1.0, 1.0, 2.0, 2.0).tolist() == [0, 1]
+    assert SpatialGrid([], [], cell_size=0.5).query_bbox(0, 0, 1, 1).tolist() == []
@@ -0,0 +1,67 @@
+"""
+Per-client subscriptions map onto Socket.IO rooms, so events reach subscribers only
+"""
+from websocket.simulation_stream import (
+    SIMULATION_FULL_ROOM, VEHICLES_DELTA_ROOM, VEHICLES_FULL_ROOM
+)
+
+DEFAULT_ROOMS = {SIMULATION_FULL_ROOM, VEHICLES_FULL_ROOM, 'traffic_light_update', 'metrics_update', 'simulation_status'}
+
+
+def socket_rooms(stream, client_id):
+    """Rooms the Socket.IO server has the client in (besides its own sid room)"""
+    return set(stream.socketio.server.manager.get_rooms(client_id, '/')) - {client_id, None}
+
+
+def publish(stream, channels):
+    stream.simulator.update_simulation(stream.simulator.clock.step)
+    with stream.step_lock:
+        frame = stream._capture_frame()
+    with stream.publish_lock:
+        stream._publish_frame(frame, channels)
+
+
+def test_new_clients_are_in_every_default_room(stream, connect):
+    connect(stream)
+    client_id = next(iter(stream.clients))
+
+    assert stream.client_rooms[client_id] == DEFAULT_ROOMS
+    assert socket_rooms(stream, client_id) == DEFAULT_ROOMS
+    assert all(client_id in stream.room_members[room] for room in DEFAULT_ROOMS)
+
+
+def test_explicit_subscriptions_replace_the_defaults(stream, connect):
+    client = connect(stream)
+    client_id = next(iter(stream.clients))
+
+    client.emit('subscribe', {'event_type': 'metrics_update'})
+    assert socket_rooms(stream, client_id) == {'metrics_update'}
+    client.emit('subscribe', {'event_type': 'vehicle_delta'})
+    assert socket_rooms(stream, client_id) == {'metrics_update', VEHICLES_DELTA_ROOM}
+
+    client.emit('unsubscribe', {'event_type': 'metrics_update'})
+    assert socket_rooms(stream, client_id) == {VEHICLES_DELTA_ROOM}
+    assert client_id not in stream.room_members['metrics_update']
+
+
+def test_events_reach_subscribers_only(stream, connect):
+    stream.simulator.start_simulation('default')
+    metrics_client, everything_client = connect(stream), connect(stream)
+    metrics_client.emit('subscribe', {'event_type': 'metrics_update'})
+    metrics_client.get_received()
+
+    publish(stream, {'simulation', 'vehicles', 'traffic_lights', 'metrics', 'status'})
+
+    assert {m['name'] for m in metrics_client.get_received()} == {'metrics_update'}
+    assert {m['name'] for m in everything_client.get_received()} >= {
+        'simulation_update', 'vehicle_update', 'traffic_light_update', 'metrics_update', 'simulation_status'}
+
+
+def test_disconnected_clients_leave_their_rooms(stream, connect):
+    client = connect(stream)
+    client_id = next(iter(stream.clients))
+
+    client.disconnect()
+
+    assert client_id not in stream.client_rooms
+    assert not any(client_id in members for members in stream.room_members.values())
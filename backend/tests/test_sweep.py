@@ -0,0 +1,17 @@
+"""
+Sweeps on the process pool give the same summaries as inline runs
+"""
+from simulation.batch_runner import run_scenario, summarize_metrics
+from simulation.sweep import SweepExecutor, expand_sweep, run_spec
+
+
+def test_sweep_results_match_inline_runs():
+    specs = expand_sweep(['default', 'weekend'], range(2), 10, {'vehicle_count': [20]}, engine='numpy')
+    results = sorted(SweepExecutor(max_workers=2).run(specs), key=lambda result: result['run_id'])
+
+    assert [result['run_id'] for result in results] == list(range(4))
+    for spec, result in zip(specs, results):
+        assert 'error' not in result
+        assert result['summary'] == run_spec(spec)['summary']
+        assert result['summary'] == summarize_metrics(
+            run_scenario(spec['scenario'], 10, seed=spec['seed'], engine='numpy', config=spec['config']))
@@ -0,0 +1,53 @@
+"""
+TraceRecorder chunking and the columns it writes
+"""
+import numpy as np
+import pytest
+
+from simulation.factory import create_simulator
+from simulation.trace_recorder import TraceRecorder, load_trace_chunk, load_trace_manifest
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_records_every_tick_in_chunks(tmp_path, compress):
+    simulator = create_simulator({'engine': 'numpy', 'seed': 5, 'vehicle_count': 30})
+    simulator.start_simulation('default')
+    recorder = TraceRecorder(str(tmp_path), chunk_ticks=8, max_pending_chunks=1, compress=compress)
+    recorder.attach(simulator)
+
+    ticks = []
+    for _ in range(21):
+        simulator.update_simulation(simulator.clock.step)
+        ticks.append((simulator.clock.now, [v['id'] for v in simulator.vehicles],
+                      simulator.arrays.column('lat').copy()))
+    recorder.detach()
+
+    manifest = load_trace_manifest(str(tmp_path))
+    assert [c['ticks'] for c in manifest['chunks']] == [8, 8, 5]
+    assert recorder.get_status()['ticksRecorded'] == 21
+    assert recorder.error is None
+
+    rows = 0
+    for chunk in manifest['chunks']:
+        for mmap in (False, True):
+            columns = load_trace_chunk(str(tmp_path), chunk, mmap=mmap)
+            offsets = columns['tick_offsets']
+            for tick, time in enumerate(columns['tick_time']):
+                recorded_time, ids, lats = ticks[rows + tick]
+                start, stop = offsets[tick], offsets[tick + 1]
+                assert time == recorded_time
+                assert columns['vehicle_ids'][columns['vehicle_code'][start:stop]].tolist() == ids
+                np.testing.assert_array_equal(columns['lat'][start:stop], lats)
+        rows += chunk['ticks']
+
+
+def test_detach_without_ticks_writes_an_empty_manifest(tmp_path):
+    simulator = create_simulator({'engine': 'dict', 'seed': 1})
+    recorder = TraceRecorder(str(tmp_path))
+    recorder.attach(simulator)
+    with pytest.raises(RuntimeError):
+        recorder.attach(simulator)
+    recorder.detach()
+
+    assert load_trace_manifest(str(tmp_path))['chunks'] == []
+    assert simulator.tick_listeners == []
@@ -0,0 +1,110 @@
+"""
+Recorded traces played back through TraceReplaySource.seek
+"""
+import os
+
+import pytest
+
+from config import Config
+from simulation.factory import create_simulator
+from simulation.trace_recorder import TraceRecorder
+from simulation.trace_replay import TraceReplaySource
+
+TICKS = 25
+
+
+@pytest.fixture(scope='module')
+def recording(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('trace'))
+    simulator = create_simulator({'engine': 'dict', 'seed': 9, 'vehicle_count': 20})
+    simulator.start_simulation('default')
+    recorder = TraceRecorder(directory, chunk_ticks=10)
+    recorder.attach(simulator)
+
+    frames = []
+    for _ in range(TICKS):
+        simulator.update_simulation(simulator.clock.step)
+        frames.append({
+            'time': simulator.clock.now,
+            'vehicles': [(v['id'], v['position']['lat'], v['position']['lng']) for v in simulator.vehicles],
+            'phases': [tl['currentPhase'] for tl in simulator.traffic_lights],
+            'metrics': simulator.metrics
+        })
+    recorder.detach()
+    return directory, frames
+
+
+def replayed(source):
+    return {
+        'time': source.simulation_time,
+        'vehicles': [(v['id'], v['position']['lat'], v['position']['lng']) for v in source.vehicles],
+        'phases': [tl['currentPhase'] for tl in source.traffic_lights],
+        'metrics': source.metrics
+    }
+
+
+@pytest.mark.parametrize('tick', [0, 9, 10, 17, TICKS - 1])
+def test_seek_lands_on_the_recorded_tick(recording, tick):
+    directory, frames = recording
+    source = TraceReplaySource(directory, cache_chunks=1)
+
+    assert source.seek(frames[tick]['time']) == frames[tick]['time']
+    assert replayed(source) == frames[tick]
+
+
+def test_seek_between_ticks_and_out_of_range(recording):
+    directory, frames = recording
+    source = TraceReplaySource(directory)
+    step = frames[1]['time'] - frames[0]['time']
+
+    assert source.seek(frames[12]['time'] + step / 2) == frames[12]['time']
+    assert source.seek(-1.0) == frames[0]['time']
+    assert source.seek(1e9) == frames[-1]['time']
+
+
+def test_backward_seek_after_playback(recording):
+    directory, frames = recording
+    source = TraceReplaySource(directory)
+    source.start_simulation()
+    source.set_speed('max')
+    while not source.is_paused:
+        source.advance(0.1)
+
+    assert replayed(source) == frames[-1]
+    source.seek(frames[3]['time'])
+    assert replayed(source) == frames[3]
+    assert source.vehicle_columns()['ids'] == [v[0] for v in frames[3]['vehicles']]
+
+
+@pytest.fixture
+def replaying(recording, stream, connect, monkeypatch):
+    """A client whose stream replays the recording"""
+    directory, _ = recording
+    monkeypatch.setattr(Config, 'SIMULATION_TRACE_DIR', os.path.dirname(directory))
+    client = connect(stream)
+    client.emit('command', {'command': 'replay', 'trace': os.path.basename(directory), 'time': 1.0})
+    client.get_received()
+    return client
+
+
+def test_replay_command_starts_the_source_before_streaming_it(replaying, stream):
+    source = stream.simulator
+    assert stream.replaying and source.is_running
+    assert stream.current_frame().simulation_time > 1.0 - 1e-6
+
+
+@pytest.mark.parametrize('event, data', [
+    ('command', {'command': 'start', 'scenario_id': 'default'}),
+    ('change_scenario', {'scenario_id': 'default'}),
+    ('emergency_vehicle', {}),
+])
+def test_live_requests_are_rejected_while_replaying(replaying, stream, event, data):
+    live = stream.live_simulator
+    running = live.is_running
+
+    replaying.emit(event, data)
+    received = replaying.get_received()
+
+    assert [m['name'] for m in received] == ['error']
+    assert 'replaying' in received[0]['args'][0]['message']
+    assert live.is_running == running and stream.replaying
@@ -0,0 +1,64 @@
+"""
+Traffic light updates carry only the lights whose phase changed, plus periodic full refreshes
+"""
+
+
+def publish(stream, full=False):
+    """Publish the simulator's current lights (no tick, so nothing changes by itself)"""
+    with stream.step_lock:
+        frame = stream._capture_frame()
+    with stream.publish_lock:
+        stream._publish_frame(frame, {'traffic_lights', 'traffic_lights_full'} if full else {'traffic_lights'})
+
+
+def light_updates(client):
+    return [m['args'][0] for m in client.get_received() if m['name'] == 'traffic_light_update']
+
+
+def next_phase(stream, index):
+    """Move one light to its next phase and return its id"""
+    light = stream.simulator.traffic_lights[index]
+    light['currentPhase'] = (light['currentPhase'] + 1) % len(light['phases'])
+    light['state'] = light['phases'][light['currentPhase']]['state']
+    return light['id']
+
+
+def test_unchanged_lights_are_not_resent(stream, connect):
+    stream.simulator.start_simulation('default')
+    client = connect(stream)
+    publish(stream)
+    assert [update['full'] for update in light_updates(client)] == [True]
+
+    publish(stream)
+    publish(stream)
+    assert light_updates(client) == []
+
+
+def test_only_changed_lights_are_sent(stream, connect):
+    stream.simulator.start_simulation('default')
+    client = connect(stream)
+    publish(stream)
+    client.get_received()
+
+    changed_id = next_phase(stream, 1)
+    publish(stream)
+
+    updates = light_updates(client)
+    assert len(updates) == 1 and updates[0]['full'] is False
+    assert [tl['id'] for tl in updates[0]['traffic_lights']] == [changed_id]
+
+
+def test_refreshes_and_joiners_get_every_light(stream, connect):
+    stream.simulator.start_simulation('default')
+    client = connect(stream)
+    publish(stream)
+    client.get_received()
+    count = len(stream.simulator.traffic_lights)
+
+    joiner = connect(stream)
+    publish(stream)
+    assert light_updates(client) == []
+    assert [(u['full'], len(u['traffic_lights'])) for u in light_updates(joiner)] == [(True, count)]
+
+    publish(stream, full=True)
+    assert [(u['full'], len(u['traffic_lights'])) for u in light_updates(client)] == [(True, count)]
@@ -0,0 +1,57 @@
+"""
+MockSimulator's vehicle id -> slot index (swap-remove, lazy reindex) agrees with a linear scan
+"""
+import random
+
+from simulation.factory import create_simulator
+
+
+def scan(simulator, vehicle_id):
+    return next((v for v in simulator.vehicles if v['id'] == vehicle_id), None)
+
+
+def exact_index(simulator):
+    return {v['id']: slot for slot, v in enumerate(simulator.vehicles)}
+
+
+def assert_index_matches_scan(simulator, ids):
+    for vehicle_id in ids:
+        assert simulator.get_vehicle_by_id(vehicle_id) is scan(simulator, vehicle_id)
+
+
+def test_lookups_and_removals_match_a_linear_scan():
+    simulator = create_simulator({'engine': 'dict', 'seed': 11, 'vehicle_count': 60, 'verbose': False})
+    simulator.start_simulation('default')
+    rng = random.Random(3)
+    seen = {v['id'] for v in simulator.vehicles}
+    edited = False
+
+    for step in range(300):
+        op = rng.random()
+        ids = [v['id'] for v in simulator.vehicles]
+        if op < 0.4:
+            simulator.update_simulation(simulator.clock.step)  # spawns and swap-removes
+        elif op < 0.7 and ids:
+            vehicle_id = rng.choice(ids)
+            assert simulator.remove_vehicle(vehicle_id)
+            assert not simulator.remove_vehicle(vehicle_id)
+        elif op < 0.8 and len(ids) > 1:
+            # Edited outside the helpers: the index must notice and rebuild
+            simulator.vehicles.insert(0, simulator.vehicles.pop())
+            edited = True
+        elif op < 0.85:
+            simulator.vehicles = list(reversed(simulator.vehicles))
+            edited = True
+        else:
+            simulator.add_emergency_vehicle()
+
+        seen.update(v['id'] for v in simulator.vehicles)
+        if not edited:
+            # The helpers keep the index exact, with no reindex needed
+            assert simulator._vehicle_slots == exact_index(simulator)
+        if step % 10 == 0:
+            assert_index_matches_scan(simulator, seen | {'missing'})
+            edited = False
+
+    assert_index_matches_scan(simulator, seen | {'missing'})
+    assert simulator.running_metrics.total_vehicles == len(simulator.vehicles)